@@ -0,0 +1,92 @@
+"""
+Allocation report for the hot loop of LogParser
+
+Measures with tracemalloc how many bytes every stage allocates per line and how
+much memory is alive at the peak while the lines are processed. The previous
+loop kept the decoded dictionary of a line alive until the next line was
+decoded. The current loop only keeps a LogRecord.
+Run from the repository root: python -m benchmarks.bench_allocations
+"""
+import json
+import tracemalloc
+
+from json_log_parser.log_parser import LogParser
+
+LINES = 2000
+LOG_LINE = ('{{"ts":1551140352,"pt":55,"si":"3380fb19-0bdb-46ab-8781-e4c5cd448074",'
+            '"uu":"0dd24034-36d6-4b1e-a6c1-a52cc984f105",'
+            '"bg":"77e28e28-745a-474b-a496-3c0e086eaec0",'
+            '"sha":"abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",'
+            '"nm":"file{0}.pdf","ph":"/efvrfutgp/expgh/phkkrw","dp":2}}')
+
+
+def document_loop(log_parser, lines, unique_files):
+    """
+    Previous loop, kept here for comparison
+    """
+    name_field = log_parser.json_validator.name_field
+    for line in lines:
+        document = log_parser.get_json_document(line)
+        unique_files.add(document[name_field])
+
+
+def record_loop(log_parser, lines, unique_files):
+    for line in lines:
+        record = log_parser.get_log_record(line)
+        unique_files.add(record.filename)
+
+
+def measure_per_line(stage, lines):
+    """
+    Average bytes a stage allocates for a single line
+    """
+    total = 0
+    for line in lines:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = stage(line)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+        del result
+    return total / len(lines)
+
+
+def measure_loop_peak(loop, log_parser, lines):
+    """
+    Bytes alive at the peak of a loop over all lines, above the memory at its start
+    """
+    unique_files = set()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    loop(log_parser, lines, unique_files)
+    _, peak = tracemalloc.get_traced_memory()
+    return peak - before
+
+
+def main():
+    log_parser = LogParser()
+    # Few unique filenames, so the peak is not the growth of the set
+    lines = [LOG_LINE.format(i % 10).encode() for i in range(LINES)]
+    log_parser.json_validator.refresh_clock()
+    record_loop(log_parser, lines, set())
+
+    tracemalloc.start()
+    try:
+        stages = [
+            ('decode', json.loads),
+            ('decode and validate', log_parser.get_json_document),
+            ('decode, validate, record', log_parser.get_log_record),
+        ]
+        print('Peak bytes allocated while a line is processed')
+        for name, stage in stages:
+            print('  {0:<26} {1:8.0f}'.format(name, measure_per_line(stage, lines)))
+        print('Peak bytes alive in the loop')
+        for name, loop in [('dictionary (previous)', document_loop),
+                           ('LogRecord', record_loop)]:
+            print('  {0:<26} {1:8.0f}'.format(name, measure_loop_peak(loop, log_parser, lines)))
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark matrix for the auto-tuner
+
+Generates logs of different sizes and invalid line ratios and processes each of
+them serially, with fixed worker counts and with the tuned plan. The tuned run
+should be close to the fastest fixed configuration in every row.
+Run from the repository root: python -m benchmarks.bench_auto_tuner
+"""
+import logging
+import os
+import tempfile
+import time
+
+from json_log_parser.auto_tuner import AutoTuner
+from json_log_parser.log_parser import LogParser
+from json_log_parser.parallel_parser import ParallelLogParser
+
+LOG_LINE = '{{"ts":1551140352,"pt":55,' \
+           '"si":"3380fb19-0bdb-46ab-8781-e4c5cd448074",' \
+           '"uu":"0dd24034-36d6-4b1e-a6c1-a52cc984f105",' \
+           '"bg":"77e28e28-745a-474b-a496-3c0e086eaec0",' \
+           '"sha":"abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",' \
+           '"nm":"file{0}.{1}","ph":"/efvrfutgp/expgh/phkkrw","dp":{2}}}\n'
+
+LINE_COUNTS = [2000, 50000, 400000]
+INVALID_RATIOS = [0.0, 0.5]
+
+
+def write_log(path, lines, invalid_ratio):
+    invalid_every = int(1 / invalid_ratio) if invalid_ratio else 0
+    with open(path, 'w') as w:
+        for i in range(lines):
+            # dp 9 is outside the enum of the schema
+            dp = 9 if invalid_every and i % invalid_every == 0 else 2
+            w.write(LOG_LINE.format(i, 'pdf' if i % 2 else 'txt', dp))
+
+
+def measure(parallel_parser, path):
+    start = time.perf_counter()
+    parallel_parser.build_state(path)
+    return time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.INFO)
+    log_parser = LogParser()
+    cpus = os.cpu_count() or 1
+    fixed_workers = sorted({1, 2, cpus})
+    header = '{0:>8} {1:>8}'.format('lines', 'invalid')
+    header += ''.join('{0:>10}'.format('w={0}'.format(w)) for w in fixed_workers)
+    print(header + '{0:>10}  plan'.format('tuned'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for lines in LINE_COUNTS:
+            for invalid_ratio in INVALID_RATIOS:
+                path = os.path.join(directory, 'log.json')
+                write_log(path, lines, invalid_ratio)
+                row = '{0:>8} {1:>8.1f}'.format(lines, invalid_ratio)
+                for workers in fixed_workers:
+                    seconds = measure(ParallelLogParser(log_parser, workers=workers), path)
+                    row += '{0:>9.3f}s'.format(seconds)
+
+                tuner = AutoTuner(log_parser)
+                seconds = measure(ParallelLogParser(log_parser, tuner), path)
+                plan = tuner.tune(path)
+                print(row + '{0:>9.3f}s  {1} workers, batch {2}, block {3}'.format(
+                    seconds, plan.workers, plan.batch_size, plan.block_size))
+
+
+if __name__ == '__main__':
+    main()
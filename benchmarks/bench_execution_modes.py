@@ -0,0 +1,64 @@
+"""
+Benchmark of the serial, thread pool and process pool modes
+
+Generates the same synthetic logs for every mode and processes them with a
+fixed worker count and batch size. Threads only process lines in parallel on a
+free-threaded build of Python, with the GIL they show the cost of the pool alone.
+Run from the repository root: python -m benchmarks.bench_execution_modes
+"""
+import logging
+import os
+import tempfile
+import time
+
+from json_log_parser.log_parser import LogParser
+from json_log_parser.parallel_parser import ParallelLogParser
+
+LOG_LINE = '{{"ts":1551140352,"pt":55,' \
+           '"si":"3380fb19-0bdb-46ab-8781-e4c5cd448074",' \
+           '"uu":"0dd24034-36d6-4b1e-a6c1-a52cc984f105",' \
+           '"bg":"77e28e28-745a-474b-a496-3c0e086eaec0",' \
+           '"sha":"abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",' \
+           '"nm":"file{0}.{1}","ph":"/efvrfutgp/expgh/phkkrw","dp":2}}\n'
+
+LINE_COUNTS = [20000, 100000, 400000]
+BATCH_SIZE = 4 * 1024 * 1024
+
+
+def write_log(path, lines):
+    with open(path, 'w') as w:
+        for i in range(lines):
+            w.write(LOG_LINE.format(i, 'pdf' if i % 2 else 'txt'))
+
+
+def measure(build_state, path):
+    start = time.perf_counter()
+    build_state(path)
+    return time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.INFO)
+    log_parser = LogParser()
+    # At least two, a single worker would be a serial run
+    workers = max(2, os.cpu_count() or 1)
+    print('GIL enabled: {0}, {1} workers'.format(ParallelLogParser.is_gil_enabled(), workers))
+    modes = [
+        ('serial', log_parser.build_state),
+        ('threads', ParallelLogParser(log_parser, workers=workers, batch_size=BATCH_SIZE,
+                                      executor='thread').build_state),
+        ('processes', ParallelLogParser(log_parser, workers=workers,
+                                        batch_size=BATCH_SIZE).build_state),
+    ]
+    print('{0:>8}'.format('lines') + ''.join('{0:>11}'.format(name) for name, _ in modes))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for lines in LINE_COUNTS:
+            path = os.path.join(directory, 'log.json')
+            write_log(path, lines)
+            print('{0:>8}'.format(lines) + ''.join(
+                '{0:>10.3f}s'.format(measure(build_state, path)) for _, build_state in modes))
+
+
+if __name__ == '__main__':
+    main()
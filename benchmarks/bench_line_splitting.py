@@ -0,0 +1,72 @@
+"""
+Throughput benchmark for reading a log file line by line
+
+Compares the text mode line iterator of FileReader.read_file, a binary
+readline loop and the block splitter of FileReader.read_lines with different
+block sizes, on short log lines and on very long lines.
+Run from the repository root: python -m benchmarks.bench_line_splitting
+"""
+import os
+import tempfile
+import time
+
+from json_log_parser.file_reader import FileReader
+
+LOG_LINE = '{{"ts":1551140352,"pt":55,' \
+           '"si":"3380fb19-0bdb-46ab-8781-e4c5cd448074",' \
+           '"uu":"0dd24034-36d6-4b1e-a6c1-a52cc984f105",' \
+           '"bg":"77e28e28-745a-474b-a496-3c0e086eaec0",' \
+           '"sha":"abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",' \
+           '"nm":"file{0}.pdf","ph":"/efvrfutgp/expgh/phkkrw","dp":2}}\n'
+SHORT_LINES = 300000
+LONG_LINES = 40
+LONG_LINE_SIZE = 4 * 1024 * 1024
+
+
+def binary_readline(filename):
+    with open(filename, 'rb') as r:
+        yield from r
+
+
+def measure(line_generator, size):
+    start = time.perf_counter()
+    lines = 0
+    for _ in line_generator:
+        lines += 1
+    seconds = time.perf_counter() - start
+    return lines, size / seconds / 1024 / 1024
+
+
+def run(name, filename):
+    size = os.path.getsize(filename)
+    print('{0} ({1:.0f} MB)'.format(name, size / 1024 / 1024))
+    cases = [
+        ('read_file (text lines)', lambda: FileReader.read_file(filename)),
+        ('binary readline', lambda: binary_readline(filename)),
+    ]
+    for block_size in (64 * 1024, 1024 * 1024, 4 * 1024 * 1024):
+        cases.append(('read_lines, {0} KB blocks'.format(block_size // 1024),
+                      lambda block_size=block_size: FileReader.read_lines(filename, block_size)))
+
+    for case_name, case in cases:
+        lines, throughput = max((measure(case(), size) for _ in range(3)),
+                                key=lambda result: result[1])
+        print('    {0:<30} {1:8d} lines {2:8.0f} MB/s'.format(case_name, lines, throughput))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'short.json')
+        with open(filename, 'w') as w:
+            w.writelines(LOG_LINE.format(i) for i in range(SHORT_LINES))
+        run('Short lines', filename)
+
+        filename = os.path.join(directory, 'long.json')
+        with open(filename, 'w') as w:
+            for _ in range(LONG_LINES):
+                w.write('x' * LONG_LINE_SIZE + '\n')
+        run('Long lines', filename)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark for the filename and path checks of has_valid_data
+
+Compares the previous null byte check, which encoded every value to UTF-8, with
+searching the str directly and with a single regular expression scan for '/'
+and the null byte, on a short filename and on paths up to the 4096 character limit.
+Run from the repository root: python -m benchmarks.bench_path_checks
+"""
+import re
+import timeit
+
+from json_log_parser.json_validator import JSONValidator
+
+NUMBER = 200000
+FORBIDDEN = re.compile('[/\x00]')
+
+
+def encode_check(value):
+    """
+    Previous implementation, kept here for comparison
+    """
+    if '/' in value:
+        raise ValueError("Invalid character '/' in filename")
+    if b'\x00' in value.encode('utf-8'):
+        raise ValueError('Filename contains null bytes')
+
+
+def regex_check(value):
+    """
+    Both characters in a single scan
+    """
+    if FORBIDDEN.search(value):
+        raise ValueError('Invalid character in filename')
+
+
+def main():
+    validator = JSONValidator()
+    for length in (16, 256, 4096):
+        value = 'a' * (length - 4) + '.pdf'
+        document = {'nm': value, 'ph': value}
+        cases = [
+            ('encode', lambda: encode_check(value)),
+            ('regex, single scan', lambda: regex_check(value)),
+            ('str, is_valid_filename', lambda: JSONValidator.is_valid_filename(value)),
+            ('has_valid_data, nm and ph', lambda: validator.has_valid_data(document)),
+        ]
+        print('{0} characters'.format(length))
+        for name, case in cases:
+            seconds = min(timeit.repeat(case, number=NUMBER, repeat=3))
+            print('  {0:<27} {1:8.1f} ns/call'.format(name, seconds / NUMBER * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Micro-benchmark for timestamp validation
+
+Compares the numeric range check in JSONValidator with the previous approach
+that created two datetime objects for every line.
+Run from the repository root: python -m benchmarks.bench_timestamp
+"""
+import time
+import timeit
+from datetime import datetime
+
+from json_log_parser.json_validator import JSONValidator
+
+NUMBER = 1000000
+
+
+def datetime_check(timestamp):
+    """
+    Previous implementation, kept here for comparison
+    """
+    d = datetime.fromtimestamp(timestamp)
+    if d > datetime.utcnow():
+        raise ValueError('Timestamp is in the future')
+
+
+def main():
+    timestamp = time.time() - 3600
+    max_timestamp = time.time()
+    cases = [
+        ('datetime objects', lambda: datetime_check(timestamp)),
+        ('numeric, clock per call', lambda: JSONValidator.is_valid_timestamp(timestamp)),
+        ('numeric, cached clock',
+         lambda: JSONValidator.is_valid_timestamp(timestamp, max_timestamp)),
+    ]
+    for name, case in cases:
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=3))
+        print('{0:<25} {1:8.1f} ns/call'.format(name, seconds / NUMBER * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+from json_log_parser.cli import main
+
+main()
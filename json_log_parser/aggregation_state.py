@@ -0,0 +1,227 @@
+"""
+json_log_parser.aggregation_state
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains the aggregation state of one or more processed log shards.
+
+The state holds the unique filenames together with the processing and exception
+stats. States of different shards can be merged. The merge is a set union for
+the filenames and a sum for the stats, so it is associative and commutative and
+shards can be combined in any order or tree-wise without counting a filename twice.
+
+Binary format
+    magic 'JLPS', format version (1 byte), zlib compressed payload
+    payload: processing stats, exception stats, unique filenames
+        stats: number of entries (uint32), then per entry
+            key length (uint32), UTF-8 key, value (uint64)
+        filenames: number of names (uint64), then per name in sorted order
+            length (uint32), UTF-8 name
+All integers are little endian. Sorting the names makes the output
+deterministic and helps the compression.
+
+A FilenameStore given as unique_files is kept as it is, so a state built with
+compact strings does not expand every filename into a str object
+"""
+import struct
+import zlib
+from collections import Counter
+
+from json_log_parser.exceptions.state_format_error import StateFormatError
+from json_log_parser.string_store import FilenameStore
+
+MAGIC = b'JLPS'
+VERSION = 1
+ENCODING = 'utf-8'
+ERRORS = 'surrogatepass'
+
+
+class AggregationState:
+    def __init__(self, unique_files=(), processing_stats=None, exception_stats=None):
+        """
+        Constructor
+        :param unique_files: iterable of filenames, for example a set or a FilenameStore
+        :param processing_stats: dictionary of line stats
+        :param exception_stats: dictionary of invalid line reasons
+        """
+        if isinstance(unique_files, FilenameStore):
+            self.unique_files = unique_files
+        else:
+            self.unique_files = set(unique_files)
+        self.processing_stats = Counter(processing_stats or {})
+        self.exception_stats = Counter(exception_stats or {})
+
+    def merge(self, other):
+        """
+        Combine two states into a new one. Neither state is modified
+        :param other: AggregationState
+        :return: AggregationState
+        """
+        merged = AggregationState()
+        merged.unique_files = set(self.unique_files)
+        merged.unique_files.update(other.unique_files)
+        merged.processing_stats = self.processing_stats + other.processing_stats
+        merged.exception_stats = self.exception_stats + other.exception_stats
+        return merged
+
+    @staticmethod
+    def merge_all(states):
+        """
+        Merge any number of states
+        :param states: iterable of AggregationState
+        :return: AggregationState
+        """
+        merged = AggregationState()
+        for state in states:
+            merged.update(state)
+        return merged
+
+    def update(self, other):
+        """
+        Merge another state into this one
+        :param other: AggregationState
+        """
+        if isinstance(self.unique_files, FilenameStore):
+            self.unique_files = set(self.unique_files)
+        self.unique_files.update(other.unique_files)
+        self.processing_stats.update(other.processing_stats)
+        self.exception_stats.update(other.exception_stats)
+
+    def dumps(self):
+        """
+        Serialize the state
+        :return: bytes
+        """
+        parts = []
+        for stats in (self.processing_stats, self.exception_stats):
+            parts.append(struct.pack('<I', len(stats)))
+            for key, value in sorted(stats.items()):
+                encoded_key = key.encode(ENCODING, ERRORS)
+                parts.append(struct.pack('<I', len(encoded_key)))
+                parts.append(encoded_key)
+                parts.append(struct.pack('<Q', value))
+
+        if isinstance(self.unique_files, FilenameStore):
+            names = sorted(map(self.unique_files.get_bytes, range(len(self.unique_files))))
+        else:
+            names = sorted(name.encode(ENCODING, ERRORS) for name in self.unique_files)
+        parts.append(struct.pack('<Q', len(names)))
+        for name in names:
+            parts.append(struct.pack('<I', len(name)))
+            parts.append(name)
+
+        return MAGIC + bytes([VERSION]) + zlib.compress(b''.join(parts))
+
+    def dump(self, fp):
+        """
+        Write the serialized state to a binary file object
+        """
+        fp.write(self.dumps())
+
+    @staticmethod
+    def loads(data):
+        """
+        Deserialize a state
+        :param data: bytes produced by dumps
+        :return: AggregationState
+        Raises StateFormatError if the data is not a valid state
+        """
+        state = AggregationState()
+        state.processing_stats, state.exception_stats, names = AggregationState.read_state(data)
+        try:
+            state.unique_files = set(name.decode(ENCODING, ERRORS) for name in names)
+        except UnicodeDecodeError as error:
+            raise StateFormatError('Corrupt aggregation state: {0}'.format(error))
+        return state
+
+    @staticmethod
+    def loads_extension_counts(data, extension_counter):
+        """
+        Count the extensions of the filenames of a serialized state without
+        loading the filenames. The names are unique already, so no set is built.
+        Every name stays UTF-8 bytes and only its distinct extensions are decoded
+        and normalized, once each. An empty filename is skipped, as in
+        FileExtensionCounter.add_extension_from_filename
+        :param data: bytes produced by dumps
+        :param extension_counter: FileExtensionCounter the counts are added to
+        :return: the processing stats of the state
+        Raises StateFormatError if the data is not a valid state
+        """
+        processing_stats, _, names = AggregationState.read_state(data)
+        extension_counts = Counter()
+        for name in names:
+            if name:
+                _, dot, extension = name.rpartition(b'.')
+                extension_counts[extension if dot else None] += 1
+
+        normalizer = extension_counter.normalizer
+        for extension, count in extension_counts.items():
+            if extension is None:
+                extension_counter.add_extension(extension_counter.get_no_extension(), count)
+                continue
+            try:
+                extension = extension.decode(ENCODING, ERRORS)
+            except UnicodeDecodeError as error:
+                raise StateFormatError('Corrupt aggregation state: {0}'.format(error))
+            if normalizer is not None:
+                extension = normalizer.normalize(extension)
+            extension_counter.add_extension(extension, count)
+        return processing_stats
+
+    @staticmethod
+    def read_state(data):
+        """
+        Check and decompress a serialized state
+        :param data: bytes produced by dumps
+        :return: (processing stats, exception stats, list of UTF-8 filenames).
+            The filenames are not decoded
+        Raises StateFormatError if the data is not a valid state
+        """
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+            raise StateFormatError('Not an aggregation state')
+        if data[len(MAGIC)] != VERSION:
+            raise StateFormatError('Unsupported state version {0}'.format(data[len(MAGIC)]))
+
+        try:
+            payload = zlib.decompress(data[len(MAGIC) + 1:])
+            position = 0
+            stats = []
+            for _ in range(2):
+                entries = Counter()
+                count, = struct.unpack_from('<I', payload, position)
+                position += 4
+                for _ in range(count):
+                    length, = struct.unpack_from('<I', payload, position)
+                    position += 4
+                    key = payload[position:position + length].decode(ENCODING, ERRORS)
+                    position += length
+                    entries[key], = struct.unpack_from('<Q', payload, position)
+                    position += 8
+                stats.append(entries)
+
+            names = []
+            count, = struct.unpack_from('<Q', payload, position)
+            position += 8
+            for _ in range(count):
+                length, = struct.unpack_from('<I', payload, position)
+                position += 4
+                names.append(payload[position:position + length])
+                position += length
+            if position != len(payload):
+                raise StateFormatError('Corrupt aggregation state: unexpected length')
+        except (zlib.error, struct.error, UnicodeDecodeError) as error:
+            raise StateFormatError('Corrupt aggregation state: {0}'.format(error))
+
+        return stats[0], stats[1], names
+
+    @staticmethod
+    def load(fp):
+        """
+        Read a serialized state from a binary file object
+        """
+        return AggregationState.loads(fp.read())
+
+    def __eq__(self, other):
+        return (isinstance(other, AggregationState) and
+                set(self.unique_files) == set(other.unique_files) and
+                self.processing_stats == other.processing_stats and
+                self.exception_stats == other.exception_stats)
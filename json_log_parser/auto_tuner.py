@@ -0,0 +1,199 @@
+"""
+json_log_parser.auto_tuner
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module picks the number of worker processes, the batch size and the reader
+block size for a log file.
+
+A small hourly log is done before a process pool has started, a 40 GB backfill
+needs every CPU. The tuner reads a sample from the start of the file and measures
+the mean line length, the ratio of invalid lines and the time needed to decode
+and validate a line. From these it estimates the serial run time and compares it
+with a simple model of a parallel run
+
+    pool start + worker start * workers + serial time / workers + merge time
+
+The worker count with the shortest estimate wins, one worker means a serial run
+without a pool. The merge time grows with the number of valid lines because every
+valid line can add a filename to the partial results.
+
+Every decision is logged and each value can be overridden
+"""
+import logging
+import math
+import os
+import time
+from collections import namedtuple
+
+from json_log_parser.exceptions.json_error import JSONError
+from json_log_parser.file_reader import FileReader
+from json_log_parser.log_parser import LogParser
+
+# size: file size in bytes, lines: number of sampled lines,
+# seconds_per_line: decode and validation time of a line
+InputProfile = namedtuple(
+    'InputProfile', ['size', 'lines', 'mean_line_length', 'invalid_ratio', 'seconds_per_line'])
+
+# batch_size: bytes of the file handed to a worker at a time
+# block_size: bytes the file reader reads at a time
+TuningPlan = namedtuple('TuningPlan', ['workers', 'batch_size', 'block_size', 'reason'])
+
+KB = 1024
+MB = 1024 * KB
+
+MIN_BATCH_SIZE = 1 * MB
+MAX_BATCH_SIZE = 256 * MB
+# More batches than workers keep all of them busy when some batches are slower
+BATCHES_PER_WORKER = 4
+MIN_BLOCK_SIZE = 64 * KB
+MAX_BLOCK_SIZE = 1 * MB
+# A block holds this many lines
+LINES_PER_BLOCK = 256
+
+
+class AutoTuner:
+    def __init__(self, log_parser=None, sample_size=256 * KB, max_workers=None,
+                 pool_start_seconds=0.05, worker_start_seconds=0.02,
+                 merge_seconds_per_line=1e-6):
+        """
+        Constructor
+        The default costs are conservative for forked workers. Check them on the
+        target host with benchmarks/bench_auto_tuner.py
+        :param log_parser: LogParser used to measure the cost of a line
+        :param sample_size: number of bytes sampled from the start of the file
+        :param max_workers: upper bound for the worker count, defaults to the number of CPUs
+        :param pool_start_seconds: fixed cost of starting a process pool
+        :param worker_start_seconds: cost of starting one worker process
+        :param merge_seconds_per_line: cost of returning and merging the result of a valid line
+        """
+        self.log_parser = log_parser or LogParser()
+        self.sample_size = sample_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool_start_seconds = pool_start_seconds
+        self.worker_start_seconds = worker_start_seconds
+        self.merge_seconds_per_line = merge_seconds_per_line
+
+    def tune(self, input_filename, workers=None, batch_size=None, block_size=None):
+        """
+        Profile the file and plan the run. Values that are given are used as they are
+        :param input_filename:
+        :param workers: override for the worker count
+        :param batch_size: override for the batch size
+        :param block_size: override for the reader block size
+        :return: TuningPlan
+        """
+        profile = self.profile(input_filename)
+        logging.info('Profiled %s: %d bytes, %d sampled lines, mean line length %.0f, '
+                     'invalid ratio %.2f, %.1f us per line',
+                     input_filename, profile.size, profile.lines, profile.mean_line_length,
+                     profile.invalid_ratio, profile.seconds_per_line * 1e6)
+        return self.plan(profile, workers, batch_size, block_size)
+
+    def profile(self, input_filename):
+        """
+        Measure a sample from the start of the file
+        :param input_filename:
+        :return: InputProfile
+        """
+        size = os.path.getsize(input_filename)
+        lines = list(FileReader.read_range(input_filename, 0, min(self.sample_size, size),
+                                           max_line_length=self.log_parser.max_line_length))
+        if not lines:
+            return InputProfile(size, 0, 0.0, 0.0, 0.0)
+
+        invalid = 0
+        self.log_parser.json_validator.refresh_clock()
+        start = time.perf_counter()
+        for line in lines:
+            try:
+                self.log_parser.get_json_document(line)
+            except JSONError:
+                invalid += 1
+        seconds = time.perf_counter() - start
+
+        return InputProfile(size, len(lines), sum(len(line) for line in lines) / len(lines),
+                            invalid / len(lines), seconds / len(lines))
+
+    def plan(self, profile, workers=None, batch_size=None, block_size=None):
+        """
+        Pick the worker count, batch size and block size for a profile
+        :param profile: InputProfile
+        :param workers: override for the worker count
+        :param batch_size: override for the batch size
+        :param block_size: override for the reader block size
+        :return: TuningPlan
+        """
+        if workers is None:
+            workers, reason = self.get_worker_count(profile)
+        else:
+            reason = 'workers set by caller'
+        if workers < 1:
+            raise ValueError('Worker count must be positive')
+
+        if block_size is None:
+            block_size = AutoTuner.get_block_size(profile)
+        if batch_size is None:
+            batch_size = AutoTuner.get_batch_size(profile, workers, block_size)
+        if batch_size <= 0 or block_size <= 0:
+            raise ValueError('Batch size and block size must be positive')
+
+        plan = TuningPlan(workers, batch_size, block_size, reason)
+        logging.info('Tuning plan: %d workers, batch size %d, block size %d (%s)',
+                     plan.workers, plan.batch_size, plan.block_size, plan.reason)
+        return plan
+
+    def estimate_seconds(self, profile, workers):
+        """
+        Estimated run time with the given number of workers
+        """
+        lines = profile.size / profile.mean_line_length
+        serial_seconds = lines * profile.seconds_per_line
+        if workers == 1:
+            return serial_seconds
+
+        valid_lines = lines * (1 - profile.invalid_ratio)
+        return (self.pool_start_seconds + self.worker_start_seconds * workers +
+                serial_seconds / workers + self.merge_seconds_per_line * valid_lines)
+
+    def get_worker_count(self, profile):
+        """
+        :return: (worker count with the shortest estimated run time, reason)
+        """
+        if not profile.lines:
+            return 1, 'empty file'
+        if self.max_workers == 1:
+            return 1, 'only one worker available'
+
+        serial_seconds = self.estimate_seconds(profile, 1)
+        best = min(range(1, self.max_workers + 1),
+                   key=lambda workers: self.estimate_seconds(profile, workers))
+        if best == 1:
+            return 1, 'serial estimate {0:.2f}s is shorter than starting a pool'.format(
+                serial_seconds)
+
+        return best, 'serial estimate {0:.2f}s, parallel estimate {1:.2f}s'.format(
+            serial_seconds, self.estimate_seconds(profile, best))
+
+    @staticmethod
+    def get_block_size(profile):
+        """
+        Power of two that holds LINES_PER_BLOCK mean lines
+        """
+        block_size = MIN_BLOCK_SIZE
+        while block_size < profile.mean_line_length * LINES_PER_BLOCK and \
+                block_size < MAX_BLOCK_SIZE:
+            block_size *= 2
+        return block_size
+
+    @staticmethod
+    def get_batch_size(profile, workers, block_size):
+        """
+        A serial run reads the file as a single batch. Otherwise every worker gets
+        BATCHES_PER_WORKER batches, rounded up to whole blocks
+        """
+        if workers == 1:
+            return max(profile.size, 1)
+
+        batch_size = math.ceil(profile.size / (workers * BATCHES_PER_WORKER))
+        batch_size = min(max(batch_size, MIN_BATCH_SIZE), MAX_BATCH_SIZE)
+        return math.ceil(batch_size / block_size) * block_size
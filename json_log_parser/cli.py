@@ -0,0 +1,357 @@
+"""
+json_log_parser.cli
+~~~~~~~~~~~~~~~~~~~
+
+Command line interface
+    python -m json_log_parser parse data/sample_log.json
+    python -m json_log_parser parse --schema-config shape.json other_log.json
+    python -m json_log_parser parse --parallel big_log.json
+    python -m json_log_parser parse --threads big_log.json
+    python -m json_log_parser parse --line-index big_log.json.idx big_log.json
+    python -m json_log_parser parse --partition-by bg big_log.json
+    python -m json_log_parser parse --dispositions priority big_log.json
+    python -m json_log_parser query-index big_log.json --extension exe
+    python -m json_log_parser serve --workers 4 < requests.jsonl
+    python -m json_log_parser dump-state shard1.json shard1.state
+    python -m json_log_parser merge-states shard1.state shard2.state
+    python -m json_log_parser compare-states monday.state tuesday.state
+    python -m json_log_parser coordinate /mnt/spool big1.json big2.json
+    python -m json_log_parser work /mnt/spool
+"""
+import argparse
+import contextlib
+import json
+import logging
+import sys
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.delta_report import DeltaReport, FORMATS as DELTA_FORMATS
+from json_log_parser.exceptions.input_filename_error import InputFilenameError
+from json_log_parser.exceptions.line_index_error import LineIndexError
+from json_log_parser.exceptions.state_format_error import StateFormatError
+from json_log_parser.json_validator import JSONValidator
+from json_log_parser.line_index import LineIndex
+from json_log_parser.log_parser import DEFAULT_MAX_LINE_LENGTH, DISPOSITION_MODES, LogParser
+from json_log_parser.parallel_parser import ParallelLogParser
+from json_log_parser.parser_service import ParserService
+from json_log_parser.progress_reporter import ProgressReporter
+from json_log_parser.resource_guard import ResourceGuard
+from json_log_parser.seen_filter import SeenFilter
+from json_log_parser.result_formatter import FORMATS, ResultFormatter, SORT_ORDERS
+from json_log_parser.work_queue import WorkQueueCoordinator, WorkQueueWorker
+
+
+def open_report(args):
+    """
+    Report file given with --report-file, or stdout
+    """
+    if not args.report_file:
+        return contextlib.nullcontext(sys.stdout)
+    if args.format == 'binary':
+        return open(args.report_file, 'wb')
+    return open(args.report_file, 'w', newline='')
+
+
+def get_result_formatter(args):
+    return ResultFormatter(args.format, args.sort, args.limit)
+
+
+def get_resource_guard(args):
+    """
+    ResourceGuard for the limits given on the command line, None if there are none
+    """
+    if args.memory_limit is None and args.max_lines is None and args.time_limit is None:
+        return None
+    return ResourceGuard(args.memory_limit, args.max_lines, args.time_limit)
+
+
+def get_progress_reporter(args):
+    """
+    ProgressReporter writing a status line to stderr, None without --progress
+    """
+    if not args.progress:
+        return None
+    return ProgressReporter(interval=args.progress_interval, status_stream=sys.stderr)
+
+
+def is_parallel(args):
+    return args.parallel or args.threads or args.workers or args.batch_size or args.block_size
+
+
+def open_seen_filter(args):
+    """
+    Seen filter given with --seen-filter, None if there is none
+    """
+    if not args.seen_filter:
+        return contextlib.nullcontext()
+    return contextlib.closing(SeenFilter.open(args.seen_filter, args.false_positive_rate))
+
+
+def parse_command(args):
+    json_validator = None
+    if args.schema_config:
+        json_validator = JSONValidator.from_config_file(args.schema_config)
+    with open_report(args) as output_stream, open_seen_filter(args) as seen_filter:
+        log_parser = LogParser(json_validator=json_validator, memory_budget=args.memory_budget,
+                               spill_dir=args.spill_dir,
+                               result_formatter=get_result_formatter(args),
+                               output_stream=output_stream,
+                               max_line_length=args.max_line_length or None,
+                               resource_guard=get_resource_guard(args),
+                               line_index_filename=args.line_index,
+                               seen_filter=seen_filter,
+                               partition_field=args.partition_by,
+                               disposition_mode=args.dispositions,
+                               progress_reporter=get_progress_reporter(args))
+        if is_parallel(args):
+            ParallelLogParser(log_parser, workers=args.workers, batch_size=args.batch_size,
+                              block_size=args.block_size,
+                              executor='thread' if args.threads else 'process').process_log(
+                args.input_filename)
+        else:
+            log_parser.process_log(args.input_filename)
+
+
+def query_index_command(args):
+    """
+    Print the lines found with the line index, prefixed with their line number
+    """
+    try:
+        line_index = LineIndex.load(args.input_filename, args.index)
+        if args.line is not None:
+            print(line_index.get_line(args.line).decode('utf-8', 'replace'))
+            return
+        if args.time_range:
+            documents = line_index.find_time_range(*args.time_range)
+        else:
+            documents = line_index.find_extension(args.extension)
+        for line_number, document in documents:
+            print('{0}: {1}'.format(line_number, json.dumps(document)))
+    except (LineIndexError, IndexError) as error:
+        print(str(error))
+
+
+def serve_command(args):
+    service = ParserService(workers=args.workers, max_pending=args.max_pending)
+    service.serve(sys.stdin, sys.stdout)
+
+
+def report_errors(command):
+    """
+    Print the error of a command instead of a traceback, like LogParser.process_log
+    """
+    def run(args):
+        try:
+            command(args)
+        except (InputFilenameError, StateFormatError, OSError) as error:
+            logging.error(error, exc_info=True)
+            print(str(error))
+
+    return run
+
+
+@report_errors
+def dump_state_command(args):
+    state = LogParser().build_state(args.input_filename)
+    with open(args.state_filename, 'wb') as w:
+        state.dump(w)
+
+
+@report_errors
+def merge_states_command(args):
+    """
+    Merge states and either write the merged state or print the final report.
+    The merge is associative so merged states can be merged again
+    """
+    states = []
+    for state_filename in args.state_filenames:
+        with open(state_filename, 'rb') as r:
+            states.append(AggregationState.load(r))
+
+    merged = AggregationState.merge_all(states)
+    if args.output:
+        with open(args.output, 'wb') as w:
+            merged.dump(w)
+    else:
+        with open_report(args) as output_stream:
+            LogParser(result_formatter=get_result_formatter(args),
+                      output_stream=output_stream).print_state_report(merged)
+
+
+@report_errors
+def compare_states_command(args):
+    """
+    Print the change of every extension between two states, outliers are flagged
+    """
+    delta_report = DeltaReport(args.min_change, args.min_relative_change)
+    deltas = delta_report.compare(DeltaReport.load_extension_counts(args.before_state),
+                                  DeltaReport.load_extension_counts(args.after_state))
+    if args.outliers_only:
+        deltas = DeltaReport.get_outliers(deltas)
+    with open_report(args) as output_stream:
+        output_stream.write(DeltaReport.format(deltas, args.format))
+
+
+def coordinate_command(args):
+    coordinator = WorkQueueCoordinator(args.spool_dir, lease_timeout=args.lease_timeout)
+    coordinator.submit(args.input_filenames, chunk_size=args.chunk_size)
+    state = coordinator.wait()
+    with open_report(args) as output_stream:
+        LogParser(result_formatter=get_result_formatter(args),
+                  output_stream=output_stream).print_state_report(state)
+
+
+def work_command(args):
+    worker = WorkQueueWorker(args.spool_dir, heartbeat_interval=args.heartbeat_interval)
+    worker.run(exit_when_idle=args.exit_when_idle)
+
+
+def add_report_arguments(command):
+    command.add_argument('--format', choices=FORMATS, default='text',
+                         help='format of the report')
+    command.add_argument('--sort', choices=SORT_ORDERS, default='name',
+                         help='sort the report by extension name or by count')
+    command.add_argument('--limit', type=int, help='maximum number of extensions in the report')
+    command.add_argument('--report-file', help='write the report to a file instead of stdout')
+
+
+def get_argument_parser():
+    argument_parser = argparse.ArgumentParser(
+        prog='json_log_parser',
+        description='Count unique filenames per extension in JSON logs')
+    commands = argument_parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parse = commands.add_parser('parse', help='process a log file and print the report')
+    parse.add_argument('input_filename')
+    parse.add_argument('--schema-config',
+                       help='JSON file with the schema, field rules and name field of the log')
+    parse.add_argument('--memory-budget', type=int,
+                       help='bytes of unique filenames kept in memory before they are '
+                            'spilled to disk. Counts stay exact')
+    parse.add_argument('--spill-dir', help='directory for spilled filenames')
+    parse.add_argument('--max-line-length', type=int, default=DEFAULT_MAX_LINE_LENGTH,
+                       help='longer lines are skipped and counted as invalid, 0 for no limit')
+    parse.add_argument('--memory-limit', type=int,
+                       help='resident memory in bytes. Filenames are spilled to disk close '
+                            'to the limit and reading stops at the limit')
+    parse.add_argument('--max-lines', type=int,
+                       help='stop after this many lines and report partial results')
+    parse.add_argument('--time-limit', type=float,
+                       help='stop after this many seconds and report partial results')
+    parse.add_argument('--line-index',
+                       help='write a sparse line index of the log to this file, '
+                            'serial runs only')
+    parse.add_argument('--seen-filter',
+                       help='file with the filenames of earlier runs. Counts are split into '
+                            'new and seen filenames and the file is updated')
+    parse.add_argument('--false-positive-rate', type=float, default=0.001,
+                       help='rate of new filenames reported as seen, used when the '
+                            'seen filter file is created')
+    parse.add_argument('--partition-by', metavar='FIELD',
+                       help='count the extensions per value of this field, for example bg. '
+                            'Serial runs only')
+    parse.add_argument('--dispositions', choices=DISPOSITION_MODES,
+                       help='also count the extensions per disposition in the same pass, '
+                            'MALICIOUS first. priority only keeps MALICIOUS apart. '
+                            'Serial runs only')
+    parse.add_argument('--progress', action='store_true',
+                       help='show the progress, rates and ETA on stderr, serial runs only')
+    parse.add_argument('--progress-interval', type=float, default=1.0,
+                       help='seconds between two progress updates')
+    parse.add_argument('--parallel', action='store_true',
+                       help='let the auto-tuner pick worker count, batch size and block size')
+    parse.add_argument('--threads', action='store_true',
+                       help='parallel processing in a thread pool instead of worker processes. '
+                            'Uses several cores only on a free-threaded Python')
+    parse.add_argument('--workers', type=int, help='override the tuned worker count')
+    parse.add_argument('--batch-size', type=int, help='override the tuned batch size in bytes')
+    parse.add_argument('--block-size', type=int,
+                       help='override the tuned reader block size in bytes')
+    add_report_arguments(parse)
+    parse.set_defaults(func=parse_command)
+
+    query_index = commands.add_parser(
+        'query-index', help='read matching lines of a log through its line index')
+    query_index.add_argument('input_filename')
+    query_index.add_argument('--index', help='line index file, defaults to the log name + .idx')
+    query = query_index.add_mutually_exclusive_group(required=True)
+    query.add_argument('--line', type=int, help='print the line with this 0 based number')
+    query.add_argument('--time-range', type=float, nargs=2, metavar=('START', 'END'),
+                       help='print the lines with START <= timestamp <= END')
+    query.add_argument('--extension', help='print the lines whose filename has this extension')
+    query_index.set_defaults(func=query_index_command)
+
+    serve = commands.add_parser(
+        'serve', help='process log files requested as JSON lines on stdin')
+    serve.add_argument('--workers', type=int, help='number of worker processes')
+    serve.add_argument('--max-pending', type=int,
+                       help='maximum number of jobs in flight, defaults to 2 * workers')
+    serve.set_defaults(func=serve_command)
+
+    dump_state = commands.add_parser(
+        'dump-state', help='process a log shard and write its aggregation state')
+    dump_state.add_argument('input_filename')
+    dump_state.add_argument('state_filename')
+    dump_state.set_defaults(func=dump_state_command)
+
+    merge_states = commands.add_parser(
+        'merge-states', help='merge aggregation states and print the final report')
+    merge_states.add_argument('state_filenames', nargs='+')
+    merge_states.add_argument('--output', help='write the merged state instead of the report')
+    add_report_arguments(merge_states)
+    merge_states.set_defaults(func=merge_states_command)
+
+    compare_states = commands.add_parser(
+        'compare-states', help='report the change of the extension counts between two states')
+    compare_states.add_argument('before_state')
+    compare_states.add_argument('after_state')
+    compare_states.add_argument('--min-change', type=int, default=1,
+                                help='smallest absolute change of an outlier')
+    compare_states.add_argument('--min-relative-change', type=float, default=0.5,
+                                help='smallest change relative to the count before of an '
+                                     'outlier, 0.5 is 50%%. New extensions always reach it')
+    compare_states.add_argument('--outliers-only', action='store_true',
+                                help='only report the outliers, largest change first')
+    compare_states.add_argument('--format', choices=DELTA_FORMATS, default='text',
+                                help='format of the report')
+    compare_states.add_argument('--report-file',
+                                help='write the report to a file instead of stdout')
+    compare_states.set_defaults(func=compare_states_command)
+
+    coordinate = commands.add_parser(
+        'coordinate', help='split log files into tasks for workers sharing a spool directory')
+    coordinate.add_argument('spool_dir')
+    coordinate.add_argument('input_filenames', nargs='+')
+    coordinate.add_argument('--chunk-size', type=int, default=256 * 1024 * 1024,
+                            help='size of a task in bytes')
+    coordinate.add_argument('--lease-timeout', type=float, default=60,
+                            help='seconds without a heartbeat before a task is retried')
+    add_report_arguments(coordinate)
+    coordinate.set_defaults(func=coordinate_command)
+
+    work = commands.add_parser('work', help='process tasks from a spool directory')
+    work.add_argument('spool_dir')
+    work.add_argument('--heartbeat-interval', type=float, default=10)
+    work.add_argument('--exit-when-idle', action='store_true',
+                      help='stop when no task is pending instead of waiting for more')
+    work.set_defaults(func=work_command)
+
+    return argument_parser
+
+
+def main(argv=None):
+    argument_parser = get_argument_parser()
+    args = argument_parser.parse_args(argv)
+    if args.command == 'parse' and args.memory_budget and is_parallel(args):
+        # Workers and the parent keep all unique filenames in memory
+        argument_parser.error('--memory-budget cannot be combined with parallel processing')
+    if args.command == 'parse' and args.line_index and is_parallel(args):
+        argument_parser.error('--line-index cannot be combined with parallel processing')
+    if args.command == 'parse' and args.progress and is_parallel(args):
+        argument_parser.error('--progress cannot be combined with parallel processing')
+    if args.command == 'parse' and args.partition_by and is_parallel(args):
+        argument_parser.error('--partition-by cannot be combined with parallel processing')
+    if args.command == 'parse' and args.dispositions and is_parallel(args):
+        argument_parser.error('--dispositions cannot be combined with parallel processing')
+    args.func(args)
@@ -0,0 +1,116 @@
+"""
+json_log_parser.delta_report
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module compares the extension counts of two runs, for example of two days.
+
+For every extension of either run the report has the count before and after,
+the absolute change and the change relative to the count before. Extensions
+that only appear after are new, extensions that only appear before vanished.
+A change is flagged as an outlier when it reaches both thresholds. A new
+extension counts as an infinite relative change.
+
+The counts are read from stored AggregationStates, so neither log is parsed
+again, see AggregationState.loads_extension_counts
+"""
+import json
+from collections import namedtuple
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.file_extension_counter import FileExtensionCounter
+
+# status: 'new', 'vanished', 'changed' or 'unchanged'
+# relative_change: change / before, None for a new extension
+ExtensionDelta = namedtuple('ExtensionDelta', [
+    'extension', 'before', 'after', 'change', 'relative_change', 'status', 'outlier'])
+
+FORMATS = ('text', 'json')
+
+
+class DeltaReport:
+    def __init__(self, min_change=1, min_relative_change=0.5):
+        """
+        Constructor
+        :param min_change: smallest absolute change of an outlier
+        :param min_relative_change: smallest change relative to the count before of an
+            outlier, 0.5 is 50% more or less
+        """
+        if min_change < 0 or min_relative_change < 0:
+            raise ValueError('Thresholds must not be negative')
+
+        self.min_change = min_change
+        self.min_relative_change = min_relative_change
+
+    @staticmethod
+    def load_extension_counts(state_filename, normalizer=None):
+        """
+        Extension counts of a stored AggregationState
+        :param state_filename: file written by AggregationState.dump
+        :param normalizer: optional ExtensionNormalizer applied before counting
+        :return: dictionary of extension to number of unique filenames
+        Raises StateFormatError if the file is not a valid state
+        """
+        extension_counter = FileExtensionCounter(normalizer)
+        with open(state_filename, 'rb') as r:
+            AggregationState.loads_extension_counts(r.read(), extension_counter)
+        return dict(extension_counter.get_extension_counts())
+
+    def compare(self, before_counts, after_counts):
+        """
+        Compare two sets of extension counts
+        :param before_counts: dictionary of extension to count of the earlier run
+        :param after_counts: dictionary of extension to count of the later run
+        :return: list of ExtensionDelta sorted by extension
+        """
+        deltas = []
+        for extension in sorted(before_counts.keys() | after_counts.keys()):
+            before = before_counts.get(extension, 0)
+            after = after_counts.get(extension, 0)
+            change = after - before
+            if not before:
+                status = 'new'
+                relative_change = None
+            else:
+                status = 'vanished' if not after else 'changed' if change else 'unchanged'
+                relative_change = change / before
+            outlier = (abs(change) >= self.min_change and change != 0 and
+                       (relative_change is None or
+                        abs(relative_change) >= self.min_relative_change))
+            deltas.append(ExtensionDelta(extension, before, after, change, relative_change,
+                                         status, outlier))
+        return deltas
+
+    @staticmethod
+    def format(deltas, output_format='text'):
+        """
+        Format the report
+        :param deltas: list of ExtensionDelta
+        :param output_format: 'text' or 'json'
+        :return: str
+        """
+        if output_format not in FORMATS:
+            raise ValueError("Unknown output format '{0}'".format(output_format))
+        if output_format == 'json':
+            return json.dumps([delta._asdict() for delta in deltas]) + '\n'
+
+        lines = []
+        for delta in deltas:
+            if delta.relative_change is None:
+                relative = 'new'
+            else:
+                relative = '{0:+.1%}'.format(delta.relative_change)
+                if delta.status == 'vanished':
+                    relative += ', vanished'
+            lines.append('{0}: {1} -> {2} ({3:+d}, {4}){5}\n'.format(
+                delta.extension, delta.before, delta.after, delta.change, relative,
+                ' OUTLIER' if delta.outlier else ''))
+        return ''.join(lines)
+
+    @staticmethod
+    def get_outliers(deltas):
+        """
+        :param deltas: list of ExtensionDelta
+        :return: the outliers, largest absolute change first
+        """
+        return sorted((delta for delta in deltas if delta.outlier),
+                      key=lambda delta: (-abs(delta.change), delta.extension))
@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.line_index_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a line index cannot be loaded or does not match its log file
+"""
+
+
+class LineIndexError(Exception):
+    pass
@@ -0,0 +1,12 @@
+"""
+json_log_parser.exceptions.line_too_long_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a log line is longer than the maximum line length.
+The line was skipped without being read into memory
+"""
+from json_log_parser.exceptions.json_error import JSONError
+
+
+class LineTooLongError(JSONError):
+    pass
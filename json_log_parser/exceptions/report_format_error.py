@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.report_format_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a binary report cannot be loaded
+"""
+
+
+class ReportFormatError(Exception):
+    pass
@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.schema_config_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a schema configuration cannot be loaded or uses unsupported features
+"""
+
+
+class SchemaConfigError(Exception):
+    pass
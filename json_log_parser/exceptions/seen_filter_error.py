@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.seen_filter_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a seen filter file cannot be used
+"""
+
+
+class SeenFilterError(Exception):
+    pass
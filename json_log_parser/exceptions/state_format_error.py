@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.state_format_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised when a serialized aggregation state cannot be loaded
+"""
+
+
+class StateFormatError(Exception):
+    pass
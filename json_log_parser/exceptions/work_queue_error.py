@@ -0,0 +1,10 @@
+"""
+json_log_parser.exceptions.work_queue_error
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Raised by the coordinator when a task in the work queue failed
+"""
+
+
+class WorkQueueError(Exception):
+    pass
@@ -0,0 +1,47 @@
+"""
+json_log_parser.extension_normalizer
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains the normalization applied to file extensions before they
+are counted. Junk filenames can produce any number of distinct extensions.
+Normalization folds them into a small, predictable set of keys
+"""
+
+
+class ExtensionNormalizer:
+    def __init__(self, lowercase=True, max_length=None, allowed=None, other='other'):
+        """
+        Constructor
+        :param lowercase: count 'PDF' and 'pdf' as the same extension
+        :param max_length: extensions longer than this are counted as other
+        :param allowed: iterable of extensions to keep. Anything else is counted as other
+        :param other: key used for extensions that were rejected
+        """
+        if max_length is not None and max_length <= 0:
+            raise ValueError('Maximum extension length must be positive')
+
+        self.lowercase = lowercase
+        self.max_length = max_length
+        self.other = other
+        self.allowed = None
+        if allowed is not None:
+            if lowercase:
+                allowed = (extension.lower() for extension in allowed)
+            self.allowed = frozenset(allowed)
+
+    def normalize(self, extension):
+        """
+        Returns the key under which the extension will be counted
+        :param extension: str
+        :return: str
+        """
+        if self.max_length is not None and len(extension) > self.max_length:
+            return self.other
+
+        if self.lowercase:
+            extension = extension.lower()
+
+        if self.allowed is not None and extension not in self.allowed:
+            return self.other
+
+        return extension
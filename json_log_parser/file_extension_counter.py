@@ -4,19 +4,28 @@ json_log_parser.file_extension_counter
 
 This module contains functionality to count number of unique file extensions
 that were found during log paring
+
+The counts can also be split by the disposition of the lines a filename was
+found on. Every disposition has its own counter, a filename found on lines
+with two dispositions is counted in both
 """
 
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+DISPOSITIONS = {1: 'MALICIOUS', 2: 'CLEAN', 3: 'UNKNOWN'}
 
 
 class FileExtensionCounter:
-    def __init__(self):
+    def __init__(self, normalizer=None):
         """
         Constructor
         Defaultdict sets the value to 0 for all new keys. This eliminates the need
         to check if the key exists before incrementing the count
+        :param normalizer: optional ExtensionNormalizer applied before counting
         """
         self.file_extension_count = defaultdict(int)
+        self.normalizer = normalizer
+        self.disposition_counters = {}
 
     @staticmethod
     def get_no_extension():
@@ -26,6 +35,35 @@ class FileExtensionCounter:
         """
         return 'no_extension'
 
+    @staticmethod
+    def get_no_disposition():
+        """
+        Returns a string that will be used to group all files found on lines without
+        a known disposition
+        :return: str
+        """
+        return 'no_disposition'
+
+    @staticmethod
+    def get_disposition_name(disposition):
+        """
+        Name of a disposition value, MALICIOUS for 1
+        :param disposition: value of the disposition field, None if there is none
+        :return: str
+        """
+        # A boolean would be equal to 1, the schema rejects it anyway
+        if isinstance(disposition, bool):
+            return FileExtensionCounter.get_no_disposition()
+        return DISPOSITIONS.get(disposition, FileExtensionCounter.get_no_disposition())
+
+    @staticmethod
+    def get_disposition_names():
+        """
+        Names of all dispositions in report order, MALICIOUS first
+        :return: list of str
+        """
+        return list(DISPOSITIONS.values()) + [FileExtensionCounter.get_no_disposition()]
+
     def add_extension_from_filename(self, filename):
         """
         Extracts the extension from the filename and increments the count in the dictionary
@@ -35,20 +73,75 @@ class FileExtensionCounter:
             return
 
         extension = self.parse_extension(filename)
-        self.file_extension_count[extension] += 1
+        if self.normalizer is not None and extension != self.get_no_extension():
+            extension = self.normalizer.normalize(extension)
+        self.add_extension(extension)
+
+    def add_extension(self, extension, count=1):
+        """
+        Increments the count of an already parsed extension
+        :param extension:
+        :param count:
+        """
+        self.file_extension_count[extension] += count
+
+    def add_extensions_from_store(self, filename_store):
+        """
+        Count the extensions of all filenames in a FilenameStore
+
+        The store already keeps an extension id for every filename. The ids are
+        counted first and every distinct extension is decoded and normalized once.
+        An empty filename is skipped, as in add_extension_from_filename
+        :param filename_store: FilenameStore
+        """
+        no_extension_id = filename_store.no_extension_id
+        extension_id_counts = Counter(filename_store.extension_ids)
+        if '' in filename_store:
+            # The empty filename has no dot, so it was stored under no_extension
+            extension_id_counts[no_extension_id] -= 1
+        for extension_id, count in extension_id_counts.items():
+            if not count:
+                continue
+            extension = filename_store.extensions.get(extension_id)
+            if self.normalizer is not None and extension_id != no_extension_id:
+                extension = self.normalizer.normalize(extension)
+            self.add_extension(extension, count)
 
     def parse_extension(self, filename):
         """
-        Split the filename using '.' character and take the last element of the array.
-        If the split yields a single element the filename will be counted under the
+        Take everything after the last '.' character of the filename.
+        If there is no '.' the filename will be counted under the
         'no_extension' category
         :param filename:
         """
-        split_filename = filename.split('.')
-        if len(split_filename) > 1:
-            return split_filename[-1]
+        _, dot, extension = filename.rpartition('.')
+        if dot:
+            return extension
         else:
             return self.get_no_extension()
 
     def get_extension_counts(self):
         return self.file_extension_count
+
+    def get_disposition_counter(self, disposition_name):
+        """
+        Counter of the filenames found with a disposition, created on first use.
+        The caller adds every unique filename of the disposition to it once
+        :param disposition_name: str, see get_disposition_name
+        :return: FileExtensionCounter
+        """
+        counter = self.disposition_counters.get(disposition_name)
+        if counter is None:
+            counter = self.disposition_counters[disposition_name] = \
+                FileExtensionCounter(self.normalizer)
+        return counter
+
+    def get_disposition_counts(self):
+        """
+        Extension counts of every disposition that has a counter, MALICIOUS first
+        :return: dictionary of disposition name to dictionary of extension to
+            number of unique filenames
+        """
+        return {name: self.disposition_counters[name].get_extension_counts()
+                for name in FileExtensionCounter.get_disposition_names()
+                if name in self.disposition_counters}
@@ -3,14 +3,43 @@ json_log_parser.file_reader
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 This module contains logic to validate the input filename and
-provide a generator to read the file line by line
+provide a generator to read the file line by line.
+
+read_lines reads the file in large blocks and splits every block into lines
+with bytes.split, which scans for newlines in C. A line that crosses a block
+boundary is carried over to the next block. The lines are bytes without the
+trailing newline and are produced a block at a time
+
+With a maximum line length, the parts of a longer line are dropped as soon as
+they exceed it, so a corrupt file with a huge line and no newline is never
+buffered in full. The line is returned as an empty OversizedLine that only
+knows its length
 """
+import os
 import os.path
+from itertools import chain
 from os import access, R_OK
 
 from json_log_parser.exceptions.input_filename_error import InputFilenameError
 from json_log_parser.json_validator import JSONValidator
 
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Bytes read at a time to skip the rest of a line. Small, because the skipped
+# line is usually short
+SKIP_BLOCK_SIZE = 64 * 1024
+
+
+class OversizedLine(bytes):
+    """
+    Placeholder for a line longer than the maximum line length.
+    It is empty bytes, so it never decodes as JSON
+    """
+
+    def __new__(cls, length):
+        line = super().__new__(cls)
+        line.length = length
+        return line
+
 
 class FileReader:
     @staticmethod
@@ -30,6 +59,227 @@ class FileReader:
             for line in r:
                 yield line
 
+    @staticmethod
+    def read_lines(filename, block_size=DEFAULT_BLOCK_SIZE, max_line_length=None,
+                   progress_reporter=None):
+        """
+        Read a file line by line using block reads. Same lines as read_file,
+        as bytes without the trailing newline. An empty line is an empty bytes
+        object, so it is still counted as an invalid line
+
+        Like read_file, errors are raised when the first line is accessed.
+        The lines of a block are passed on by itertools.chain without running
+        any Python code per line
+        :param filename:
+        :param block_size: number of bytes read at a time
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :param progress_reporter: optional ProgressReporter counting the bytes read
+        :return: iterator of bytes lines
+        """
+        return chain.from_iterable(FileReader.read_line_batches(
+            filename, block_size, max_line_length, progress_reporter))
+
+    @staticmethod
+    def read_line_batches(filename, block_size=DEFAULT_BLOCK_SIZE, max_line_length=None,
+                          progress_reporter=None):
+        """
+        Lazy function (generator) to read a file one block of lines at a time
+        :param filename:
+        :param block_size: number of bytes read at a time
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :param progress_reporter: optional ProgressReporter counting the bytes of every block
+        :return: generator of lists of bytes lines without the trailing newline
+        """
+        FileReader.is_input_filename_valid(filename)
+
+        with open(filename, 'rb', buffering=0) as r:
+            binary_file = r if progress_reporter is None else progress_reporter.track_file(r)
+            yield from FileReader.split_blocks(binary_file, block_size,
+                                               max_line_length=max_line_length)
+
+    @staticmethod
+    def split_blocks(binary_file, block_size, end=None, max_line_length=None):
+        """
+        Lazy function (generator) to split a file into lines, one list of lines per block.
+
+        Reading starts at the current position of the file. With an end position
+        only lines that start before end are returned. The last of them is read
+        to its end even if that is past the end position
+        :param binary_file: file object opened in binary mode
+        :param block_size: number of bytes read at a time
+        :param end: first byte that belongs to the next range, None reads to the end of the file
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :return: generator of lists of bytes lines without the newline
+        """
+        if block_size <= 0:
+            raise ValueError('Block size must be positive')
+
+        remaining = None if end is None else end - binary_file.tell()
+        # Parts of a line that started in an earlier block. They are dropped
+        # once carry_length exceeds the maximum line length
+        carry = []
+        carry_length = 0
+        while remaining is None or remaining > 0:
+            block = binary_file.read(block_size if remaining is None else
+                                     min(block_size, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+
+            lines = block.split(b'\n')
+            if len(lines) == 1:
+                # No newline, a long line continues
+                carry_length = FileReader.add_to_carry(carry, carry_length, block,
+                                                       max_line_length)
+                continue
+
+            if carry_length:
+                carry_length = FileReader.add_to_carry(carry, carry_length, lines[0],
+                                                       max_line_length)
+                lines[0] = FileReader.join_carry(carry, carry_length, max_line_length)
+                carry = []
+                carry_length = 0
+            last = lines.pop()
+            if max_line_length is not None and max(map(len, lines)) > max_line_length:
+                lines = [OversizedLine(len(line)) if len(line) > max_line_length else line
+                         for line in lines]
+            if last:
+                carry_length = FileReader.add_to_carry(carry, 0, last, max_line_length)
+            yield lines
+
+        if carry_length and end is not None:
+            # Finish the last line in blocks, readline would buffer all of it
+            while True:
+                block = binary_file.read(block_size)
+                newline = block.find(b'\n')
+                carry_length = FileReader.add_to_carry(
+                    carry, carry_length, block if newline < 0 else block[:newline],
+                    max_line_length)
+                if not block or newline >= 0:
+                    break
+        if carry_length:
+            yield [FileReader.join_carry(carry, carry_length, max_line_length)]
+
+    @staticmethod
+    def add_to_carry(carry, carry_length, part, max_line_length):
+        """
+        Add part of an unfinished line to carry, unless the line is already too long
+        :return: new length of the unfinished line
+        """
+        carry_length += len(part)
+        if max_line_length is not None and carry_length > max_line_length:
+            carry.clear()
+        else:
+            carry.append(part)
+        return carry_length
+
+    @staticmethod
+    def join_carry(carry, carry_length, max_line_length):
+        """
+        :return: the finished line, or an OversizedLine if it is too long
+        """
+        if max_line_length is not None and carry_length > max_line_length:
+            return OversizedLine(carry_length)
+        return b''.join(carry)
+
+    @staticmethod
+    def read_range(filename, start, end, block_size=DEFAULT_BLOCK_SIZE, max_line_length=None):
+        """
+        Read the lines of a file that start in the byte range [start, end),
+        using block reads
+        :param filename:
+        :param start:
+        :param end:
+        :param block_size: number of bytes read at a time
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :return: iterator of bytes lines without the trailing newline
+        """
+        return chain.from_iterable(
+            FileReader.read_range_batches(filename, start, end, block_size, max_line_length))
+
+    @staticmethod
+    def read_range_batches(filename, start, end, block_size=DEFAULT_BLOCK_SIZE,
+                           max_line_length=None):
+        """
+        Lazy function (generator) to read the lines of a file that start
+        in the byte range [start, end), one block of lines at a time
+        :return: generator of lists of bytes lines without the trailing newline
+        """
+        FileReader.is_input_filename_valid(filename)
+
+        with open(filename, 'rb') as r:
+            FileReader.seek_to_line(r, start)
+            yield from FileReader.split_blocks(r, block_size, end, max_line_length)
+
+    @staticmethod
+    def read_lines_in_range(binary_file, start, end, max_line_length=None):
+        """
+        Lazy function (generator) to read the lines that start in the byte range [start, end)
+
+        The offset will usually fall in the middle of a line. That line belongs
+        to the previous range, so it is skipped and reading resumes on the next
+        newline. Together the ranges of a file cover every line exactly once
+        :param binary_file: file object opened in binary mode
+        :param start: first byte of the range
+        :param end: first byte after the range
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :return: generator of bytes lines
+        """
+        position = FileReader.seek_to_line(binary_file, start)
+        while position < end:
+            if max_line_length is None:
+                line = binary_file.readline()
+            else:
+                # A line of max_line_length bytes plus its newline still fits
+                line = binary_file.readline(max_line_length + 1)
+            if not line:
+                break
+            position += len(line)
+            if max_line_length is not None and len(line) > max_line_length and \
+                    not line.endswith(b'\n'):
+                skipped = FileReader.skip_line(binary_file)
+                position += skipped
+                # Step back to check whether the line ended with a newline or the file
+                binary_file.seek(-1, os.SEEK_CUR)
+                has_newline = binary_file.read(1) == b'\n'
+                yield OversizedLine(len(line) + skipped - has_newline)
+                continue
+            yield line
+
+    @staticmethod
+    def seek_to_line(binary_file, start):
+        """
+        Move to the first line that starts at or after start
+        :return: position of that line
+        """
+        if start <= 0:
+            binary_file.seek(0)
+            return 0
+
+        # Step back one byte. If it is a newline the range starts on a line boundary
+        binary_file.seek(start - 1)
+        return start - 1 + FileReader.skip_line(binary_file)
+
+    @staticmethod
+    def skip_line(binary_file, block_size=SKIP_BLOCK_SIZE):
+        """
+        Move past the next newline without buffering the line, unlike readline
+        :param binary_file: seekable file object opened in binary mode
+        :param block_size: number of bytes read at a time
+        :return: number of bytes skipped, including the newline
+        """
+        skipped = 0
+        while True:
+            block = binary_file.read(block_size)
+            if not block:
+                return skipped
+            newline = block.find(b'\n')
+            if newline >= 0:
+                binary_file.seek(newline + 1 - len(block), os.SEEK_CUR)
+                return skipped + newline + 1
+            skipped += len(block)
+
     @staticmethod
     def is_input_filename_valid(filename):
         """
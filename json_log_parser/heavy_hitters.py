@@ -0,0 +1,123 @@
+"""
+json_log_parser.heavy_hitters
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a bounded memory counter of the most frequent file extensions.
+
+It uses the Space-Saving algorithm (Metwally et al.). At most `capacity` extensions
+are tracked. When a new extension arrives and all slots are used, the extension
+with the smallest count is replaced and the new one inherits that count as its
+possible error. For every tracked extension
+    count - error <= true count <= count
+and no extension with a true count above total / capacity can be missed
+"""
+import heapq
+
+from json_log_parser.file_extension_counter import FileExtensionCounter
+
+
+class SpaceSaving:
+    def __init__(self, capacity):
+        """
+        Constructor
+        :param capacity: maximum number of tracked items
+        """
+        if capacity <= 0:
+            raise ValueError('Capacity must be positive')
+
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # Min-heap of (count, item). Entries become stale when the count of
+        # an item changes and are skipped when they reach the top
+        self.heap = []
+
+    def add(self, item, count=1):
+        """
+        Add an occurrence of item
+        :param item:
+        :param count:
+        """
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted_count, evicted = self.pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[item] = evicted_count + count
+            self.errors[item] = evicted_count
+
+        heapq.heappush(self.heap, (counts[item], item))
+        if len(self.heap) > 4 * self.capacity:
+            self.compact_heap()
+
+    def pop_min(self):
+        """
+        Remove and return the (count, item) with the smallest count
+        """
+        while True:
+            count, item = heapq.heappop(self.heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def compact_heap(self):
+        """
+        Rebuild the heap without stale entries
+        """
+        self.heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def get_error_bound(self):
+        """
+        Maximum overestimation of any count. Zero until the counter is full
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def get_top(self, k):
+        """
+        Returns the k items with the highest counts
+        :param k:
+        :return: list of (item, count, error) sorted by count, highest first
+        """
+        top = heapq.nlargest(k, self.counts.items(), key=lambda entry: (entry[1], entry[0]))
+        return [(item, count, self.errors[item]) for item, count in top]
+
+
+class TopKExtensionCounter(FileExtensionCounter):
+    def __init__(self, k, capacity=None, normalizer=None):
+        """
+        Constructor
+        Tracking more extensions than reported makes the top k counts more accurate
+        :param k: number of extensions to report
+        :param capacity: number of tracked extensions, defaults to 10 * k
+        :param normalizer: optional ExtensionNormalizer
+        """
+        super().__init__(normalizer)
+        if k <= 0:
+            raise ValueError('k must be positive')
+
+        self.k = k
+        self.sketch = SpaceSaving(capacity or 10 * k)
+
+    def add_extension(self, extension, count=1):
+        self.sketch.add(extension, count)
+
+    def get_top_extensions(self):
+        """
+        :return: list of (extension, count, error) sorted by count, highest first
+        """
+        return self.sketch.get_top(self.k)
+
+    def get_error_bound(self):
+        return self.sketch.get_error_bound()
+
+    def get_extension_counts(self):
+        return {extension: count for extension, count, _ in self.get_top_extensions()}
@@ -3,7 +3,19 @@ json_log_parser.json_schema
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 This module contains json schema elements needed to validate a log line entry
+
+Other log shapes can be described in a JSON config file
+    {
+        "schema": {"type": "object", "properties": {...}, "required": [...]},
+        "rules": {"time": "timestamp", "file": "filename", "dir": "path"},
+        "name_field": "file"
+    }
+"rules" are the additional checks applied after the schema.
+"name_field" is the field holding the filename that is counted
 """
+import json
+
+from json_log_parser.exceptions.schema_config_error import SchemaConfigError
 
 
 class JSONSchema:
@@ -35,6 +47,79 @@ class JSONSchema:
             "required": ["ts", "pt", "si", "uu", "bg", "sha", "nm"]
         }
 
+    @staticmethod
+    def get_field_rules():
+        """
+        This method returns the additional checks of the fields in a valid log line entry,
+        applied in this order after the schema validation
+        :return: Dictionary object
+        """
+        return {"ts": "timestamp", "ph": "path", "nm": "filename"}
+
+    @staticmethod
+    def get_timestamp_range():
+        """
+        This method returns the range of timestamps that the datetime module
+        can represent: 0001-01-01 to 9999-12-31 23:59:59 UTC
+        :return: tuple of seconds since the epoch
+        """
+        return -62135596800, 253402300799
+
+    @staticmethod
+    def get_name_field():
+        """
+        This method returns the key of the filename in a log line entry
+        :return: str
+        """
+        return "nm"
+
+    @staticmethod
+    def get_disposition_field():
+        """
+        This method returns the key of the disposition in a log line entry,
+        1 is MALICIOUS, 2 is CLEAN and 3 is UNKNOWN
+        :return: str
+        """
+        return "dp"
+
+    @staticmethod
+    def load_config(config_filename):
+        """
+        This method loads a schema configuration file
+        :param config_filename:
+        :return: tuple of schema, field rules and name field
+        Raises SchemaConfigError if the file cannot be loaded
+        """
+        try:
+            with open(config_filename) as r:
+                config = json.load(r)
+        except (OSError, ValueError) as error:
+            raise SchemaConfigError("Cannot load schema config '{0}': {1}".format(
+                config_filename, error))
+
+        if not isinstance(config, dict) or not isinstance(config.get('schema'), dict):
+            raise SchemaConfigError("Schema config '{0}' has no 'schema' object".format(
+                config_filename))
+
+        rules = config.get('rules', {})
+        name_field = config.get('name_field', JSONSchema.get_name_field())
+        if not isinstance(rules, dict) or not isinstance(name_field, str):
+            raise SchemaConfigError("Schema config '{0}' has invalid rules or name_field".format(
+                config_filename))
+
+        # Every valid document must have a filename, otherwise it cannot be counted
+        schema = config['schema']
+        properties = schema.get('properties')
+        name_schema = properties.get(name_field) if isinstance(properties, dict) else None
+        if not isinstance(schema.get('required'), list) or \
+                name_field not in schema['required'] or \
+                not isinstance(name_schema, dict) or name_schema.get('type') != 'string':
+            raise SchemaConfigError(
+                "Schema config '{0}' must make name_field '{1}' a required string".format(
+                    config_filename, name_field))
+
+        return schema, rules, name_field
+
     @staticmethod
     def get_uuid_schema():
         """
@@ -0,0 +1,225 @@
+"""
+json_log_parser.line_index
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a sparse index of a log file, written next to it as a
+sidecar file during a normal processing pass.
+
+The index has one entry per block of lines, the lines that FileReader returns
+for one block read. An entry holds the byte offset and line number of the first
+line of the block, the number of lines, the smallest and largest timestamp of
+the valid lines and the extensions of their filenames. Looking up a line
+number, a time range or an extension only reads the blocks whose entry can
+contain a match instead of scanning the whole file.
+
+Index file, JSON
+    {"version": 1, "size": file size, "mtime_ns": modification time of the log,
+     "time_field": "ts", "name_field": "nm", "max_line_length": 1048576,
+     "blocks": [[offset, first line, lines, min ts, max ts, [extensions]], ...]}
+min ts and max ts are null for a block without valid lines. The size and
+modification time tell whether the log changed after the index was written
+"""
+import bisect
+import json
+import os
+from itertools import islice
+
+from json_log_parser.exceptions.line_index_error import LineIndexError
+from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.file_reader import FileReader, OversizedLine
+
+VERSION = 1
+OFFSET, FIRST_LINE, LINES, MIN_TS, MAX_TS, EXTENSIONS = range(6)
+
+
+class LineIndexBuilder:
+    def __init__(self, time_field='ts', name_field='nm', max_line_length=None):
+        """
+        Constructor
+        :param time_field: key of the timestamp in a log line, None if there is none
+        :param name_field: key of the filename in a log line
+        :param max_line_length: maximum line length of the reader, used again by queries
+        """
+        self.time_field = time_field
+        self.name_field = name_field
+        self.max_line_length = max_line_length
+        self.blocks = []
+        self.position = 0
+        self.lines = 0
+        self.extension_counter = FileExtensionCounter()
+
+    def track(self, line_batches):
+        """
+        Lazy function (generator) that passes the line batches of
+        FileReader.read_line_batches through and starts a block for each of them
+        :param line_batches: iterable of lists of bytes lines without the newline
+        :return: generator of the same lists
+        """
+        for batch in line_batches:
+            self.blocks.append([self.position, self.lines, len(batch), None, None, set()])
+            self.lines += len(batch)
+            # Every line is followed by its newline. The last line of a file
+            # may not be, the offset past the end of the file is harmless
+            self.position += sum(map(len, batch)) + len(batch)
+            if OversizedLine in map(type, batch):
+                self.position += sum(line.length for line in batch
+                                     if isinstance(line, OversizedLine))
+            yield batch
+
+    def add_record(self, record):
+        """
+        Record a valid line of the current block
+        :param record: LogRecord of the line
+        """
+        block = self.blocks[-1]
+        # A custom schema may have no timestamp or an optional one
+        timestamp = record.timestamp
+        if timestamp is not None:
+            if block[MIN_TS] is None or timestamp < block[MIN_TS]:
+                block[MIN_TS] = timestamp
+            if block[MAX_TS] is None or timestamp > block[MAX_TS]:
+                block[MAX_TS] = timestamp
+        filename = record.filename
+        if filename:
+            block[EXTENSIONS].add(self.extension_counter.parse_extension(filename))
+
+    def write(self, index_filename, log_filename):
+        """
+        Write the index of log_filename
+        """
+        stat = os.stat(log_filename)
+        blocks = [block[:EXTENSIONS] + [sorted(block[EXTENSIONS])] for block in self.blocks]
+        with open(index_filename, 'w') as w:
+            json.dump({'version': VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'time_field': self.time_field, 'name_field': self.name_field,
+                       'max_line_length': self.max_line_length, 'blocks': blocks},
+                      w, separators=(',', ':'))
+
+
+class LineIndex:
+    def __init__(self, log_filename, blocks, time_field='ts', name_field='nm',
+                 max_line_length=None):
+        """
+        Constructor, use load to read an index file
+        :param log_filename: the indexed log file
+        :param blocks: list of index entries
+        :param time_field: key of the timestamp in a log line, None if there is none
+        :param name_field: key of the filename in a log line
+        :param max_line_length: longer lines are skipped when blocks are read
+        """
+        self.log_filename = log_filename
+        self.blocks = blocks
+        self.time_field = time_field
+        self.name_field = name_field
+        self.max_line_length = max_line_length
+        self.first_lines = [block[FIRST_LINE] for block in blocks]
+
+    @staticmethod
+    def get_default_filename(log_filename):
+        return log_filename + '.idx'
+
+    @staticmethod
+    def load(log_filename, index_filename=None):
+        """
+        Load the index of a log file
+        :param log_filename:
+        :param index_filename: defaults to the log filename with '.idx' appended
+        :return: LineIndex
+        Raises LineIndexError if the index cannot be read or the log changed since
+        """
+        index_filename = index_filename or LineIndex.get_default_filename(log_filename)
+        try:
+            with open(index_filename) as r:
+                index = json.load(r)
+            stat = os.stat(log_filename)
+        except (OSError, ValueError) as error:
+            raise LineIndexError("Cannot load line index '{0}': {1}".format(
+                index_filename, error))
+
+        if not isinstance(index, dict) or index.get('version') != VERSION or \
+                not isinstance(index.get('blocks'), list):
+            raise LineIndexError("'{0}' is not a line index".format(index_filename))
+        if index.get('size') != stat.st_size or index.get('mtime_ns') != stat.st_mtime_ns:
+            raise LineIndexError("Log '{0}' changed after the line index was written".format(
+                log_filename))
+
+        return LineIndex(log_filename, index['blocks'], index.get('time_field', 'ts'),
+                         index.get('name_field', 'nm'), index.get('max_line_length'))
+
+    def get_line(self, line_number):
+        """
+        Read a single line
+        :param line_number: 0 based
+        :return: bytes line without the newline
+        Raises IndexError if the log has fewer lines
+        """
+        position = bisect.bisect_right(self.first_lines, line_number) - 1
+        block = self.blocks[position] if position >= 0 else None
+        if block is None or line_number >= block[FIRST_LINE] + block[LINES]:
+            raise IndexError('Line {0} is not in the log'.format(line_number))
+
+        skip = line_number - block[FIRST_LINE]
+        return next(islice(self.read_blocks([position]), skip, None))
+
+    def find_time_range(self, start, end):
+        """
+        Lazy function (generator) to read the lines with start <= timestamp <= end
+        :return: generator of (line number, document)
+        Raises LineIndexError if the log has no timestamp field
+        """
+        if self.time_field is None:
+            raise LineIndexError('The indexed log has no timestamp field')
+        time_field = self.time_field
+        positions = [position for position, block in enumerate(self.blocks)
+                     if block[MIN_TS] is not None and block[MIN_TS] <= end and
+                     block[MAX_TS] >= start]
+        return self.find_documents(
+            positions, lambda document: start <= document[time_field] <= end)
+
+    def find_extension(self, extension):
+        """
+        Lazy function (generator) to read the lines whose filename has the extension
+        :return: generator of (line number, document)
+        """
+        name_field = self.name_field
+        parse_extension = FileExtensionCounter().parse_extension
+        positions = [position for position, block in enumerate(self.blocks)
+                     if extension in block[EXTENSIONS]]
+        return self.find_documents(
+            positions, lambda document: bool(document[name_field]) and
+            parse_extension(document[name_field]) == extension)
+
+    def find_documents(self, positions, predicate):
+        """
+        Decode the lines of the given blocks and keep the documents that match
+        the predicate. Lines that do not decode to a document with the field are
+        skipped. Blocks whose index entry cannot match are never read
+        :return: generator of (line number, document)
+        """
+        for position in positions:
+            line_number = self.blocks[position][FIRST_LINE]
+            for line in self.read_blocks([position]):
+                try:
+                    document = json.loads(line)
+                    if predicate(document):
+                        yield line_number, document
+                except (ValueError, TypeError, KeyError):
+                    pass
+                line_number += 1
+
+    def read_blocks(self, positions):
+        """
+        Lazy function (generator) to read the lines of the given blocks
+        :param positions: indexes into blocks
+        :return: generator of bytes lines without the newline
+        """
+        for position in positions:
+            block = self.blocks[position]
+            if position + 1 < len(self.blocks):
+                end = self.blocks[position + 1][OFFSET]
+            else:
+                end = os.path.getsize(self.log_filename)
+            # A range starts at the first line that starts at or after start,
+            # the first line of a block starts exactly at its offset
+            yield from FileReader.read_range(self.log_filename, block[OFFSET], end,
+                                             max_line_length=self.max_line_length)
@@ -7,26 +7,143 @@ the number of unique filenames for that extension
 """
 import json
 import logging
+import sys
 from collections import defaultdict
+from itertools import chain, islice
 from json.decoder import JSONDecodeError
 
+from json_log_parser.aggregation_state import AggregationState
 from json_log_parser.exceptions.input_filename_error import InputFilenameError
 from json_log_parser.exceptions.json_error import JSONError
 from json_log_parser.exceptions.json_format_error import JSONFormatError
+from json_log_parser.exceptions.line_too_long_error import LineTooLongError
 from json_log_parser.file_extension_counter import FileExtensionCounter
-from json_log_parser.file_reader import FileReader
+from json_log_parser.file_reader import DEFAULT_BLOCK_SIZE, FileReader, OversizedLine
+from json_log_parser.heavy_hitters import TopKExtensionCounter
+from json_log_parser.json_schema import JSONSchema
 from json_log_parser.json_validator import JSONValidator
+from json_log_parser.line_index import LineIndexBuilder
+from json_log_parser.log_record import LogRecord
+from json_log_parser.result_formatter import ResultFormatter
+from json_log_parser.sampling import BlockSampler, LineSampler, SampleEstimator
+from json_log_parser.spilling_set import SpillingSet
+from json_log_parser.string_store import FilenameStore
+from json_log_parser.tenant_partitions import TenantPartitions
+
+# Longer lines are skipped without being read into memory
+DEFAULT_MAX_LINE_LENGTH = 1024 * 1024
+# 'split' reports every disposition, 'priority' only MALICIOUS, both before all files
+DISPOSITION_MODES = ('split', 'priority')
+DISPOSITION_NAMES = FileExtensionCounter.get_disposition_names()
+# Name of the report of all lines in a disposition mode
+ALL_DISPOSITIONS = 'all'
 
 
 class LogParser:
-    def __init__(self, log_level=logging.INFO):
+    def __init__(self, log_level=logging.INFO, record_filter=None, top_k=None,
+                 extension_normalizer=None, clock_skew=0, json_validator=None,
+                 compact_strings=False, memory_budget=None, spill_dir=None,
+                 result_formatter=None, output_stream=None,
+                 max_line_length=DEFAULT_MAX_LINE_LENGTH, resource_guard=None,
+                 line_index_filename=None, seen_filter=None, partition_field=None,
+                 progress_reporter=None, disposition_mode=None):
         """
         Constructor
         Initialize a JsonValidator class used to validate each log line
+        :param log_level:
+        :param record_filter: optional RecordFilter. Only matching records are counted
+        :param top_k: if set, only the top k extensions are tracked and printed
+        :param extension_normalizer: optional ExtensionNormalizer applied before counting
+        :param clock_skew: seconds a timestamp may be ahead of the current time
+        :param json_validator: optional JSONValidator to share between parsers.
+            clock_skew is ignored if it is provided
+        :param compact_strings: keep unique filenames in a FilenameStore instead of a set
+        :param memory_budget: if set, unique filenames are kept in a SpillingSet that
+            writes them to disk once they use more than this many bytes. Not supported
+            by build_state and build_range_state, a state keeps its filenames in memory
+        :param spill_dir: directory for the files of the SpillingSet
+        :param result_formatter: ResultFormatter for the report, defaults to text sorted by name.
+            Top extensions and sampled estimates are only reported as text
+        :param output_stream: stream the report is written to, defaults to sys.stdout
+        :param max_line_length: longer lines are skipped and counted as LineTooLongError,
+            None for no limit
+        :param resource_guard: optional ResourceGuard with memory, line and time limits
+        :param line_index_filename: if set, process_log and parse_log write a LineIndex
+            of the log to this file
+        :param seen_filter: optional SeenFilter of the filenames of earlier runs. The
+            report splits every count into new and seen filenames and the filter is updated
+        :param partition_field: if set, the extensions are counted per value of this
+            field, for example 'bg', in TenantPartitions. The memory budget then
+            applies to the partitions, the least recently used ones are spilled
+        :param progress_reporter: optional ProgressReporter, started by process_log
+            and parse_log for the duration of the run
+        :param disposition_mode: if set, the unique filenames of the lines with a
+            disposition are also kept apart in the same pass. 'split' keeps every
+            disposition, 'priority' only MALICIOUS. Their reports come first, the
+            MALICIOUS one is written before anything else is counted. The memory budget
+            applies to each disposition as well
+        """
+        if disposition_mode is not None and disposition_mode not in DISPOSITION_MODES:
+            raise ValueError("Unknown disposition mode '{0}'".format(disposition_mode))
+        if (top_k or seen_filter or partition_field or disposition_mode) and \
+                result_formatter is not None and result_formatter.output_format != 'text':
+            raise ValueError('Top extensions, new filenames, partitions and dispositions '
+                             'can only be reported as text')
+        if top_k and seen_filter:
+            raise ValueError('Top extensions cannot be split into new and seen filenames')
+        if (partition_field or disposition_mode) and (top_k or seen_filter):
+            raise ValueError('Partitioned counts cannot be combined with top extensions '
+                             'or new filenames')
+        if partition_field and disposition_mode:
+            raise ValueError('Counts cannot be partitioned by a field and by disposition')
+
+        self.json_validator = json_validator or JSONValidator(clock_skew)
+        self.record_filter = record_filter
+        self.top_k = top_k
+        self.extension_normalizer = extension_normalizer
+        self.compact_strings = compact_strings
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.result_formatter = result_formatter or ResultFormatter()
+        self.output_stream = output_stream
+        self.max_line_length = max_line_length
+        self.resource_guard = resource_guard
+        self.line_index_filename = line_index_filename
+        self.seen_filter = seen_filter
+        self.partition_field = partition_field
+        self.progress_reporter = progress_reporter
+        self.disposition_mode = disposition_mode
+        self.disposition_field = JSONSchema.get_disposition_field()
+        # Unique filenames per disposition name of the last get_unique_file_set call
+        self.disposition_files = {}
+        self.time_field = self.json_validator.get_time_field()
+        # Why the last get_unique_file_set call stopped early, None if it read every line
+        self.truncation_reason = None
+        # Stats of the last get_unique_file_set call
+        self.processing_stats = defaultdict(int)
+        self.exception_stats = defaultdict(int)
+        LogParser.setup_logging(log_level)
+
+    def __getstate__(self):
+        """
+        Worker processes only build states. The output stream, the memory
+        mapped seen filter and the progress reporter stay in the process that
+        prints the report
+        """
+        state = dict(self.__dict__)
+        state['output_stream'] = None
+        state['seen_filter'] = None
+        state['progress_reporter'] = None
+        return state
+
+    @staticmethod
+    def setup_logging(log_level):
+        """
+        Send the log to log_parser.log. Does nothing if logging is already configured
+        :param log_level:
         """
-        self.json_validator = JSONValidator()
         try:
-            logging.basicConfig(filename='log_parser.log'.format(self.__class__),
+            logging.basicConfig(filename='log_parser.log',
                                 filemode='w', level=log_level,
                                 format='%(asctime)s - %(levelname)s - %(message)s')
         except PermissionError:
@@ -45,10 +162,20 @@ class LogParser:
         """
         try:
             logging.info('Processing file %s', input_filename)
-            line_generator = FileReader.read_file(input_filename)
-            unique_files = self.get_unique_file_set(line_generator)
-            extension_counter = self.count_file_extensions(unique_files)
-            self.print_file_extensions(extension_counter)
+            unique_files = self.read_unique_files(input_filename)
+            if self.partition_field:
+                self.print_partitioned_extensions(unique_files.get_extension_counts())
+                unique_files.close()
+            elif self.disposition_mode:
+                self.count_disposition_extensions(unique_files, self.print_disposition_extensions)
+            elif self.top_k:
+                self.print_top_extensions(self.count_top_extensions(unique_files))
+            elif self.seen_filter is not None:
+                self.print_new_extensions(self.count_new_extensions(unique_files))
+            else:
+                extension_counter = self.count_file_extensions(unique_files)
+                self.print_file_extensions(extension_counter)
+            self.print_truncation_notice(self.processing_stats)
             logging.info('Finished processing file %s', input_filename)
         # Handle gracefully problems with the input filename
         except InputFilenameError as error:
@@ -60,7 +187,177 @@ class LogParser:
             print('LogParser encountered unexpected error: ' + str(exc))
             print('Check log_parser.log for more details')
 
-    def get_unique_file_set(self, line_generator):
+    def parse_log(self, input_filename):
+        """
+        Process a log file and return the results instead of printing them.
+        Errors are raised to the caller. The line stats are available in
+        processing_stats and exception_stats after the call. If reading stopped
+        early processing_stats['truncated'] is 1 and truncation_reason says why
+        :param input_filename:
+        :return: dictionary of extension to number of unique filenames, with a
+            partition field a dictionary of tenant to such a dictionary, with a
+            disposition mode a dictionary of disposition name to such a dictionary,
+            where 'all' holds the counts of all lines
+        """
+        unique_files = self.read_unique_files(input_filename)
+        if self.partition_field:
+            try:
+                return unique_files.get_extension_counts()
+            finally:
+                unique_files.close()
+        if self.disposition_mode:
+            counts = {}
+            self.count_disposition_extensions(
+                unique_files, lambda name, extension_counts: counts.update(
+                    {name: dict(extension_counts)}))
+            return counts
+        return self.count_file_extensions(unique_files)
+
+    def read_unique_files(self, input_filename):
+        """
+        Read a log file into its unique filenames, see get_unique_file_set.
+        Writes the line index if there is a line_index_filename. The progress
+        reporter runs while the file is read and stops before the report
+        :param input_filename:
+        """
+        progress_reporter = self.progress_reporter
+        if progress_reporter is not None:
+            progress_reporter.start(input_filename)
+        try:
+            if self.line_index_filename:
+                return self.get_indexed_unique_file_set(input_filename)
+            line_generator = FileReader.read_lines(
+                input_filename, max_line_length=self.max_line_length,
+                progress_reporter=progress_reporter)
+            return self.get_unique_file_set(line_generator)
+        finally:
+            if progress_reporter is not None:
+                progress_reporter.stop()
+
+    def build_state(self, input_filename):
+        """
+        Process a log file and return its mergeable AggregationState.
+        Errors are raised to the caller
+        :param input_filename:
+        :return: AggregationState
+        Raises ValueError if a memory budget is set
+        """
+        self.check_state_supported()
+        line_generator = FileReader.read_lines(
+            input_filename, max_line_length=self.max_line_length)
+        unique_files = self.get_unique_file_set(line_generator)
+        return AggregationState(unique_files, self.processing_stats, self.exception_stats)
+
+    def build_range_state(self, input_filename, start, end, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Same as build_state for the lines that start in the byte range [start, end)
+        :param block_size: number of bytes read at a time
+        """
+        self.check_state_supported()
+        line_generator = FileReader.read_range(input_filename, start, end, block_size,
+                                               self.max_line_length)
+        unique_files = self.get_unique_file_set(line_generator)
+        return AggregationState(unique_files, self.processing_stats, self.exception_stats)
+
+    def check_state_supported(self):
+        """
+        An AggregationState holds all its filenames in memory, which would
+        silently ignore the memory budget. It is not partitioned either
+        Raises ValueError if a memory budget, a partition field or a disposition mode is set
+        """
+        if self.partition_field:
+            raise ValueError('Aggregation states cannot be built with a partition field')
+        if self.disposition_mode:
+            raise ValueError('Aggregation states cannot be split by disposition')
+        if self.memory_budget:
+            raise ValueError('A memory budget cannot be used to build aggregation states, '
+                             'they keep all unique filenames in memory')
+
+    def print_state_report(self, state):
+        """
+        Print the final report of a (merged) AggregationState
+        and log the combined processing stats
+        :param state: AggregationState
+        """
+        self.log_processing_stats(state.processing_stats, state.exception_stats)
+        if self.top_k:
+            self.print_top_extensions(self.count_top_extensions(state.unique_files))
+        elif self.seen_filter is not None:
+            self.print_new_extensions(self.count_new_extensions(state.unique_files))
+        else:
+            self.print_file_extensions(self.count_file_extensions(state.unique_files))
+        self.print_truncation_notice(state.processing_stats)
+
+    def sample_log(self, input_filename, rate, mode='line', seed=0, block_size=1024 * 1024):
+        """
+        Build an approximate report from a sample of the log file
+            - 'line' mode reads the whole file but decodes only sampled lines
+            - 'block' mode reads only a random subset of byte blocks
+        The sampled extension counts are scaled up by the effective sampling rate
+        and printed with a 95% confidence interval
+        :param input_filename:
+        :param rate: sampling rate, 0 < rate <= 1
+        :param mode: 'line' or 'block'
+        :param seed: the same seed always produces the same sample
+        :param block_size: size of a block in bytes, used in block mode
+        :return: dictionary of extension to ExtensionEstimate
+        Raises ValueError if the result formatter is not text, estimates are only
+        reported as text
+        """
+        if self.result_formatter.output_format != 'text':
+            raise ValueError('Sampled estimates can only be reported as text')
+        if self.partition_field or self.disposition_mode:
+            raise ValueError('Sampled estimates are not partitioned')
+
+        estimates = {}
+        try:
+            logging.info('Sampling file %s (mode=%s, rate=%s, seed=%s)',
+                         input_filename, mode, rate, seed)
+            if mode == 'line':
+                sampler = LineSampler(rate, seed)
+                line_generator = sampler.sample(FileReader.read_lines(
+                    input_filename, max_line_length=self.max_line_length))
+            elif mode == 'block':
+                sampler = BlockSampler(rate, block_size, seed)
+                line_generator = sampler.sample_file(input_filename, self.max_line_length)
+            else:
+                raise ValueError("Unknown sampling mode '{0}'".format(mode))
+
+            unique_files = self.get_unique_file_set(line_generator)
+            extension_counter = self.count_file_extensions(unique_files)
+            estimates = SampleEstimator.estimate_extension_counts(
+                extension_counter, sampler.get_effective_rate())
+            self.print_extension_estimates(estimates)
+            logging.info('Finished sampling file %s', input_filename)
+        except InputFilenameError as error:
+            logging.error(error, exc_info=True)
+            print(str(error))
+        except Exception as exc:
+            logging.error(exc, exc_info=True)
+            print('LogParser encountered unexpected error: ' + str(exc))
+            print('Check log_parser.log for more details')
+
+        return estimates
+
+    def get_indexed_unique_file_set(self, input_filename, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Same as get_unique_file_set for a log file, writing its LineIndex
+        to line_index_filename on the way
+        :param input_filename:
+        :param block_size: number of bytes read at a time, there is an index entry per block
+        """
+        builder = LineIndexBuilder(self.json_validator.get_time_field(),
+                                   self.json_validator.name_field, self.max_line_length)
+        line_batches = FileReader.read_line_batches(
+            input_filename, block_size, self.max_line_length, self.progress_reporter)
+        unique_files = self.get_unique_file_set(
+            chain.from_iterable(builder.track(line_batches)), builder.add_record)
+        if not self.truncation_reason:
+            builder.write(self.line_index_filename, input_filename)
+            logging.info('Wrote line index %s', self.line_index_filename)
+        return unique_files
+
+    def get_unique_file_set(self, line_generator, record_observer=None):
         """
         This function builds a set of unique filenames found in the log file
 
@@ -69,32 +366,198 @@ class LogParser:
 
         The function will also keep track of number of valid and invalid log lines.
         The stats will be printed in the log file.
+
+        If a record filter is set, lines that cannot match it are dropped before
+        they are decoded and counted as filtered
+
+        With compact_strings the filenames are kept as UTF-8 bytes in a
+        FilenameStore. It supports the same add, len, in and iteration as a set.
+        With a memory budget they are kept in a SpillingSet, which supports add
+        and iteration
+
+        With a partition field they are kept in TenantPartitions, which adds them
+        to the partition of the value of that field
+
+        With a disposition mode the filenames of a line are also added to the
+        collection of its disposition in disposition_files, see add_disposition_file
+
+        With a resource guard the lines are read in batches and the limits are
+        checked between them, see check_resources
         :param line_generator:
+        :param record_observer: optional function called with the LogRecord of every
+            valid line
         """
-        unique_files = set()
-        processing_stats = defaultdict(int)
-        exception_stats = defaultdict(int)
+        if self.partition_field:
+            unique_files = TenantPartitions(
+                normalizer=self.extension_normalizer, compact_strings=self.compact_strings,
+                memory_budget=self.memory_budget, spill_dir=self.spill_dir)
+        else:
+            unique_files = self.create_unique_file_set()
+        disposition_mode = self.disposition_mode
+        self.disposition_files = {}
+        if disposition_mode == 'priority':
+            self.disposition_files[DISPOSITION_NAMES[0]] = self.create_unique_file_set()
+        processing_stats = self.processing_stats = defaultdict(int)
+        exception_stats = self.exception_stats = defaultdict(int)
+        self.truncation_reason = None
+        record_filter = self.record_filter
+        partition_field = self.partition_field
+        self.json_validator.refresh_clock()
+        guard = self.resource_guard
+        if guard is not None:
+            guard.start()
+        progress_reporter = self.progress_reporter
+        if progress_reporter is not None:
+            progress_reporter.watch(processing_stats, unique_files)
+        lines = iter(line_generator)
 
-        for line in line_generator:
-            processing_stats['total'] += 1
-            try:
-                document = self.get_json_document(line)
-                unique_files.add(document['nm'])
-                processing_stats['success'] += 1
-            except JSONError as invalid_json:
-                processing_stats['fail'] += 1
-                exception_key = '{0}-{1}'.format(type(invalid_json).__name__, str(invalid_json))
-                exception_stats[exception_key] += 1
+        while True:
+            batch_lines = sys.maxsize if guard is None else guard.get_batch_lines(
+                processing_stats['total'])
+            first_line = processing_stats['total']
+            for line in islice(lines, batch_lines):
+                processing_stats['total'] += 1
+                if (record_filter is not None and not record_filter.might_match(line) and
+                        not isinstance(line, OversizedLine)):
+                    processing_stats['filtered'] += 1
+                    continue
+
+                try:
+                    record = self.get_log_record(line)
+                    if record is None:
+                        processing_stats['filtered'] += 1
+                        continue
+
+                    if partition_field is None:
+                        unique_files.add(record.filename)
+                        if disposition_mode is not None:
+                            self.add_disposition_file(record)
+                    else:
+                        unique_files.add(record.partition, record.filename)
+                    if record_observer is not None:
+                        record_observer(record)
+                    processing_stats['success'] += 1
+                except JSONError as invalid_json:
+                    processing_stats['fail'] += 1
+                    exception_key = '{0}-{1}'.format(type(invalid_json).__name__,
+                                                     str(invalid_json))
+                    exception_stats[exception_key] += 1
+
+            if guard is None or processing_stats['total'] - first_line < batch_lines:
+                break
+            unique_files = self.check_resources(unique_files, lines)
+            if progress_reporter is not None:
+                progress_reporter.watch(processing_stats, unique_files)
+            if self.truncation_reason:
+                logging.warning('Stopped reading after %d lines: %s',
+                                processing_stats['total'], self.truncation_reason)
+                processing_stats['truncated'] = 1
+                break
+            if not batch_lines:
+                # The line budget ran out at the end of the input
+                break
 
         self.log_processing_stats(processing_stats, exception_stats)
         return unique_files
 
+    def create_unique_file_set(self):
+        """
+        Empty collection of unique filenames: a SpillingSet with a memory budget,
+        a FilenameStore with compact strings, a set otherwise
+        """
+        if self.memory_budget:
+            return SpillingSet(self.memory_budget, self.spill_dir)
+        if self.compact_strings:
+            return FilenameStore(FileExtensionCounter.get_no_extension())
+        return set()
+
+    def add_disposition_file(self, record):
+        """
+        Add the filename of a record to the collection of its disposition. In
+        priority mode only MALICIOUS has a collection and the others are skipped
+        :param record: LogRecord whose partition is the disposition value
+        """
+        name = FileExtensionCounter.get_disposition_name(record.partition)
+        disposition_files = self.disposition_files.get(name)
+        if disposition_files is None:
+            if self.disposition_mode != 'split':
+                return
+            disposition_files = self.disposition_files[name] = self.create_unique_file_set()
+        disposition_files.add(record.filename)
+
+    def check_resources(self, unique_files, lines):
+        """
+        Check the limits of the resource guard between two batches of lines.
+        When memory runs low the filenames are moved to a SpillingSet, or the
+        colder half of the partitions is spilled. If a limit
+        is reached truncation_reason is set and reading stops
+        :param unique_files: filenames collected so far
+        :param lines: iterator of the remaining lines
+        :return: the collection to add the next filenames to
+        """
+        guard = self.resource_guard
+        if isinstance(unique_files, TenantPartitions):
+            if guard.is_memory_low():
+                unique_files.spill_cold_partitions(unique_files.memory_used // 2)
+        elif guard.is_memory_low() and not isinstance(unique_files, SpillingSet):
+            unique_files = self.spill_unique_files(unique_files, guard.get_spill_budget())
+            for name, disposition_files in self.disposition_files.items():
+                if not isinstance(disposition_files, SpillingSet):
+                    self.disposition_files[name] = self.spill_unique_files(
+                        disposition_files, guard.get_spill_budget())
+
+        reason = guard.get_truncation_reason(self.processing_stats['total'])
+        # The line budget may run out exactly at the end of the input
+        if reason and next(lines, None) is not None:
+            self.truncation_reason = reason
+        return unique_files
+
+    def spill_unique_files(self, unique_files, memory_budget):
+        """
+        Move the filenames to a SpillingSet, so counting stays exact in bounded memory
+        :param unique_files: set or FilenameStore
+        :param memory_budget: memory budget of the SpillingSet
+        :return: SpillingSet
+        """
+        logging.warning('Memory is running low, spilling %d filenames to disk', len(unique_files))
+        spilling_set = SpillingSet(memory_budget, self.spill_dir)
+        for file in unique_files:
+            spilling_set.add(file)
+        return spilling_set
+
+    def get_log_record(self, json_string):
+        """
+        Decode and validate a line and keep only the fields that are used after
+        validation, see LogRecord
+
+        Returns None if the document does not match the record filter
+        :param json_string: str or UTF-8 encoded bytes
+        :return: LogRecord
+        """
+        document = self.get_json_document(json_string)
+        if document is None:
+            return None
+
+        partition = None
+        if self.partition_field:
+            partition = document.get(self.partition_field, TenantPartitions.get_no_partition())
+        elif self.disposition_mode:
+            partition = document.get(self.disposition_field)
+        return LogRecord(document[self.json_validator.name_field],
+                         document.get(self.time_field), partition)
+
     def get_json_document(self, json_string):
         """
         This function takes a JSON string, loads it as JSON object,
         and validates it against the schema
+
+        Returns None if the document does not match the record filter. Such
+        documents are not validated
         """
         document = self.load_json_from_string(json_string)
+        if self.record_filter is not None and not self.record_filter.matches(document):
+            return None
+
         self.json_validator.validate_document(document)
         return document
 
@@ -102,12 +565,17 @@ class LogParser:
         """
         This function tries to a load the input json_string into a JSON object
 
-        :param json_string:
+        :param json_string: str or UTF-8 encoded bytes
         Raises InvalidJSONFormatException if the string is malformed JSON
+        Raises LineTooLongError for an OversizedLine
         """
         try:
             return json.loads(json_string)
-        except JSONDecodeError as json_error:
+        except (JSONDecodeError, UnicodeDecodeError) as json_error:
+            # An OversizedLine is empty, so it only costs a check when decoding fails
+            if isinstance(json_string, OversizedLine):
+                raise LineTooLongError(
+                    'Line is longer than {0} bytes'.format(self.max_line_length))
             raise JSONFormatError(json_error)
 
     def count_file_extensions(self, unique_files):
@@ -115,21 +583,153 @@ class LogParser:
         Get a dictionary of unique extensions and how many times
         they appeared in the unique_files set
         """
-        extension_counter = FileExtensionCounter()
+        extension_counter = FileExtensionCounter(self.extension_normalizer)
         if not unique_files:
             return defaultdict()
 
+        self.add_unique_files(extension_counter, unique_files)
+        return extension_counter.get_extension_counts()
+
+    def count_disposition_extensions(self, unique_files, report):
+        """
+        Count the extensions of every disposition, MALICIOUS first, and then of
+        all unique filenames. Each count is passed to report as soon as it is
+        done, so the MALICIOUS report does not wait for the larger collections
+        :param unique_files: unique filenames of all lines
+        :param report: function called with a disposition name, or 'all', and the
+            dictionary of extension to number of unique filenames
+        """
+        extension_counter = FileExtensionCounter(self.extension_normalizer)
+        for name in FileExtensionCounter.get_disposition_names():
+            disposition_files = self.disposition_files.get(name)
+            if disposition_files is None:
+                continue
+            disposition_counter = extension_counter.get_disposition_counter(name)
+            self.add_unique_files(disposition_counter, disposition_files)
+            report(name, disposition_counter.get_extension_counts())
+            if isinstance(disposition_files, SpillingSet):
+                disposition_files.close()
+
+        self.add_unique_files(extension_counter, unique_files)
+        report(ALL_DISPOSITIONS, extension_counter.get_extension_counts())
+
+    def count_top_extensions(self, unique_files):
+        """
+        Count extensions in bounded memory, keeping only the most frequent ones
+        :param unique_files:
+        :return: TopKExtensionCounter
+        """
+        extension_counter = TopKExtensionCounter(self.top_k, normalizer=self.extension_normalizer)
+        if unique_files:
+            self.add_unique_files(extension_counter, unique_files)
+
+        return extension_counter
+
+    def count_new_extensions(self, unique_files):
+        """
+        Count the filenames of every extension that are not in the seen filter yet,
+        and add them to it. Every unique filename is looked up once
+        :param unique_files:
+        :return: dictionary of extension to (new count, seen count)
+        """
+        new_counter = FileExtensionCounter(self.extension_normalizer)
+        seen_counter = FileExtensionCounter(self.extension_normalizer)
+        seen_filter = self.seen_filter
+        for file in unique_files:
+            if seen_filter.add(file):
+                seen_counter.add_extension_from_filename(file)
+            else:
+                new_counter.add_extension_from_filename(file)
+
+        new_counts = new_counter.get_extension_counts()
+        seen_counts = seen_counter.get_extension_counts()
+        return {extension: (new_counts.get(extension, 0), seen_counts.get(extension, 0))
+                for extension in set(new_counts) | set(seen_counts)}
+
+    def add_unique_files(self, extension_counter, unique_files):
+        """
+        Add every filename to the counter. A FilenameStore already knows the
+        extension of each filename so only its extension ids are counted
+        """
+        if isinstance(unique_files, FilenameStore):
+            extension_counter.add_extensions_from_store(unique_files)
+            return
+
         for file in unique_files:
             extension_counter.add_extension_from_filename(file)
 
-        return extension_counter.get_extension_counts()
+    def print_top_extensions(self, extension_counter):
+        """
+        Print the top extensions, most frequent first, with the maximum
+        overestimation of each count
+        """
+        self.write_report(''.join(
+            "{0}: {1} (error <= {2})\n".format(key, value, error)
+            for key, value, error in extension_counter.get_top_extensions()))
 
     def print_file_extensions(self, extension_counter):
         """
-        Print the dictionary with file extensions
+        Write the dictionary with file extensions with the result formatter
+        """
+        self.result_formatter.write(extension_counter, self.output_stream or sys.stdout)
+
+    def print_partitioned_extensions(self, partition_counts):
+        """
+        Print the extension counts of every tenant under its name, both sorted
+        by name. The counts of a tenant are sorted and limited by the result formatter
+        """
+        report = []
+        for tenant, counts in sorted(partition_counts.items(), key=lambda item: str(item[0])):
+            report.append('{0}:\n'.format(tenant))
+            report.extend('  ' + line for line in
+                          self.result_formatter.format(counts).splitlines(keepends=True))
+        self.write_report(''.join(report))
+
+    def print_disposition_extensions(self, name, counts):
+        """
+        Print the extension counts of a disposition, or of all lines, under its name.
+        The counts are sorted and limited by the result formatter
+        """
+        lines = self.result_formatter.format(counts).splitlines(keepends=True)
+        self.write_report('{0}:\n'.format(name) + ''.join('  ' + line for line in lines))
+
+    def print_new_extensions(self, new_counts):
+        """
+        Print the number of unique filenames per extension, split into new and seen
+        """
+        self.write_report(''.join(
+            "{0}: {1} (new {2}, seen {3})\n".format(key, new + seen, new, seen)
+            for key, (new, seen) in sorted(new_counts.items())))
+
+    def print_extension_estimates(self, estimates):
+        """
+        Print the estimated number of unique filenames per extension
+        """
+        self.write_report(''.join(
+            "{0}: ~{1:.0f} (95% CI {2:.0f}-{3:.0f}, sampled {4})\n".format(
+                key, value.estimate, value.low, value.high, value.sampled)
+            for key, value in sorted(estimates.items())))
+
+    def write_report(self, report):
+        """
+        Write a text report to the output stream with a single call
+        :param report: str
+        """
+        output_stream = self.output_stream or sys.stdout
+        output_stream.write(report)
+        output_stream.flush()
+
+    def print_truncation_notice(self, processing_stats):
+        """
+        Tell the user on stderr that the report only covers part of the input
         """
-        for key, value in sorted(extension_counter.items()):
-            print("{0}: {1}".format(key, value))
+        if not processing_stats.get('truncated'):
+            return
+        if self.truncation_reason:
+            print('Results are partial: ' + self.truncation_reason, file=sys.stderr)
+        else:
+            print('Results are partial: {0} part(s) of the input were not read to the end'.format(
+                processing_stats['truncated']), file=sys.stderr)
 
     def log_processing_stats(self, processing_stats, exception_stats):
         """
@@ -143,6 +743,9 @@ class LogParser:
         logging.info('Total lines: %d', processing_stats['total'])
         logging.info('Valid lines: %d', processing_stats['success'])
         logging.info('Invalid lines: %d', processing_stats['fail'])
+        logging.info('Filtered lines: %d', processing_stats['filtered'])
+        if processing_stats.get('truncated'):
+            logging.warning('Results are partial, reading stopped early')
 
         logging.debug('Invalid line breakdown')
         logging.debug('=======================================================================')
@@ -0,0 +1,38 @@
+"""
+json_log_parser.log_record
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains the record of a validated log line.
+
+json.loads builds a dictionary with every field of a line, but after
+validation only the filename, the timestamp and the partition value are used.
+The record keeps those three in slots. The dictionary is freed as soon as the
+line is validated instead of staying alive while the next line is decoded,
+which halves the memory a line needs at its peak
+"""
+
+
+class LogRecord:
+    __slots__ = ('filename', 'timestamp', 'partition')
+
+    def __init__(self, filename, timestamp=None, partition=None):
+        """
+        Constructor
+        :param filename: value of the name field
+        :param timestamp: value of the timestamp field, None if there is none
+        :param partition: value of the partition field, or of the disposition field with a
+            disposition mode. None if counts are not partitioned
+        """
+        self.filename = filename
+        self.timestamp = timestamp
+        self.partition = partition
+
+    def __eq__(self, other):
+        if not isinstance(other, LogRecord):
+            return NotImplemented
+        return (self.filename, self.timestamp, self.partition) == \
+            (other.filename, other.timestamp, other.partition)
+
+    def __repr__(self):
+        return 'LogRecord({0!r}, {1!r}, {2!r})'.format(self.filename, self.timestamp,
+                                                       self.partition)
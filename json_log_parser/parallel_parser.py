@@ -0,0 +1,224 @@
+"""
+json_log_parser.parallel_parser
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module processes a single log file with several worker processes or threads.
+
+The file is split into byte range batches. Every worker builds the
+AggregationState of its batches and the states are merged at the end, so the
+report is the same as the one of a serial run. The worker count, batch size and
+reader block size come from the AutoTuner unless they are given. For small files
+the tuner picks a single worker and the file is processed without a pool.
+
+With the 'shared_memory' transport the workers return their filenames in shared
+memory blocks that are merged into a FilenameStore, see shared_memory_transport.
+The 'pickle' transport returns every AggregationState through the pool
+
+The 'thread' executor runs the batches in a thread pool instead. Threads start
+at once and return their results without pickling, but reading, decoding and
+validating a line hold the GIL. They only run on all cores in a free-threaded
+build of Python, so with the GIL the tuner plans a single worker unless the
+worker count is given
+"""
+import copy
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.auto_tuner import AutoTuner
+from json_log_parser.exceptions.input_filename_error import InputFilenameError
+from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.file_reader import FileReader
+from json_log_parser.log_parser import LogParser
+from json_log_parser.shared_memory_transport import SharedMemoryTransport
+
+TRANSPORTS = ('shared_memory', 'pickle')
+EXECUTORS = ('process', 'thread')
+
+
+class ParallelLogParser:
+    # LogParser of the current worker process, set by init_worker
+    worker_parser = None
+
+    def __init__(self, log_parser=None, tuner=None, workers=None, batch_size=None,
+                 block_size=None, transport='shared_memory', executor='process'):
+        """
+        Constructor
+        :param log_parser: LogParser whose settings are used in every worker
+        :param tuner: AutoTuner, by default one that measures with log_parser
+        :param workers: override for the worker count
+        :param batch_size: override for the batch size in bytes
+        :param block_size: override for the reader block size in bytes
+        :param transport: 'shared_memory' or 'pickle', how results reach the parent
+            from worker processes
+        :param executor: 'process' or 'thread'
+        Raises ValueError if log_parser has a memory budget, the merged
+        filenames are kept in memory
+        """
+        if transport not in TRANSPORTS:
+            raise ValueError("Unknown transport '{0}'".format(transport))
+        if executor not in EXECUTORS:
+            raise ValueError("Unknown executor '{0}'".format(executor))
+
+        self.log_parser = log_parser or LogParser()
+        self.log_parser.check_state_supported()
+        if tuner is None and executor == 'thread':
+            tuner = ParallelLogParser.get_thread_tuner(self.log_parser)
+        self.tuner = tuner or AutoTuner(self.log_parser)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.transport = transport
+        self.executor = executor
+
+    @staticmethod
+    def is_gil_enabled():
+        """
+        False on a free-threaded build of Python running without the GIL
+        """
+        is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+        return True if is_gil_enabled is None else is_gil_enabled()
+
+    @staticmethod
+    def get_thread_tuner(log_parser):
+        """
+        AutoTuner for a thread pool. Starting threads and merging their results
+        costs little, but with the GIL only one of them runs at a time
+        """
+        max_workers = None
+        if ParallelLogParser.is_gil_enabled():
+            max_workers = 1
+            logging.info('The GIL is enabled, threads would not process lines in parallel')
+        return AutoTuner(log_parser, max_workers=max_workers, pool_start_seconds=0.001,
+                         worker_start_seconds=0.0001, merge_seconds_per_line=2e-7)
+
+    def process_log(self, input_filename):
+        """
+        Same as LogParser.process_log, using the tuned plan
+        :param input_filename:
+        """
+        try:
+            logging.info('Processing file %s', input_filename)
+            self.log_parser.print_state_report(self.build_state(input_filename))
+            logging.info('Finished processing file %s', input_filename)
+        except InputFilenameError as error:
+            logging.error(error, exc_info=True)
+            print(str(error))
+        except Exception as exc:
+            logging.error(exc, exc_info=True)
+            print('LogParser encountered unexpected error: ' + str(exc))
+            print('Check log_parser.log for more details')
+
+    def build_state(self, input_filename):
+        """
+        Process a log file and return its AggregationState.
+        Errors are raised to the caller
+        :param input_filename:
+        :return: AggregationState
+        """
+        FileReader.is_input_filename_valid(input_filename)
+        plan = self.tuner.tune(input_filename, self.workers, self.batch_size, self.block_size)
+        size = os.path.getsize(input_filename)
+        batches = [(start, min(start + plan.batch_size, size))
+                   for start in range(0, size, plan.batch_size)]
+        if plan.workers == 1 or len(batches) <= 1:
+            return self.log_parser.build_range_state(input_filename, 0, size, plan.block_size)
+        if self.executor == 'thread':
+            return self.build_threaded_state(input_filename, batches, plan.workers,
+                                             plan.block_size)
+
+        with ProcessPoolExecutor(min(plan.workers, len(batches)),
+                                 initializer=ParallelLogParser.init_worker,
+                                 initargs=(self.log_parser,)) as executor:
+            if self.transport == 'pickle':
+                futures = [executor.submit(ParallelLogParser.run_batch, input_filename,
+                                           start, end, plan.block_size)
+                           for start, end in batches]
+                return AggregationState.merge_all(future.result() for future in futures)
+
+            futures = [executor.submit(ParallelLogParser.run_shared_batch, input_filename,
+                                       start, end, plan.block_size)
+                       for start, end in batches]
+            return ParallelLogParser.merge_shared_results(futures)
+
+    def build_threaded_state(self, input_filename, batches, workers, block_size):
+        """
+        Process the batches in a thread pool. Every thread has its own copy of
+        the LogParser, as a worker process would, and merges the states of its
+        batches into its own AggregationState. Those are merged at the end
+        :param batches: list of (start, end) byte ranges
+        :return: AggregationState
+        """
+        local = threading.local()
+        thread_states = []
+
+        def run_batch(start, end):
+            if not hasattr(local, 'parser'):
+                local.parser = copy.deepcopy(self.log_parser)
+                local.state = AggregationState()
+                thread_states.append(local.state)
+            local.state.update(local.parser.build_range_state(input_filename, start, end,
+                                                              block_size))
+
+        with ThreadPoolExecutor(min(workers, len(batches))) as executor:
+            futures = [executor.submit(run_batch, start, end) for start, end in batches]
+            for future in futures:
+                future.result()
+        return AggregationState.merge_all(thread_states)
+
+    @staticmethod
+    def merge_shared_results(futures):
+        """
+        Wait for the shared memory results of all batches and merge them.
+        If a batch failed, the blocks of the other batches are removed
+        :param futures: futures of run_shared_batch
+        :return: AggregationState
+        """
+        results = []
+        try:
+            for future in futures:
+                results.append(future.result())
+        except BaseException:
+            for future in futures[len(results):]:
+                if not future.cancel() and not future.exception():
+                    results.append(future.result())
+            SharedMemoryTransport.unlink(block_name for block_name, _, _ in results)
+            raise
+
+        state = AggregationState.merge_all(
+            AggregationState(processing_stats=processing_stats, exception_stats=exception_stats)
+            for _, processing_stats, exception_stats in results)
+        state.unique_files = SharedMemoryTransport.merge(
+            [block_name for block_name, _, _ in results],
+            FileExtensionCounter.get_no_extension())
+        return state
+
+    @staticmethod
+    def init_worker(log_parser):
+        """
+        Runs once in every worker process
+        """
+        ParallelLogParser.worker_parser = log_parser
+
+    @staticmethod
+    def run_batch(input_filename, start, end, block_size):
+        """
+        Build the AggregationState of one batch in a worker process
+        """
+        parser = ParallelLogParser.worker_parser or LogParser()
+        return parser.build_range_state(input_filename, start, end, block_size)
+
+    @staticmethod
+    def run_shared_batch(input_filename, start, end, block_size):
+        """
+        Process one batch in a worker process and publish its filenames in shared memory
+        :return: (shared memory block name, processing stats, exception stats)
+        """
+        parser = ParallelLogParser.worker_parser or LogParser()
+        unique_files = parser.get_unique_file_set(
+            FileReader.read_range(input_filename, start, end, block_size))
+        return (SharedMemoryTransport.publish(unique_files),
+                dict(parser.processing_stats), dict(parser.exception_stats))
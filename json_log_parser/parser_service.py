@@ -0,0 +1,168 @@
+"""
+json_log_parser.parser_service
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a long-lived service that processes log files on request.
+
+Starting a new Python process for every file pays for the imports, the validator
+setup and the logging configuration every time. The service starts a pool of
+worker processes once. Each worker builds a LogParser when it starts and reuses
+it, with its compiled validator, for every job it runs.
+
+Protocol: one JSON request per line on the input stream and one JSON result per
+line on the output stream. Results are written as soon as jobs finish, so they
+can come back in a different order than the requests. If a worker process dies
+the jobs running in the pool fail and a new pool is started for the next requests
+    request: {"id": "job-1", "path": "/var/log/app.json"}
+    result:  {"id": "job-1", "status": "ok", "extensions": {"pdf": 2},
+              "stats": {"total": 3, "success": 2, "fail": 1},
+              "resources": {"wall_time": 0.01, "cpu_time": 0.01, "max_rss_kb": 20480}}
+    error:   {"id": "job-1", "status": "error", "error": "..."}
+"""
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from json_log_parser.log_parser import LogParser
+
+
+class ParserService:
+    # LogParser of the current worker process, created by init_worker
+    worker_parser = None
+
+    def __init__(self, workers=None, max_pending=None, log_level=logging.INFO):
+        """
+        Constructor
+        :param workers: number of worker processes, defaults to the number of CPUs
+        :param max_pending: maximum number of submitted jobs that have not finished.
+            Reading requests stops while the limit is reached
+        :param log_level:
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.log_level = log_level
+        self.output_lock = threading.Lock()
+        LogParser.setup_logging(log_level)
+
+    def serve(self, input_stream, output_stream):
+        """
+        Read requests until the input stream is closed and write the results.
+        Returns once all submitted jobs have finished
+        :param input_stream: text stream with one JSON request per line
+        :param output_stream: text stream for the JSON results
+        """
+        pending = threading.BoundedSemaphore(self.max_pending)
+        executor = self.create_executor()
+        try:
+            for line in input_stream:
+                if not line.strip():
+                    continue
+
+                try:
+                    job_id, path = ParserService.parse_request(line)
+                except ValueError as error:
+                    self.write_result(output_stream,
+                                      {'id': None, 'status': 'error', 'error': str(error)})
+                    continue
+
+                pending.acquire()
+                try:
+                    future = executor.submit(ParserService.run_job, path)
+                except BrokenProcessPool as error:
+                    # A worker died, for example killed for using too much memory.
+                    # The jobs that were running in the pool get an error result
+                    # from on_job_done. This job did not run yet, so it gets a new pool
+                    logging.error('Worker pool is broken, starting a new one: %s', error)
+                    executor.shutdown()
+                    executor = self.create_executor()
+                    try:
+                        future = executor.submit(ParserService.run_job, path)
+                    except BrokenProcessPool as error:
+                        pending.release()
+                        self.write_result(output_stream,
+                                          {'id': job_id, 'status': 'error', 'error': str(error)})
+                        continue
+
+                future.add_done_callback(
+                    lambda f, job_id=job_id: self.on_job_done(f, job_id, output_stream, pending))
+        finally:
+            executor.shutdown()
+
+    def create_executor(self):
+        return ProcessPoolExecutor(self.workers, initializer=ParserService.init_worker,
+                                   initargs=(self.log_level,))
+
+    def on_job_done(self, future, job_id, output_stream, pending):
+        """
+        Write the result of a finished job and let the next request in
+        """
+        try:
+            result = {'id': job_id, 'status': 'ok'}
+            result.update(future.result())
+        except Exception as exc:
+            logging.error(exc, exc_info=True)
+            result = {'id': job_id, 'status': 'error', 'error': str(exc)}
+        finally:
+            pending.release()
+
+        self.write_result(output_stream, result)
+
+    def write_result(self, output_stream, result):
+        """
+        Results from different jobs must not interleave
+        """
+        with self.output_lock:
+            output_stream.write(json.dumps(result) + '\n')
+            output_stream.flush()
+
+    @staticmethod
+    def parse_request(line):
+        """
+        Parse a request line
+        :param line:
+        :return: (job id, path)
+        Raises ValueError if the request is malformed
+        """
+        request = json.loads(line)
+        if not isinstance(request, dict) or not isinstance(request.get('path'), str):
+            raise ValueError("Request must be a JSON object with a 'path' string")
+
+        return request.get('id'), request['path']
+
+    @staticmethod
+    def init_worker(log_level):
+        """
+        Runs once in every worker process
+        """
+        ParserService.worker_parser = LogParser(log_level)
+
+    @staticmethod
+    def run_job(path):
+        """
+        Process a single log file in a worker process
+
+        Resource accounting is per job because a worker runs one job at a time.
+        max_rss_kb is the peak memory of the worker process so far
+        :param path:
+        :return: dictionary with the extensions, line stats and used resources
+        """
+        parser = ParserService.worker_parser or LogParser()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        extensions = parser.parse_log(path)
+
+        return {
+            'extensions': dict(extensions),
+            'stats': dict(parser.processing_stats),
+            'resources': {
+                'wall_time': time.perf_counter() - wall_start,
+                'cpu_time': time.process_time() - cpu_start,
+                'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+        }
@@ -0,0 +1,182 @@
+"""
+json_log_parser.progress_reporter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module reports the progress of a long run while it reads the log.
+
+FileReader counts the bytes of every block it reads from the file, and
+LogParser registers its line stats and the collection of unique filenames.
+Nothing runs per line. A timer thread samples these every interval seconds
+and passes a Progress to the callback and, optionally, writes a status line
+that overwrites itself to a stream such as stderr.
+
+Rates are measured over the last interval. The ETA divides the remaining
+bytes by the average byte rate since the start, which is steadier
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+Progress = namedtuple('Progress', [
+    'bytes_read', 'total_bytes', 'lines', 'valid', 'invalid', 'unique_files', 'elapsed',
+    'bytes_per_second', 'lines_per_second', 'valid_ratio', 'eta'])
+
+
+class ProgressFile:
+    def __init__(self, binary_file, reporter):
+        """
+        Binary file that adds the bytes read from it to the reporter
+        :param binary_file: file object opened in binary mode
+        :param reporter: ProgressReporter
+        """
+        self.binary_file = binary_file
+        self.reporter = reporter
+
+    def read(self, size=-1):
+        block = self.binary_file.read(size)
+        self.reporter.bytes_read += len(block)
+        return block
+
+    def tell(self):
+        return self.binary_file.tell()
+
+
+class ProgressReporter:
+    def __init__(self, callback=None, interval=1.0, status_stream=None):
+        """
+        Constructor
+        :param callback: optional function called with a Progress every interval
+        :param interval: seconds between two reports
+        :param status_stream: optional text stream for a status line, for example sys.stderr
+        """
+        if interval <= 0:
+            raise ValueError('Interval must be positive')
+
+        self.callback = callback
+        self.interval = interval
+        self.status_stream = status_stream
+        self.bytes_read = 0
+        self.total_bytes = None
+        self.processing_stats = {}
+        self.unique_files = None
+        self.start_time = time.monotonic()
+        self.last_sample = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.status_length = 0
+
+    def start(self, filename=None):
+        """
+        Start the timer thread
+        :param filename: file whose size is used for the ETA, None if it is not known
+        """
+        self.bytes_read = 0
+        self.total_bytes = None
+        if filename:
+            try:
+                self.total_bytes = os.path.getsize(filename)
+            except OSError:
+                # FileReader reports the invalid filename
+                pass
+        self.processing_stats = {}
+        self.unique_files = None
+        self.start_time = time.monotonic()
+        self.last_sample = (self.start_time, 0, 0)
+        self.status_length = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the timer thread and make a last report
+        """
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.report()
+        if self.status_stream is not None:
+            self.status_stream.write('\n')
+            self.status_stream.flush()
+
+    def track_file(self, binary_file):
+        """
+        Count the bytes read from a file
+        :param binary_file: file object opened in binary mode
+        :return: ProgressFile
+        """
+        return ProgressFile(binary_file, self)
+
+    def watch(self, processing_stats, unique_files):
+        """
+        Report the line stats and the unique filenames of the current pass
+        :param processing_stats: dictionary with the total, success and fail line counts
+        :param unique_files: collection of the unique filenames
+        """
+        self.processing_stats = processing_stats
+        self.unique_files = unique_files
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.report()
+
+    def report(self):
+        progress = self.sample()
+        if self.callback is not None:
+            self.callback(progress)
+        if self.status_stream is not None:
+            status = ProgressReporter.format_status(progress)
+            # Spaces clear the rest of a longer previous status
+            self.status_stream.write('\r' + status.ljust(self.status_length))
+            self.status_stream.flush()
+            self.status_length = len(status)
+
+    def sample(self):
+        """
+        Current progress
+        :return: Progress
+        """
+        now = time.monotonic()
+        bytes_read = self.bytes_read
+        stats = self.processing_stats
+        lines = stats.get('total', 0)
+        valid = stats.get('success', 0)
+        invalid = stats.get('fail', 0)
+        last_time, last_bytes, last_lines = self.last_sample
+        self.last_sample = (now, bytes_read, lines)
+        interval = now - last_time
+        elapsed = now - self.start_time
+
+        eta = None
+        if self.total_bytes is not None and bytes_read and elapsed > 0:
+            eta = max(0, self.total_bytes - bytes_read) / (bytes_read / elapsed)
+        try:
+            unique_files = len(self.unique_files)
+        except TypeError:
+            # Not collected yet, or a SpillingSet, whose size is only known at the end
+            unique_files = None
+        return Progress(
+            bytes_read, self.total_bytes, lines, valid, invalid, unique_files, elapsed,
+            (bytes_read - last_bytes) / interval if interval > 0 else 0.0,
+            (lines - last_lines) / interval if interval > 0 else 0.0,
+            valid / (valid + invalid) if valid + invalid else None, eta)
+
+    @staticmethod
+    def format_status(progress):
+        """
+        Status line of a Progress
+        :return: str
+        """
+        if progress.total_bytes:
+            done = '{0:.1f}% of {1:.1f} MB'.format(
+                100 * progress.bytes_read / progress.total_bytes, progress.total_bytes / 1e6)
+        else:
+            done = '{0:.1f} MB'.format(progress.bytes_read / 1e6)
+        return '{0}, {1:.1f} MB/s, {2:.0f} lines/s, {3} valid, {4} unique, ETA {5}'.format(
+            done, progress.bytes_per_second / 1e6, progress.lines_per_second,
+            '-' if progress.valid_ratio is None else '{0:.1%}'.format(progress.valid_ratio),
+            '?' if progress.unique_files is None else progress.unique_files,
+            '-' if progress.eta is None else '{0:.0f}s'.format(progress.eta))
@@ -0,0 +1,148 @@
+"""
+json_log_parser.record_filter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a record filter that is applied in two stages:
+    1) A cheap regex scan of the raw log line, done before the line is decoded
+    2) An exact check of the decoded JSON document, done before validation
+The raw scan may let through lines that do not match but it never drops a
+line that would pass the exact check
+"""
+import json
+import re
+
+
+class RecordFilter:
+    def __init__(self):
+        """
+        Constructor
+        All predicates must match for a record to pass the filter
+        """
+        self.predicates = []
+        self.raw_patterns = []
+        self.raw_byte_patterns = []
+
+    def add_equals(self, field, value):
+        """
+        Only keep records where field is equal to value
+        :param field: JSON key, for example 'bg'
+        :param value: str or int
+        :return: self to allow chaining
+        """
+        self.add_predicate(field, RecordFilter.get_equals_pattern(field, value),
+                           lambda actual: RecordFilter.is_same_value(actual, value))
+        return self
+
+    def add_prefix(self, field, prefix):
+        """
+        Only keep records where field is a string that starts with prefix
+        :param field: JSON key, for example 'nm'
+        :param prefix: str
+        :return: self to allow chaining
+        """
+        if not isinstance(prefix, str):
+            raise TypeError("Prefix for field '{0}' must be a string".format(field))
+
+        self.add_predicate(field, RecordFilter.get_prefix_pattern(field, prefix),
+                           lambda actual: isinstance(actual, str) and actual.startswith(prefix))
+        return self
+
+    def add_predicate(self, field, pattern, check):
+        """
+        Register the raw pattern and the exact check of a single predicate
+        """
+        self.predicates.append((field, check))
+        self.raw_patterns.append(re.compile(pattern))
+        self.raw_byte_patterns.append(re.compile(pattern.encode('utf-8')))
+
+    def might_match(self, line):
+        """
+        Scan the raw line for every predicate without decoding it
+
+        JSON allows strings to be written with escape sequences. A line that contains
+        a backslash could spell a matching value in a way the patterns do not see,
+        so such lines are always treated as candidates
+        :param line: str or bytes as returned by FileReader
+        :return: False if the line cannot match, True if it is a candidate
+        """
+        if isinstance(line, bytes):
+            if b'\\' in line:
+                return True
+            patterns = self.raw_byte_patterns
+        else:
+            if '\\' in line:
+                return True
+            patterns = self.raw_patterns
+
+        for pattern in patterns:
+            if pattern.search(line) is None:
+                return False
+
+        return True
+
+    def matches(self, document):
+        """
+        Exact check on the decoded document
+        :param document: decoded JSON document
+        :return: True if all predicates match
+        """
+        if not isinstance(document, dict):
+            return False
+
+        for field, check in self.predicates:
+            if field not in document or not check(document[field]):
+                return False
+
+        return True
+
+    @staticmethod
+    def is_same_value(actual, expected):
+        """
+        Compare values the way JSON sees them. Booleans are not numbers
+        """
+        if isinstance(actual, bool) != isinstance(expected, bool):
+            return False
+        return actual == expected
+
+    @staticmethod
+    def get_key_pattern(field):
+        """
+        Regex that matches a JSON key followed by the ':' separator
+        """
+        return re.escape(json.dumps(field, ensure_ascii=False)) + r'\s*:\s*'
+
+    @staticmethod
+    def get_equals_pattern(field, value):
+        """
+        Regex that matches the field with the given value in a raw JSON line
+
+        Integers can be written as 1, 1.0 or 10e-1 in JSON and all of them decode to
+        an equal value. Rounding makes even 2.9999999999999999 equal to 3. The
+        pattern accepts the canonical form followed by anything but another digit,
+        any number with a fraction and any number with an exponent
+        :param field:
+        :param value: str or int
+        :return: str
+        """
+        key = RecordFilter.get_key_pattern(field)
+        if isinstance(value, str):
+            return key + re.escape(json.dumps(value, ensure_ascii=False))
+
+        if isinstance(value, int) and not isinstance(value, bool):
+            # -0 is a valid JSON spelling of zero
+            number = '-?0' if value == 0 else re.escape(str(value))
+            return key + r'(?:{0}(?!\d)|-?\d+\.|-?[\d.]+[eE])'.format(number)
+
+        raise TypeError("Unsupported filter value for field '{0}': {1!r}".format(field, value))
+
+    @staticmethod
+    def get_prefix_pattern(field, prefix):
+        """
+        Regex that matches the field with a string value starting with prefix
+        :param field:
+        :param prefix: str
+        :return: str
+        """
+        # Drop the closing quote from the encoded prefix
+        encoded_prefix = json.dumps(prefix, ensure_ascii=False)[:-1]
+        return RecordFilter.get_key_pattern(field) + re.escape(encoded_prefix)
@@ -0,0 +1,112 @@
+"""
+json_log_parser.resource_guard
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains the limits LogParser checks while it reads a log.
+
+The checks run between batches of check_interval lines, so the loop over the
+lines does not pay for them. Memory is the resident set size of the process.
+When it reaches high_water of the memory limit, LogParser moves the unique
+filenames to a SpillingSet, which keeps the counts exact in bounded memory.
+If the limit is reached anyway, or the line or time budget runs out, reading
+stops and the results of the lines read so far are returned, flagged as
+truncated.
+
+The limits apply to every call of LogParser.get_unique_file_set. In parallel
+mode that is every batch, in its own worker process
+"""
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Number of lines read between two checks
+CHECK_INTERVAL = 16 * 1024
+
+
+class ResourceGuard:
+    def __init__(self, memory_limit=None, max_lines=None, time_limit=None,
+                 check_interval=CHECK_INTERVAL, high_water=0.9):
+        """
+        Constructor
+        :param memory_limit: resident set size in bytes at which reading stops, None for no limit
+        :param max_lines: number of lines read before reading stops, None for no limit
+        :param time_limit: seconds of reading before reading stops, None for no limit
+        :param check_interval: number of lines read between two checks
+        :param high_water: fraction of the memory limit at which filenames are spilled to disk
+        """
+        if check_interval <= 0:
+            raise ValueError('Check interval must be positive')
+        if not 0 < high_water <= 1:
+            raise ValueError('High water must be between 0 and 1')
+
+        self.memory_limit = memory_limit
+        self.max_lines = max_lines
+        self.time_limit = time_limit
+        self.check_interval = check_interval
+        self.high_water = high_water
+        self.start_time = time.monotonic()
+
+    def start(self):
+        """
+        Start the time budget
+        """
+        self.start_time = time.monotonic()
+
+    def get_batch_lines(self, lines):
+        """
+        Number of lines to read before the next check
+        :param lines: number of lines read so far
+        """
+        if self.max_lines is None:
+            return self.check_interval
+        return max(0, min(self.check_interval, self.max_lines - lines))
+
+    def get_truncation_reason(self, lines):
+        """
+        :param lines: number of lines read so far
+        :return: why reading has to stop, or None to go on
+        """
+        if self.max_lines is not None and lines >= self.max_lines:
+            return 'line limit of {0} lines reached'.format(self.max_lines)
+        if self.time_limit is not None and time.monotonic() - self.start_time >= self.time_limit:
+            return 'time limit of {0} seconds reached'.format(self.time_limit)
+        if self.memory_limit is not None and ResourceGuard.get_rss() >= self.memory_limit:
+            return 'memory limit of {0} bytes reached'.format(self.memory_limit)
+        return None
+
+    def is_memory_low(self):
+        """
+        True once the resident set size reaches the high water mark
+        """
+        return (self.memory_limit is not None and
+                ResourceGuard.get_rss() >= self.high_water * self.memory_limit)
+
+    def get_spill_budget(self):
+        """
+        Memory budget of the SpillingSet used after the high water mark is reached
+        """
+        return max(1, int(self.memory_limit * (1 - self.high_water)) // 2)
+
+    @staticmethod
+    def get_rss():
+        """
+        Current resident set size of the process in bytes. Where /proc is not
+        available the peak resident set size is used, 0 if that is not known either
+        """
+        try:
+            with open('/proc/self/statm') as r:
+                return int(r.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            pass
+
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
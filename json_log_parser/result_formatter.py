@@ -0,0 +1,179 @@
+"""
+json_log_parser.result_formatter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module turns the extension counts into text, JSON, CSV or binary output.
+
+Rows are formatted in chunks and every chunk is written with a single call, so
+a report with a hundred thousand extensions does not make a system call per
+line. format returns the whole report instead of writing it, for callers that
+do not want any I/O.
+
+Rows are sorted by name, or by count with the largest count first and ties
+sorted by name. With a limit only the first rows in that order are kept.
+
+Binary format
+    magic 'JLPR', format version (1 byte), number of rows (uint32), then per row
+    extension length (uint32), UTF-8 extension, count (uint64)
+All integers are little endian
+"""
+import csv
+import heapq
+import io
+import json
+import struct
+
+from json_log_parser.exceptions.report_format_error import ReportFormatError
+
+FORMATS = ('text', 'json', 'csv', 'binary')
+SORT_ORDERS = ('name', 'count')
+# Number of rows formatted and written at once
+CHUNK_ROWS = 4096
+
+MAGIC = b'JLPR'
+VERSION = 1
+ENCODING = 'utf-8'
+ERRORS = 'surrogatepass'
+
+
+class ResultFormatter:
+    def __init__(self, output_format='text', sort_by='name', limit=None):
+        """
+        Constructor
+        :param output_format: 'text', 'json', 'csv' or 'binary'
+        :param sort_by: 'name' or 'count'
+        :param limit: maximum number of rows, None for all of them
+        """
+        if output_format not in FORMATS:
+            raise ValueError("Unknown output format '{0}'".format(output_format))
+        if sort_by not in SORT_ORDERS:
+            raise ValueError("Unknown sort order '{0}'".format(sort_by))
+        if limit is not None and limit < 0:
+            raise ValueError('Limit must not be negative')
+
+        self.output_format = output_format
+        self.sort_by = sort_by
+        self.limit = limit
+
+    def get_rows(self, extension_counts):
+        """
+        Sort and limit the counts
+        :param extension_counts: dictionary of extension to count
+        :return: list of (extension, count)
+        """
+        if self.sort_by == 'count':
+            key = ResultFormatter.get_count_order
+        else:
+            key = None
+
+        if self.limit is None:
+            return sorted(extension_counts.items(), key=key)
+        # Partial sort, only the kept rows are sorted completely
+        return heapq.nsmallest(self.limit, extension_counts.items(), key=key)
+
+    @staticmethod
+    def get_count_order(row):
+        return -row[1], row[0]
+
+    def format(self, extension_counts):
+        """
+        Format the report without writing it
+        :param extension_counts: dictionary of extension to count
+        :return: str, or bytes for the binary format
+        """
+        chunks = self.iter_chunks(extension_counts)
+        if self.output_format == 'binary':
+            return b''.join(chunks)
+        return ''.join(chunks)
+
+    def write(self, extension_counts, stream):
+        """
+        Write the report to a stream, one write call per chunk of rows
+        :param extension_counts: dictionary of extension to count
+        :param stream: text stream, or a binary stream for the binary format.
+            For the binary format the buffer of a text stream such as sys.stdout is used
+        """
+        if self.output_format == 'binary' and isinstance(stream, io.TextIOBase):
+            stream.flush()
+            stream = stream.buffer
+
+        for chunk in self.iter_chunks(extension_counts):
+            stream.write(chunk)
+        stream.flush()
+
+    def iter_chunks(self, extension_counts):
+        """
+        Lazy function (generator) producing the report in chunks
+        """
+        rows = self.get_rows(extension_counts)
+        formatter = getattr(self, 'format_{0}_chunk'.format(self.output_format))
+        if self.output_format == 'json':
+            yield '{'
+        elif self.output_format == 'csv':
+            yield 'extension,count\r\n'
+        elif self.output_format == 'binary':
+            yield MAGIC + bytes([VERSION]) + struct.pack('<I', len(rows))
+
+        for start in range(0, len(rows), CHUNK_ROWS):
+            yield formatter(rows[start:start + CHUNK_ROWS], start == 0)
+
+        if self.output_format == 'json':
+            yield '}\n'
+
+    @staticmethod
+    def format_text_chunk(rows, is_first):
+        return ''.join('{0}: {1}\n'.format(extension, count) for extension, count in rows)
+
+    @staticmethod
+    def format_json_chunk(rows, is_first):
+        chunk = ', '.join('{0}: {1}'.format(json.dumps(extension), count)
+                          for extension, count in rows)
+        return chunk if is_first else ', ' + chunk
+
+    @staticmethod
+    def format_csv_chunk(rows, is_first):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    @staticmethod
+    def format_binary_chunk(rows, is_first):
+        parts = []
+        for extension, count in rows:
+            encoded = extension.encode(ENCODING, ERRORS)
+            parts.append(struct.pack('<I', len(encoded)))
+            parts.append(encoded)
+            parts.append(struct.pack('<Q', count))
+        return b''.join(parts)
+
+    @staticmethod
+    def load_binary(data):
+        """
+        Read a report in the binary format
+        :param data: bytes
+        :return: list of (extension, count) in the order of the report
+        Raises ReportFormatError if the data is not a binary report
+        """
+        header_size = len(MAGIC) + 1 + 4
+        if len(data) < header_size or data[:len(MAGIC)] != MAGIC:
+            raise ReportFormatError('Not a binary report')
+        if data[len(MAGIC)] != VERSION:
+            raise ReportFormatError('Unsupported report version {0}'.format(data[len(MAGIC)]))
+
+        try:
+            count, = struct.unpack_from('<I', data, len(MAGIC) + 1)
+            position = header_size
+            rows = []
+            for _ in range(count):
+                length, = struct.unpack_from('<I', data, position)
+                position += 4
+                extension = data[position:position + length].decode(ENCODING, ERRORS)
+                position += length
+                rows.append((extension, struct.unpack_from('<Q', data, position)[0]))
+                position += 8
+        except (struct.error, UnicodeDecodeError) as error:
+            raise ReportFormatError('Corrupt binary report: {0}'.format(error))
+
+        if position != len(data):
+            raise ReportFormatError('Corrupt binary report: unexpected length')
+        return rows
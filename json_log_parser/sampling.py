@@ -0,0 +1,150 @@
+"""
+json_log_parser.sampling
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains samplers used to build approximate reports on large log files
+and the estimator that scales the sampled extension counts back up.
+
+Two sampling modes are supported
+    - Line sampling keeps every line with probability equal to the rate.
+      The whole file is still read but only sampled lines are decoded
+    - Block sampling splits the file into fixed size byte blocks and reads only
+      a random subset of them. Most of the file is never read
+Both samplers are deterministic for a given seed
+"""
+import math
+import os
+import random
+from collections import namedtuple
+
+from json_log_parser.file_reader import FileReader
+
+ExtensionEstimate = namedtuple('ExtensionEstimate', ['sampled', 'estimate', 'low', 'high'])
+
+
+class LineSampler:
+    def __init__(self, rate, seed=0):
+        """
+        Constructor
+        :param rate: probability to keep a line, 0 < rate <= 1
+        :param seed: seed for the random number generator
+        """
+        SampleEstimator.check_rate(rate)
+        self.rate = rate
+        self.seed = seed
+
+    def sample(self, line_generator):
+        """
+        Lazy function (generator) that keeps each line with probability rate
+        :param line_generator:
+        :return: generator
+        """
+        rate = self.rate
+        rng = random.Random(self.seed)
+        for line in line_generator:
+            if rng.random() < rate:
+                yield line
+
+    def get_effective_rate(self):
+        return self.rate
+
+
+class BlockSampler:
+    def __init__(self, rate, block_size=1024 * 1024, seed=0):
+        """
+        Constructor
+        :param rate: fraction of blocks to read, 0 < rate <= 1
+        :param block_size: size of a block in bytes
+        :param seed: seed for the random number generator
+        """
+        SampleEstimator.check_rate(rate)
+        if block_size <= 0:
+            raise ValueError('Block size must be positive')
+
+        self.rate = rate
+        self.block_size = block_size
+        self.seed = seed
+        self.effective_rate = None
+
+    def get_block_offsets(self, file_size):
+        """
+        Pick the blocks that will be read
+
+        The number of blocks is fixed to round(rate * total blocks) so the
+        effective rate is known before the file is read. Offsets are sorted
+        to keep the reads moving forward through the file
+        :param file_size: size of the file in bytes
+        :return: list of byte offsets
+        """
+        total_blocks = max(1, math.ceil(file_size / self.block_size))
+        selected = max(1, round(self.rate * total_blocks))
+        self.effective_rate = selected / total_blocks
+
+        rng = random.Random(self.seed)
+        blocks = sorted(rng.sample(range(total_blocks), selected))
+        return [block * self.block_size for block in blocks]
+
+    def sample_file(self, filename, max_line_length=None):
+        """
+        Lazy function (generator) that reads only the selected blocks of the file
+
+        Every line belongs to the block that contains its first byte so each line
+        can be sampled at most once
+        :param filename:
+        :param max_line_length: longer lines are returned as OversizedLine, None for no limit
+        :return: generator of bytes lines
+        """
+        FileReader.is_input_filename_valid(filename)
+        offsets = self.get_block_offsets(os.path.getsize(filename))
+
+        with open(filename, 'rb') as r:
+            for offset in offsets:
+                yield from FileReader.read_lines_in_range(r, offset, offset + self.block_size,
+                                                          max_line_length)
+
+    def get_effective_rate(self):
+        """
+        Fraction of blocks that were selected. Only known once the file size is known
+        """
+        return self.effective_rate
+
+
+class SampleEstimator:
+    # 95% confidence interval
+    DEFAULT_Z = 1.96
+
+    @staticmethod
+    def check_rate(rate):
+        if not 0 < rate <= 1:
+            raise ValueError('Sampling rate must be in the (0, 1] range')
+
+    @staticmethod
+    def estimate_extension_counts(extension_counts, rate, z=DEFAULT_Z):
+        """
+        Scale the counts found in the sample up to the whole file
+
+        Each count is treated as a binomial observation with inclusion
+        probability rate. The estimate is count / rate and the interval uses the
+        normal approximation of the binomial standard error.
+
+        This assumes that each unique filename appears on a single line.
+        Filenames repeated on many lines are more likely to be sampled,
+        so for such logs the estimate is an upper bound. Block sampling reads
+        neighbouring lines together which also makes the real interval wider
+        :param extension_counts: dictionary of extension to sampled count
+        :param rate: effective sampling rate
+        :param z: z-score of the confidence level
+        :return: dictionary of extension to ExtensionEstimate
+        """
+        SampleEstimator.check_rate(rate)
+        estimates = {}
+        for extension, count in extension_counts.items():
+            estimate = count / rate
+            margin = z * math.sqrt(count * (1 - rate)) / rate
+            estimates[extension] = ExtensionEstimate(
+                sampled=count,
+                estimate=estimate,
+                low=max(count, estimate - margin),
+                high=estimate + margin)
+
+        return estimates
@@ -0,0 +1,186 @@
+"""
+json_log_parser.seen_filter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a persistent, memory mapped, scalable Bloom filter of the
+filenames seen in earlier runs.
+
+Keeping the unique filenames of every earlier day to find the new ones would
+need all of them in memory or on disk as a set. The filter answers "seen
+before?" in a few bits per filename. It never says a seen filename is new. A new
+filename is reported as seen with a probability of at most the configured false
+positive rate.
+
+A Bloom filter only holds a fixed number of entries at its false positive rate,
+so the filter is a series of slices. When the last slice is full a new one with
+twice the capacity and half the false positive rate is added. The rates of all
+slices add up to at most the configured rate. The file is mapped into memory, so
+opening it takes constant time however large it is. Only the pages of the bits
+that are tested are read.
+
+Positions are derived from a keyed BLAKE2b digest of the UTF-8 filename, which
+is the same in every process, unlike hash()
+
+File layout, little endian
+    magic 'JLPB', format version (1 byte), 3 padding bytes
+    false positive rate (double), initial capacity (uint64), number of slices (uint32),
+    4 padding bytes
+    MAX_SLICES slice headers: offset, number of bits, entries, capacity (uint64 each),
+    number of hashes (uint32), 4 padding bytes
+    the bits of the slices
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+from json_log_parser.exceptions.seen_filter_error import SeenFilterError
+from json_log_parser.string_store import ENCODING, ERRORS
+
+MAGIC = b'JLPB'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xdQI4x')
+SLICE = struct.Struct('<QQQQI4x')
+# Every slice doubles the capacity, so this is plenty
+MAX_SLICES = 32
+# Share of the false positive rate left for the next slices
+TIGHTENING_RATIO = 0.5
+
+
+class SeenFilter:
+    def __init__(self, file, mapping):
+        """
+        Constructor, use open to create or load a filter file
+        :param file: binary file object of the filter, open for reading and writing
+        :param mapping: mmap of the whole file
+        """
+        self.file = file
+        self.mapping = mapping
+        _, _, self.error_rate, self.initial_capacity, slice_count = \
+            HEADER.unpack_from(mapping, 0)
+        self.slices = [list(SLICE.unpack_from(mapping, HEADER.size + SLICE.size * number))
+                       for number in range(slice_count)]
+
+    @staticmethod
+    def open(filename, error_rate=0.001, initial_capacity=1024 * 1024):
+        """
+        Open a filter file, creating it if it does not exist.
+        The rate and capacity are only used for a new file
+        :param filename:
+        :param error_rate: false positive rate, 0 < error_rate < 1
+        :param initial_capacity: number of filenames of the first slice
+        :return: SeenFilter
+        Raises SeenFilterError if the file is not a filter
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError('False positive rate must be between 0 and 1')
+        if initial_capacity <= 0:
+            raise ValueError('Initial capacity must be positive')
+
+        if not os.path.exists(filename):
+            with open(filename, 'wb') as w:
+                w.write(HEADER.pack(MAGIC, VERSION, error_rate, initial_capacity, 0))
+                w.write(bytes(MAX_SLICES * SLICE.size))
+
+        file = open(filename, 'r+b')
+        try:
+            header = file.read(HEADER.size)
+            if len(header) != HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise SeenFilterError("'{0}' is not a seen filter".format(filename))
+            if header[len(MAGIC)] != VERSION:
+                raise SeenFilterError('Unsupported seen filter version {0}'.format(
+                    header[len(MAGIC)]))
+            return SeenFilter(file, mmap.mmap(file.fileno(), 0))
+        except BaseException:
+            file.close()
+            raise
+
+    @staticmethod
+    def get_digest(filename):
+        """
+        Two independent 64 bit hashes of a filename
+        """
+        digest = hashlib.blake2b(filename.encode(ENCODING, ERRORS), digest_size=16,
+                                 key=b'json_log_parser').digest()
+        return struct.unpack('<QQ', digest)
+
+    def add(self, filename):
+        """
+        Add a filename
+        :param filename: str
+        :return: True if it was (probably) seen before, False if it is new
+        """
+        first, second = SeenFilter.get_digest(filename)
+        if self.contains_digest(first, second):
+            return True
+
+        if not self.slices or self.slices[-1][2] >= self.slices[-1][3]:
+            self.add_slice()
+        mapping = self.mapping
+        current = self.slices[-1]
+        offset, bits, _, _, hashes = current
+        position = first % bits
+        step = second % bits or 1
+        for _ in range(hashes):
+            index = offset + (position >> 3)
+            mapping[index] = mapping[index] | (1 << (position & 7))
+            position = (position + step) % bits
+        current[2] += 1
+        SLICE.pack_into(mapping, HEADER.size + SLICE.size * (len(self.slices) - 1), *current)
+        return False
+
+    def __contains__(self, filename):
+        return self.contains_digest(*SeenFilter.get_digest(filename))
+
+    def contains_digest(self, first, second):
+        """
+        True if every bit of the digest is set in one of the slices
+        """
+        mapping = self.mapping
+        for offset, bits, _, _, hashes in self.slices:
+            position = first % bits
+            step = second % bits or 1
+            for _ in range(hashes):
+                if not mapping[offset + (position >> 3)] & (1 << (position & 7)):
+                    break
+                position = (position + step) % bits
+            else:
+                return True
+        return False
+
+    def add_slice(self):
+        """
+        Append an empty slice with twice the capacity and a tighter false positive rate
+        """
+        number = len(self.slices)
+        if number >= MAX_SLICES:
+            raise SeenFilterError('Seen filter is full')
+
+        capacity = self.initial_capacity * 2 ** number
+        error_rate = self.error_rate * (1 - TIGHTENING_RATIO) * TIGHTENING_RATIO ** number
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, math.ceil(-math.log2(error_rate)))
+        offset = len(self.mapping)
+        # The new bits are zero, the file is extended and mapped again
+        self.mapping.close()
+        self.file.truncate(offset + (bits + 7) // 8)
+        self.mapping = mmap.mmap(self.file.fileno(), 0)
+        self.slices.append([offset, bits, 0, capacity, hashes])
+        SLICE.pack_into(self.mapping, HEADER.size + SLICE.size * number, *self.slices[-1])
+        HEADER.pack_into(self.mapping, 0, MAGIC, VERSION, self.error_rate,
+                         self.initial_capacity, len(self.slices))
+
+    def __len__(self):
+        """
+        Number of filenames added
+        """
+        return sum(current[2] for current in self.slices)
+
+    def close(self):
+        """
+        Write the changes to disk and close the file
+        """
+        self.mapping.flush()
+        self.mapping.close()
+        self.file.close()
@@ -0,0 +1,152 @@
+"""
+json_log_parser.shared_memory_transport
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module moves the unique filenames of worker processes to the parent
+through shared memory.
+
+Returning a set of millions of filenames from a worker pickles every string,
+sends it through a pipe and unpickles it again in the parent, which then holds
+the pickled data and the new set at the same time. Instead every worker sorts
+its filenames as UTF-8 bytes and packs them into a shared memory block. Only the
+name of the block is sent to the parent. The parent attaches to the blocks and
+combines the sorted runs with a k-way merge, skipping duplicates, and adds the
+result to a FilenameStore in bulk. No Python object is pickled for the filenames.
+
+Block layout, native byte order
+    number of names n (uint64)
+    n + 1 offsets into the arena (uint64), name i is arena[offsets[i]:offsets[i + 1]]
+    arena with the sorted names
+
+The parent unlinks every block once it is merged. The worker does not track
+its blocks, otherwise they would be removed when the worker process exits
+"""
+import heapq
+import struct
+from array import array
+from itertools import accumulate, groupby, repeat
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from operator import itemgetter
+
+from json_log_parser.string_store import ENCODING, ERRORS, FilenameStore
+
+HEADER = struct.Struct('=Q')
+# Number of names read from a block at a time
+READ_CHUNK = 64 * 1024
+
+
+class SharedMemoryTransport:
+    @staticmethod
+    def publish(unique_files):
+        """
+        Pack the filenames into a new shared memory block. Called in the worker
+        :param unique_files: set of filenames or a FilenameStore
+        :return: name of the shared memory block
+        """
+        if isinstance(unique_files, FilenameStore):
+            names = sorted(map(unique_files.get_bytes, range(len(unique_files))))
+        else:
+            names = sorted(map(str.encode, unique_files, repeat(ENCODING), repeat(ERRORS)))
+
+        offsets = array('Q', accumulate(map(len, names), initial=0))
+        arena = b''.join(names)
+        del names
+        arena_start = HEADER.size + offsets.itemsize * len(offsets)
+        shm = SharedMemoryTransport.create_untracked(arena_start + len(arena))
+        try:
+            HEADER.pack_into(shm.buf, 0, len(offsets) - 1)
+            shm.buf[HEADER.size:arena_start] = memoryview(offsets).cast('B')
+            shm.buf[arena_start:arena_start + len(arena)] = arena
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+        # Only close the mapping, the block lives on until the parent unlinks it
+        shm.close()
+        return shm.name
+
+    @staticmethod
+    def create_untracked(size):
+        """
+        Create a shared memory block that outlives the process that created it
+        """
+        try:
+            return SharedMemory(create=True, size=size, track=False)
+        except TypeError:
+            # Python < 3.13 always registers the block with the resource tracker
+            shm = SharedMemory(create=True, size=size)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+            return shm
+
+    @staticmethod
+    def iter_names(shm):
+        """
+        Lazy function (generator) to read the sorted names of a block.
+        Names are read READ_CHUNK at a time so only a chunk exists as Python objects
+        :param shm: attached SharedMemory
+        :return: generator of bytes names
+        """
+        count, = HEADER.unpack_from(shm.buf, 0)
+        arena_start = HEADER.size * (count + 2)
+        offsets = shm.buf[HEADER.size:arena_start].cast('Q')
+        arena = shm.buf[arena_start:]
+        try:
+            for first in range(0, count, READ_CHUNK):
+                chunk_offsets = offsets[first:first + READ_CHUNK + 1].tolist()
+                start = chunk_offsets[0]
+                data = bytes(arena[start:chunk_offsets[-1]])
+                starts = [offset - start for offset in chunk_offsets]
+                # Slicing in map runs in C
+                yield from map(data.__getitem__, map(slice, starts, starts[1:]))
+        finally:
+            # The block cannot be closed while views on it exist
+            offsets.release()
+            arena.release()
+
+    @staticmethod
+    def merge(block_names, no_extension):
+        """
+        Merge the blocks into a FilenameStore and unlink them. Called in the parent.
+        The blocks are unlinked even if the merge fails
+        :param block_names: names returned by publish
+        :param no_extension: extension used for filenames without a dot
+        :return: FilenameStore
+        """
+        blocks = []
+        try:
+            for block_name in block_names:
+                blocks.append(SharedMemory(name=block_name))
+
+            runs = [SharedMemoryTransport.iter_names(shm) for shm in blocks]
+            try:
+                # Every run is sorted and free of duplicates, equal names are
+                # adjacent in the merged sequence
+                unique_names = map(itemgetter(0), groupby(heapq.merge(*runs)))
+                unique_files = FilenameStore(no_extension)
+                unique_files.add_unique_bytes(unique_names)
+            finally:
+                for run in runs:
+                    run.close()
+            return unique_files
+        finally:
+            attached = {shm.name for shm in blocks}
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+            SharedMemoryTransport.unlink([name for name in block_names
+                                          if name not in attached])
+
+    @staticmethod
+    def unlink(block_names):
+        """
+        Remove blocks that will not be merged, for example after a failed run
+        """
+        for block_name in block_names:
+            try:
+                shm = SharedMemory(name=block_name)
+            except FileNotFoundError:
+                continue
+            shm.close()
+            shm.unlink()
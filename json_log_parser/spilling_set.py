@@ -0,0 +1,161 @@
+"""
+json_log_parser.spilling_set
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains an exact set of strings that spills to disk when it
+grows past a memory budget.
+
+Strings are collected in a regular set. When its estimated size exceeds the
+budget, the strings are sorted and written to a run file in a temporary
+directory and the set is cleared. Iterating merges the sorted runs and the
+strings still in memory with a streaming k-way merge that skips duplicates, so
+every string is returned exactly once, in sorted order, while only one buffered
+record per run is held in memory.
+
+At most max_open_runs runs are kept. When there are more, they are merged into a
+single run, so iterating never needs more open files than that. The run files
+are removed by close or when the set is garbage collected.
+
+Run file format: for every string in sorted order its UTF-8 length (uint32,
+little endian) followed by the UTF-8 bytes
+"""
+import heapq
+import logging
+import os
+import struct
+import sys
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from json_log_parser.string_store import ENCODING, ERRORS
+
+LENGTH = struct.Struct('<I')
+# Estimated bytes a set needs per entry on top of the string object
+SET_ENTRY_SIZE = 48
+READ_BUFFER_SIZE = 64 * 1024
+
+
+class SpillingSet:
+    def __init__(self, memory_budget, spill_dir=None, max_open_runs=64):
+        """
+        Constructor
+        :param memory_budget: bytes the strings in memory may use before they are spilled
+        :param spill_dir: directory for the temporary run files, defaults to the
+            system temporary directory
+        :param max_open_runs: number of runs that are merged at once
+        """
+        if memory_budget <= 0:
+            raise ValueError('Memory budget must be positive')
+        if max_open_runs < 2:
+            raise ValueError('At least two runs must be merged at once')
+
+        self.memory_budget = memory_budget
+        self.max_open_runs = max_open_runs
+        self.strings = set()
+        self.memory_used = 0
+        self.temporary_directory = tempfile.TemporaryDirectory(
+            prefix='json_log_parser_', dir=spill_dir)
+        self.runs = []
+        self.run_count = 0
+        self.spilled_strings = 0
+
+    def add(self, string):
+        """
+        Add a string, spilling the strings in memory if the budget is exceeded
+        :param string: str
+        """
+        if string in self.strings:
+            return
+
+        self.strings.add(string)
+        self.memory_used += sys.getsizeof(string) + SET_ENTRY_SIZE
+        if self.memory_used > self.memory_budget:
+            self.spill()
+
+    def spill(self):
+        """
+        Write the strings in memory to a new sorted run and clear the set
+        """
+        if not self.strings:
+            return
+
+        # UTF-8 keeps the code point order, so sorted str is sorted bytes too
+        path = self.write_run(
+            string.encode(ENCODING, ERRORS) for string in sorted(self.strings))
+        logging.info('Spilled %d filenames to %s', len(self.strings), path)
+        self.spilled_strings += len(self.strings)
+        self.strings = set()
+        self.memory_used = 0
+        self.runs.append(path)
+
+        if len(self.runs) >= self.max_open_runs:
+            self.compact_runs()
+
+    def compact_runs(self):
+        """
+        Merge all runs into a single run
+        """
+        path = self.write_run(SpillingSet.merge_sorted(
+            [SpillingSet.read_run(run) for run in self.runs]))
+        for run in self.runs:
+            os.remove(run)
+        self.runs = [path]
+
+    def write_run(self, keys):
+        """
+        Write sorted UTF-8 keys to a new run file
+        :param keys: iterable of bytes
+        :return: path of the run file
+        """
+        path = os.path.join(self.temporary_directory.name,
+                            'run{0:06d}'.format(self.run_count))
+        self.run_count += 1
+        with open(path, 'wb') as w:
+            for key in keys:
+                w.write(LENGTH.pack(len(key)))
+                w.write(key)
+        return path
+
+    @staticmethod
+    def read_run(path):
+        """
+        Lazy function (generator) to read the keys of a run file
+        :param path:
+        :return: generator of bytes
+        """
+        with open(path, 'rb', buffering=READ_BUFFER_SIZE) as r:
+            while True:
+                header = r.read(LENGTH.size)
+                if not header:
+                    return
+                length, = LENGTH.unpack(header)
+                yield r.read(length)
+
+    @staticmethod
+    def merge_sorted(runs):
+        """
+        k-way merge of sorted runs without duplicates
+        :param runs: iterables of sorted bytes
+        :return: iterator of bytes
+        """
+        return map(itemgetter(0), groupby(heapq.merge(*runs)))
+
+    def __iter__(self):
+        """
+        Every string exactly once, in sorted order
+        """
+        in_memory = [string.encode(ENCODING, ERRORS) for string in sorted(self.strings)]
+        runs = [SpillingSet.read_run(run) for run in self.runs] + [in_memory]
+        for key in SpillingSet.merge_sorted(runs):
+            yield key.decode(ENCODING, ERRORS)
+
+    def __bool__(self):
+        return bool(self.strings) or bool(self.runs)
+
+    def close(self):
+        """
+        Remove the run files
+        """
+        self.temporary_directory.cleanup()
+        self.runs = []
@@ -0,0 +1,234 @@
+"""
+json_log_parser.string_store
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a compact, deduplicating store for strings.
+
+A Python str costs about 50 bytes of object header on top of its characters
+and a set adds another slot for it. The store keeps all strings as UTF-8 bytes
+in a single arena and refers to them by integer ids. The only per string
+overhead is an offset, a hash and a slot in an open addressing table, all kept
+in typed arrays, about 30 bytes in total.
+
+FilenameStore also extracts the extension of every new filename once, with a
+reverse scan for the last dot in the arena, and keeps it as a small integer id
+"""
+from array import array
+from itertools import accumulate, islice, repeat
+
+ENCODING = 'utf-8'
+# Lone surrogates are valid in JSON strings but cannot be encoded as UTF-8 otherwise
+ERRORS = 'surrogatepass'
+# Number of keys add_unique_bytes holds as Python objects at a time
+BULK_CHUNK = 64 * 1024
+
+
+class StringStore:
+    def __init__(self, initial_capacity=1024):
+        """
+        Constructor
+        :param initial_capacity: initial number of slots in the hash table
+        """
+        capacity = 8
+        while capacity < initial_capacity:
+            capacity *= 2
+
+        self.arena = bytearray()
+        # String i is arena[offsets[i]:offsets[i + 1]]
+        self.offsets = array('Q', [0])
+        # Low 32 bits of the hash of every string, enough to place it in the table
+        self.hashes = array('I')
+        # None while the table is out of date after add_unique_bytes
+        self.table = array('i', [-1]) * capacity
+
+    def add(self, string):
+        """
+        Add a string if it is not in the store yet
+        :param string: str
+        :return: id of the string
+        """
+        return self.add_bytes(string.encode(ENCODING, ERRORS))
+
+    def add_bytes(self, key):
+        """
+        Add a UTF-8 encoded string if it is not in the store yet
+        :param key: bytes
+        :return: id of the string
+        """
+        self.ensure_table()
+        key_hash = hash(key) & 0xFFFFFFFF
+        slot = self.find_slot(key, key_hash)
+        string_id = self.table[slot]
+        if string_id >= 0:
+            return string_id
+
+        string_id = len(self)
+        self.arena += key
+        self.offsets.append(len(self.arena))
+        self.hashes.append(key_hash)
+        self.table[slot] = string_id
+        self.on_add(string_id)
+
+        # Keep the table at most half full so probe sequences stay short
+        if 2 * len(self) > len(self.table):
+            self.grow()
+
+        return string_id
+
+    def add_unique_bytes(self, keys):
+        """
+        Add many UTF-8 encoded strings at once. Much faster than add_bytes for
+        every key because the arena and offsets are extended in bulk and the
+        hash table is only rebuilt when a lookup needs it. Iterating and counting
+        extensions do not.
+        The caller guarantees that the keys are distinct and not in the store yet,
+        for example the deduplicated output of a merge
+        :param keys: iterable of bytes, consumed BULK_CHUNK keys at a time
+        """
+        keys = iter(keys)
+        self.table = None
+        while True:
+            chunk = list(islice(keys, BULK_CHUNK))
+            if not chunk:
+                return
+
+            first_id = len(self)
+            self.arena += b''.join(chunk)
+            # accumulate starts with the last offset, which is already in the array
+            self.offsets.extend(
+                islice(accumulate(map(len, chunk), initial=self.offsets[-1]), 1, None))
+            self.on_add_many(first_id, chunk)
+
+    def ensure_table(self):
+        """
+        Hash the strings added by add_unique_bytes and rebuild the table
+        """
+        if self.table is not None:
+            return
+
+        self.hashes.extend([hash(self.get_bytes(string_id)) & 0xFFFFFFFF
+                            for string_id in range(len(self.hashes), len(self))])
+        capacity = 8
+        while 2 * len(self) > capacity:
+            capacity *= 2
+        self.rebuild_table(capacity)
+
+    def on_add(self, string_id):
+        """
+        Called once for every new string. Subclasses keep per string data here
+        """
+
+    def on_add_many(self, first_id, keys):
+        """
+        Called by add_unique_bytes for the new strings, starting at first_id
+        """
+
+    def find_slot(self, key, key_hash):
+        """
+        Linear probing. Returns the slot that holds key or the empty slot where it belongs
+        """
+        table = self.table
+        mask = len(table) - 1
+        slot = key_hash & mask
+        while True:
+            string_id = table[slot]
+            if string_id < 0:
+                return slot
+            if self.hashes[string_id] == key_hash and self.get_bytes(string_id) == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def grow(self):
+        """
+        Double the hash table. Stored hashes are reused, strings are not touched
+        """
+        self.rebuild_table(2 * len(self.table))
+
+    def rebuild_table(self, capacity):
+        """
+        Place every string in a new table with capacity slots, a power of two
+        """
+        table = array('i', [-1]) * capacity
+        mask = len(table) - 1
+        for string_id, key_hash in enumerate(self.hashes):
+            slot = key_hash & mask
+            while table[slot] >= 0:
+                slot = (slot + 1) & mask
+            table[slot] = string_id
+
+        self.table = table
+
+    def get_id(self, string):
+        """
+        :return: id of the string or None if it is not in the store
+        """
+        self.ensure_table()
+        key = string.encode(ENCODING, ERRORS)
+        string_id = self.table[self.find_slot(key, hash(key) & 0xFFFFFFFF)]
+        return string_id if string_id >= 0 else None
+
+    def get_bytes(self, string_id):
+        return bytes(self.arena[self.offsets[string_id]:self.offsets[string_id + 1]])
+
+    def get(self, string_id):
+        return self.get_bytes(string_id).decode(ENCODING, ERRORS)
+
+    def get_memory_size(self):
+        """
+        Number of bytes used by the arena and the arrays
+        """
+        table_size = 0 if self.table is None else self.table.itemsize * len(self.table)
+        return (len(self.arena) + self.offsets.itemsize * len(self.offsets) +
+                self.hashes.itemsize * len(self.hashes) + table_size)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __contains__(self, string):
+        return isinstance(string, str) and self.get_id(string) is not None
+
+    def __iter__(self):
+        for string_id in range(len(self)):
+            yield self.get(string_id)
+
+
+class FilenameStore(StringStore):
+    def __init__(self, no_extension, initial_capacity=1024):
+        """
+        Constructor
+        :param no_extension: extension used for filenames without a dot
+        :param initial_capacity: initial number of slots in the hash table
+        """
+        super().__init__(initial_capacity)
+        self.extensions = StringStore(initial_capacity=64)
+        self.no_extension_id = self.extensions.add(no_extension)
+        # Extension id of every filename, indexed by filename id
+        self.extension_ids = array('I')
+
+    def on_add(self, string_id):
+        """
+        Extract the extension with a reverse scan for the last dot
+        """
+        start = self.offsets[string_id]
+        end = self.offsets[string_id + 1]
+        dot = self.arena.rfind(b'.', start, end)
+        if dot < 0:
+            self.extension_ids.append(self.no_extension_id)
+        else:
+            self.extension_ids.append(self.extensions.add_bytes(bytes(self.arena[dot + 1:end])))
+
+    def on_add_many(self, first_id, keys):
+        """
+        Same as on_add for a batch of new filenames. Every distinct
+        extension is added to the extension store only once
+        """
+        extensions = [extension if dot else None
+                      for _, dot, extension in map(bytes.rpartition, keys, repeat(b'.'))]
+        extension_ids = {extension: self.extensions.add_bytes(extension)
+                         for extension in set(extensions) if extension is not None}
+        extension_ids[None] = self.no_extension_id
+        self.extension_ids.extend(map(extension_ids.__getitem__, extensions))
+
+    def get_memory_size(self):
+        return (super().get_memory_size() + self.extensions.get_memory_size() +
+                self.extension_ids.itemsize * len(self.extension_ids))
@@ -0,0 +1,229 @@
+"""
+json_log_parser.tenant_partitions
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module contains the unique filenames and extension counts of every
+tenant of a log, collected in a single pass. The tenant of a line is the value
+of a partition field such as 'bg'.
+
+Tenants are spread over a fixed number of shards by a CRC32 of their key, which
+is the same in every process. Partitions built from different parts of a log
+are merged shard by shard, so shards can be built and merged independently.
+
+Most tenants of a multi-tenant log are small. A partition keeps its filenames
+in a list until it has compact_threshold of them, which needs a fraction of the
+memory of a set for a few names. Larger partitions use a set, or a
+FilenameStore with compact strings. The extension counts of a partition are
+updated whenever a new filename is added.
+
+The estimated memory of the filenames is tracked. With a memory budget, the
+least recently used partitions are spilled once the budget is exceeded, until
+half of it is free. Their filenames move to a SpillingSet on disk. A spilled
+partition keeps collecting new filenames in memory and its extensions are
+counted from the deduplicated SpillingSet when the counts are requested
+"""
+import sys
+import zlib
+
+from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.spilling_set import SET_ENTRY_SIZE, SpillingSet
+from json_log_parser.string_store import ENCODING, ERRORS, FilenameStore
+
+DEFAULT_SHARD_COUNT = 16
+DEFAULT_COMPACT_THRESHOLD = 64
+
+
+class TenantPartition:
+    def __init__(self, normalizer=None):
+        """
+        Constructor
+        :param normalizer: optional ExtensionNormalizer of the extension counter
+        """
+        self.filenames = []
+        # None once the partition was spilled, the counts are computed from disk then
+        self.extension_counter = FileExtensionCounter(normalizer)
+        self.spilled = None
+        self.memory_used = 0
+        self.last_used = 0
+
+
+class TenantPartitions:
+    def __init__(self, shard_count=DEFAULT_SHARD_COUNT,
+                 compact_threshold=DEFAULT_COMPACT_THRESHOLD, normalizer=None,
+                 compact_strings=False, memory_budget=None, spill_dir=None):
+        """
+        Constructor
+        :param shard_count: number of shards the tenants are spread over
+        :param compact_threshold: a partition keeps up to this many filenames in a list
+        :param normalizer: optional ExtensionNormalizer applied before counting
+        :param compact_strings: keep the filenames of large partitions in a FilenameStore
+        :param memory_budget: if set, estimated bytes of filenames kept in memory
+            before the least recently used partitions are spilled to disk
+        :param spill_dir: directory for the files of spilled partitions
+        """
+        if shard_count <= 0:
+            raise ValueError('Shard count must be positive')
+        if compact_threshold < 0:
+            raise ValueError('Compact threshold must not be negative')
+        if memory_budget is not None and memory_budget <= 0:
+            raise ValueError('Memory budget must be positive')
+
+        self.shard_count = shard_count
+        self.compact_threshold = compact_threshold
+        self.normalizer = normalizer
+        self.compact_strings = compact_strings
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.shards = [{} for _ in range(shard_count)]
+        self.memory_used = 0
+        self.clock = 0
+        self.spilled_partitions = 0
+
+    @staticmethod
+    def get_no_partition():
+        """
+        Tenant of the lines without the partition field
+        :return: str
+        """
+        return 'no_partition'
+
+    def get_shard(self, tenant):
+        """
+        Shard of a tenant, the same in every process
+        :param tenant: str
+        :return: index into shards
+        """
+        return zlib.crc32(str(tenant).encode(ENCODING, ERRORS)) % self.shard_count
+
+    def add(self, tenant, filename):
+        """
+        Add a filename to the partition of a tenant
+        :param tenant: str
+        :param filename: str
+        """
+        shard = self.shards[self.get_shard(tenant)]
+        partition = shard.get(tenant)
+        if partition is None:
+            partition = shard[tenant] = TenantPartition(self.normalizer)
+        self.clock += 1
+        partition.last_used = self.clock
+
+        filenames = partition.filenames
+        if filename in filenames:
+            return
+        if type(filenames) is not list:
+            filenames.add(filename)
+        elif len(filenames) < self.compact_threshold:
+            filenames.append(filename)
+        else:
+            partition.filenames = self.create_filename_set(filenames)
+            partition.filenames.add(filename)
+
+        if partition.extension_counter is not None:
+            partition.extension_counter.add_extension_from_filename(filename)
+        size = sys.getsizeof(filename) + SET_ENTRY_SIZE
+        partition.memory_used += size
+        self.memory_used += size
+        if self.memory_budget is not None and self.memory_used > self.memory_budget:
+            self.spill_cold_partitions(self.memory_budget // 2)
+
+    def create_filename_set(self, filenames):
+        """
+        Collection of a partition that outgrew the compact list
+        :param filenames: list of str
+        :return: set or FilenameStore
+        """
+        if not self.compact_strings:
+            return set(filenames)
+        store = FilenameStore(FileExtensionCounter.get_no_extension())
+        for filename in filenames:
+            store.add(filename)
+        return store
+
+    def spill_cold_partitions(self, target):
+        """
+        Spill the least recently used partitions until at most target bytes of
+        filenames are estimated to be in memory
+        :param target: bytes
+        """
+        partitions = sorted((partition for shard in self.shards for partition in shard.values()
+                             if partition.memory_used), key=lambda partition: partition.last_used)
+        for partition in partitions:
+            if self.memory_used <= target:
+                break
+            self.spill_partition(partition)
+
+    def spill_partition(self, partition):
+        """
+        Move the filenames of a partition in memory to its SpillingSet on disk
+        """
+        if partition.spilled is None:
+            partition.spilled = SpillingSet(self.memory_budget or sys.maxsize, self.spill_dir)
+            self.spilled_partitions += 1
+        for filename in partition.filenames:
+            partition.spilled.add(filename)
+        partition.spilled.spill()
+        partition.filenames = []
+        partition.extension_counter = None
+        self.memory_used -= partition.memory_used
+        partition.memory_used = 0
+
+    def get_filenames(self, tenant):
+        """
+        Lazy function (generator) of the unique filenames of a tenant
+        :param tenant: str
+        :return: generator of str
+        """
+        partition = self.shards[self.get_shard(tenant)].get(tenant)
+        if partition is None:
+            return
+        if partition.spilled is None:
+            yield from partition.filenames
+            return
+        # Filenames added after the spill may be on disk already
+        for filename in partition.filenames:
+            partition.spilled.add(filename)
+        yield from partition.spilled
+
+    def get_extension_counts(self):
+        """
+        Extension counts of every tenant
+        :return: dictionary of tenant to dictionary of extension to number of unique filenames
+        """
+        counts = {}
+        for shard in self.shards:
+            for tenant, partition in shard.items():
+                extension_counter = partition.extension_counter
+                if extension_counter is None:
+                    extension_counter = FileExtensionCounter(self.normalizer)
+                    for filename in self.get_filenames(tenant):
+                        extension_counter.add_extension_from_filename(filename)
+                counts[tenant] = dict(extension_counter.get_extension_counts())
+        return counts
+
+    def update(self, other):
+        """
+        Add the filenames of every tenant of other, shard by shard
+        :param other: TenantPartitions with the same shard count
+        """
+        if other.shard_count != self.shard_count:
+            raise ValueError('Partitions with different shard counts cannot be merged')
+        for shard in other.shards:
+            for tenant in shard:
+                for filename in other.get_filenames(tenant):
+                    self.add(tenant, filename)
+
+    def __len__(self):
+        """
+        Number of tenants
+        """
+        return sum(len(shard) for shard in self.shards)
+
+    def close(self):
+        """
+        Remove the files of the spilled partitions
+        """
+        for shard in self.shards:
+            for partition in shard.values():
+                if partition.spilled is not None:
+                    partition.spilled.close()
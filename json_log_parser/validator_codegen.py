@@ -0,0 +1,291 @@
+"""
+json_log_parser.validator_codegen
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module generates a specialized Python validator function for a schema.
+
+jsonschema interprets the schema for every document: it walks the keywords,
+looks up a function for each of them and builds error objects. For a flat log
+line schema the same checks can be written out as straight-line Python code.
+The code is generated and compiled once per schema and cached by schema hash.
+
+The generated function raises the same exception types and messages as
+JSONValidator did with jsonschema.best_match: a missing required property is
+reported first, then the first failing property check in schema order.
+After the schema checks the field rules are applied in the configured order
+    timestamp: within the datetime range and not in the future
+    path:      at most 4096 characters and no null bytes
+    filename:  no '/' and no null bytes
+
+Supported schema keywords: type, properties and required on the document,
+type, enum, minimum, maximum, exclusiveMinimum, exclusiveMaximum, minLength,
+maxLength and pattern on the properties. format is ignored, the same as
+jsonschema does without a format checker
+"""
+import hashlib
+import json
+import re
+
+from json_log_parser.exceptions.file_path_error import FilePathError
+from json_log_parser.exceptions.filename_error import FilenameError
+from json_log_parser.exceptions.json_schema_error import JSONSchemaError
+from json_log_parser.exceptions.schema_config_error import SchemaConfigError
+from json_log_parser.exceptions.timestamp_error import TimestampError
+from json_log_parser.json_schema import JSONSchema
+
+# Python expression that is true if `value` has the JSON type, same as jsonschema Draft 7
+TYPE_CHECKS = {
+    'string': 'isinstance(value, str)',
+    'integer': '(isinstance(value, int) and not isinstance(value, bool) or '
+               'isinstance(value, float) and value.is_integer())',
+    'number': '(isinstance(value, (int, float)) and not isinstance(value, bool))',
+    'boolean': 'isinstance(value, bool)',
+    'object': 'isinstance(value, dict)',
+    'array': 'isinstance(value, list)',
+    'null': 'value is None',
+}
+NUMBER_CHECK = TYPE_CHECKS['number']
+STRING_CHECK = TYPE_CHECKS['string']
+
+# Keyword: (Python condition for a failure, error message format)
+NUMBER_KEYWORDS = {
+    'minimum': ('value < {0}', '%r is less than the minimum of %r'),
+    'maximum': ('value > {0}', '%r is greater than the maximum of %r'),
+    'exclusiveMinimum': ('value <= {0}', '%r is less than or equal to the minimum of %r'),
+    'exclusiveMaximum': ('value >= {0}', '%r is greater than or equal to the maximum of %r'),
+}
+STRING_KEYWORDS = {
+    'minLength': ('len(value) < {0}', '%r is too short'),
+    'maxLength': ('len(value) > {0}', '%r is too long'),
+}
+IGNORED_KEYWORDS = {'format', 'title', 'description', '$schema', '$id'}
+
+RULES = ('timestamp', 'path', 'filename')
+
+
+class ValidatorCodegen:
+    # Generated validators by schema hash
+    cache = {}
+
+    @staticmethod
+    def get_validator(schema, rules):
+        """
+        Returns the generated validator for the schema and field rules,
+        generating and compiling it the first time
+        :param schema: JSON schema dictionary
+        :param rules: dictionary of field name to rule name
+        :return: function(document, clock) where clock provides max_timestamp
+            and refresh_clock, for example a JSONValidator
+        Raises SchemaConfigError if the schema uses unsupported keywords
+        """
+        key = ValidatorCodegen.get_schema_hash(schema, rules)
+        validator = ValidatorCodegen.cache.get(key)
+        if validator is None:
+            validator = ValidatorCodegen.compile_validator(schema, rules, key)
+            ValidatorCodegen.cache[key] = validator
+        return validator
+
+    @staticmethod
+    def get_schema_hash(schema, rules):
+        canonical = json.dumps([schema, rules], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def compile_validator(schema, rules, key):
+        """
+        Generate the source of the validator and compile it
+        """
+        namespace = {
+            'JSONSchemaError': JSONSchemaError,
+            'TimestampError': TimestampError,
+            'FilePathError': FilePathError,
+            'FilenameError': FilenameError,
+            'MISSING': object(),
+        }
+        namespace['MIN_TIMESTAMP'], namespace['MAX_TIMESTAMP'] = JSONSchema.get_timestamp_range()
+
+        source = '\n'.join(ValidatorCodegen.generate_source(schema, rules, namespace)) + '\n'
+        code = compile(source, '<validator {0}>'.format(key[:12]), 'exec')
+        exec(code, namespace)
+        validator = namespace['validate']
+        validator.source = source
+        return validator
+
+    @staticmethod
+    def generate_source(schema, rules, namespace):
+        """
+        Generate the lines of the validator function
+        :param namespace: globals of the generated code. Constants such as
+            compiled patterns are added to it
+        :return: list of str
+        """
+        ValidatorCodegen.check_keywords(schema, {'type', 'properties', 'required'}, 'document')
+        if schema.get('type', 'object') != 'object':
+            raise SchemaConfigError('Document type must be object')
+
+        properties = schema.get('properties', {})
+        required = schema.get('required', [])
+        for field, rule in rules.items():
+            if rule not in RULES:
+                raise SchemaConfigError("Unknown rule '{0}' for field '{1}'".format(rule, field))
+
+        # Every field that is checked gets a local variable
+        fields = list(properties)
+        fields += [field for field in list(required) + list(rules) if field not in fields]
+        variables = {field: 'v{0}'.format(i) for i, field in enumerate(fields)}
+
+        lines = [
+            'def validate(document, clock):',
+            '    if not isinstance(document, dict):',
+            '        raise JSONSchemaError("%r is not of type \'object\'" % (document,))',
+        ]
+        for field in fields:
+            lines.append('    {0} = document.get({1!r}, MISSING)'.format(variables[field], field))
+
+        for field in required:
+            lines.append('    if {0} is MISSING:'.format(variables[field]))
+            lines.append('        raise JSONSchemaError({0!r})'.format(
+                '{0!r} is a required property'.format(field)))
+
+        for field, subschema in properties.items():
+            checks = ValidatorCodegen.generate_property_checks(field, subschema, namespace)
+            lines += ValidatorCodegen.guard_field(variables[field], checks, field in required)
+
+        for field, rule in rules.items():
+            checks = getattr(ValidatorCodegen, 'generate_{0}_rule'.format(rule))()
+            lines += ValidatorCodegen.guard_field(variables[field], checks, field in required)
+
+        return lines
+
+    @staticmethod
+    def guard_field(variable, checks, is_required):
+        """
+        Indent the checks of a field and skip them if the field is missing
+        """
+        if not checks:
+            return []
+
+        lines = ['    value = {0}'.format(variable)]
+        if is_required:
+            return lines + ['    ' + check for check in checks]
+
+        lines.append('    if value is not MISSING:')
+        return lines + ['        ' + check for check in checks]
+
+    @staticmethod
+    def generate_property_checks(field, subschema, namespace):
+        """
+        Generate the checks of a single property, in the keyword order of the subschema
+        """
+        allowed = {'type', 'enum', 'pattern'} | set(NUMBER_KEYWORDS) | set(STRING_KEYWORDS)
+        ValidatorCodegen.check_keywords(subschema, allowed, field)
+
+        checks = []
+        # Keywords only apply to values of their type. Once the type keyword has
+        # passed, later keywords do not need to check the type again
+        string_guard = STRING_CHECK + ' and '
+        number_guard = NUMBER_CHECK + ' and '
+        for keyword, argument in subschema.items():
+            if keyword == 'type':
+                types = argument if isinstance(argument, list) else [argument]
+                unknown = [t for t in types if t not in TYPE_CHECKS]
+                if unknown:
+                    raise SchemaConfigError("Unknown type {0!r} for field '{1}'".format(
+                        unknown[0], field))
+                condition = ' or '.join(TYPE_CHECKS[t] for t in types)
+                checks += ValidatorCodegen.raise_if(
+                    'not ({0})'.format(condition),
+                    '%r is not of type ' + ', '.join(repr(t) for t in types), 'value')
+                if types == ['string']:
+                    string_guard = ''
+                elif types in (['integer'], ['number']):
+                    number_guard = ''
+            elif keyword == 'enum':
+                constant = ValidatorCodegen.add_constant(namespace, argument)
+                checks += ValidatorCodegen.raise_if(
+                    'value not in {0}'.format(constant),
+                    '%r is not one of %r', 'value, {0}'.format(constant))
+            elif keyword == 'pattern':
+                constant = ValidatorCodegen.add_constant(namespace, re.compile(argument))
+                checks += ValidatorCodegen.raise_if(
+                    '{0}{1}.search(value) is None'.format(string_guard, constant),
+                    '%r does not match %r', 'value, {0!r}'.format(argument))
+            elif keyword in NUMBER_KEYWORDS:
+                condition, message = NUMBER_KEYWORDS[keyword]
+                checks += ValidatorCodegen.raise_if(
+                    number_guard + condition.format(repr(argument)),
+                    message, 'value, {0!r}'.format(argument))
+            elif keyword in STRING_KEYWORDS:
+                condition, message = STRING_KEYWORDS[keyword]
+                checks += ValidatorCodegen.raise_if(
+                    string_guard + condition.format(repr(argument)), message, 'value')
+
+        return checks
+
+    @staticmethod
+    def raise_if(condition, message, arguments):
+        return [
+            'if {0}:'.format(condition),
+            '    raise JSONSchemaError({0!r} % ({1},))'.format(message, arguments),
+        ]
+
+    @staticmethod
+    def add_constant(namespace, value):
+        name = 'CONSTANT_{0}'.format(len(namespace))
+        namespace[name] = value
+        return name
+
+    @staticmethod
+    def generate_timestamp_rule():
+        """
+        Same checks as JSONValidator.is_valid_timestamp. The clock is read again
+        before a timestamp is rejected as being in the future
+        """
+        return [
+            'if not ({0}):'.format(NUMBER_CHECK),
+            '    raise TimestampError("Timestamp is not a number")',
+            'if not MIN_TIMESTAMP <= value <= MAX_TIMESTAMP:',
+            '    raise TimestampError("timestamp out of range")',
+            'if value > clock.max_timestamp:',
+            '    clock.refresh_clock()',
+            '    if value > clock.max_timestamp:',
+            '        raise TimestampError("Timestamp is in the future")',
+        ]
+
+    @staticmethod
+    def generate_path_rule():
+        """
+        Same checks as JSONValidator.is_valid_path
+        """
+        return [
+            'if not {0}:'.format(STRING_CHECK),
+            '    raise FilePathError("File path is not a string")',
+            'if len(value) > 4096:',
+            '    raise FilePathError("File path is longer than 4096 characters")',
+            'if "\\x00" in value:',
+            '    raise FilePathError("File path contains null bytes")',
+        ]
+
+    @staticmethod
+    def generate_filename_rule():
+        """
+        Same checks as JSONValidator.is_valid_filename
+        """
+        return [
+            'if not {0}:'.format(STRING_CHECK),
+            '    raise FilenameError("Filename is not a string")',
+            'if "/" in value:',
+            '    raise FilenameError("Invalid character \'/\' in filename")',
+            'if "\\x00" in value:',
+            '    raise FilenameError("Filename contains null bytes")',
+        ]
+
+    @staticmethod
+    def check_keywords(schema, allowed, location):
+        if not isinstance(schema, dict):
+            raise SchemaConfigError("Schema of '{0}' must be an object".format(location))
+
+        for keyword in schema:
+            if keyword not in allowed and keyword not in IGNORED_KEYWORDS:
+                raise SchemaConfigError("Unsupported schema keyword '{0}' in '{1}'".format(
+                    keyword, location))
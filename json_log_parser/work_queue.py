@@ -0,0 +1,294 @@
+"""
+json_log_parser.work_queue
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module splits the processing of large log files between several hosts
+that share a spool directory, for example on an NFS volume. No broker is needed,
+all coordination is done with atomic renames inside the spool directory
+
+    pending/<task>.json           task waiting for a worker
+    claimed/<task>.<worker>.json  task being processed, its mtime is the heartbeat
+    done/<task>.json              finished task
+    failed/<task>.json            task that raised an error, with the error message
+    results/<task>.state          AggregationState of a finished task
+    finished                      written by the coordinator once the results are merged
+
+A task is a byte range of a log file. A worker claims a task by renaming it from
+pending to claimed. Only one rename can succeed, so only one worker gets the task.
+While it works, the worker keeps touching the claimed file. The coordinator moves
+claimed tasks with a stale heartbeat back to pending so another worker retries them.
+Results are written to a temporary file and renamed into place, so a partial result
+is never visible. If a task runs twice the second result simply replaces the first.
+Use a new spool directory for every batch
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.exceptions.work_queue_error import WorkQueueError
+from json_log_parser.log_parser import LogParser
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+RESULTS = 'results'
+FINISHED = 'finished'
+
+
+class WorkQueue:
+    def __init__(self, spool_dir):
+        """
+        Constructor
+        Creates the spool directories if needed
+        :param spool_dir: directory shared by the coordinator and all workers
+        """
+        self.spool_dir = spool_dir
+        for directory in (PENDING, CLAIMED, DONE, FAILED, RESULTS):
+            os.makedirs(self.get_path(directory), exist_ok=True)
+
+    def get_path(self, *parts):
+        return os.path.join(self.spool_dir, *parts)
+
+    def is_finished(self):
+        return os.path.exists(self.get_path(FINISHED))
+
+    @staticmethod
+    def get_task_id(task_filename):
+        """
+        Task id is the part of the filename before the first dot
+        """
+        return task_filename.split('.', 1)[0]
+
+    def write_atomic(self, path, data):
+        """
+        Write to a temporary file in the same directory and rename it into place
+        """
+        temporary_path = '{0}.{1}.tmp'.format(path, WorkQueueWorker.get_default_worker_id())
+        with open(temporary_path, 'wb') as w:
+            w.write(data)
+            w.flush()
+            os.fsync(w.fileno())
+        os.replace(temporary_path, path)
+
+
+class WorkQueueCoordinator(WorkQueue):
+    def __init__(self, spool_dir, lease_timeout=60):
+        """
+        Constructor
+        :param spool_dir:
+        :param lease_timeout: seconds without a heartbeat after which a claimed
+            task is considered abandoned and is retried
+        """
+        super().__init__(spool_dir)
+        self.lease_timeout = lease_timeout
+        self.task_ids = []
+
+    def submit(self, filenames, chunk_size=256 * 1024 * 1024):
+        """
+        Split the files into byte range tasks and queue them
+        :param filenames: log files, they must be readable by every worker under the same path
+        :param chunk_size: size of a task in bytes
+        :return: list of task ids
+        """
+        if chunk_size <= 0:
+            raise ValueError('Chunk size must be positive')
+
+        for filename in filenames:
+            size = os.path.getsize(filename)
+            for start in range(0, max(size, 1), chunk_size):
+                task_id = '{0:08d}'.format(len(self.task_ids))
+                task = {'id': task_id, 'path': filename,
+                        'start': start, 'end': min(start + chunk_size, size)}
+                self.write_atomic(self.get_path(PENDING, task_id + '.json'),
+                                  json.dumps(task).encode('utf-8'))
+                self.task_ids.append(task_id)
+
+        logging.info('Submitted %d tasks to %s', len(self.task_ids), self.spool_dir)
+        return self.task_ids
+
+    def requeue_abandoned_tasks(self):
+        """
+        Move claimed tasks without a recent heartbeat back to pending
+        :return: number of requeued tasks
+        """
+        requeued = 0
+        now = time.time()
+        for claimed_filename in os.listdir(self.get_path(CLAIMED)):
+            claimed_path = self.get_path(CLAIMED, claimed_filename)
+            try:
+                if now - os.path.getmtime(claimed_path) < self.lease_timeout:
+                    continue
+                task_id = WorkQueue.get_task_id(claimed_filename)
+                os.rename(claimed_path, self.get_path(PENDING, task_id + '.json'))
+            except FileNotFoundError:
+                # The worker finished the task in the meantime
+                continue
+
+            logging.warning('Requeued abandoned task %s', claimed_filename)
+            requeued += 1
+
+        return requeued
+
+    def get_missing_results(self):
+        results = set(os.listdir(self.get_path(RESULTS)))
+        return [task_id for task_id in self.task_ids if task_id + '.state' not in results]
+
+    def wait(self, timeout=None, poll_interval=1.0):
+        """
+        Wait until every submitted task has a result, retrying abandoned tasks,
+        then merge the results and tell the workers to stop
+        :param timeout: seconds to wait, None waits forever
+        :param poll_interval: seconds between checks of the spool directory
+        :return: merged AggregationState
+        Raises TimeoutError if the results are not ready in time
+        Raises WorkQueueError if a task failed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.get_missing_results():
+            try:
+                self.check_failed_tasks()
+            except WorkQueueError:
+                # The batch cannot complete, stop the workers
+                self.write_atomic(self.get_path(FINISHED), b'')
+                raise
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError('{0} tasks did not finish in time'.format(
+                    len(self.get_missing_results())))
+            self.requeue_abandoned_tasks()
+            time.sleep(poll_interval)
+
+        state = self.merge_results()
+        self.write_atomic(self.get_path(FINISHED), b'')
+        return state
+
+    def check_failed_tasks(self):
+        """
+        Raises WorkQueueError with the error of the first failed task
+        """
+        failed = sorted(os.listdir(self.get_path(FAILED)))
+        if failed:
+            with open(self.get_path(FAILED, failed[0]), 'rb') as r:
+                task = json.loads(r.read().decode('utf-8'))
+            raise WorkQueueError('{0} tasks failed. Task {1} on {2}: {3}'.format(
+                len(failed), task['id'], task['path'], task['error']))
+
+    def merge_results(self):
+        states = []
+        for task_id in self.task_ids:
+            with open(self.get_path(RESULTS, task_id + '.state'), 'rb') as r:
+                states.append(AggregationState.load(r))
+
+        return AggregationState.merge_all(states)
+
+
+class WorkQueueWorker(WorkQueue):
+    def __init__(self, spool_dir, worker_id=None, heartbeat_interval=10, log_parser=None):
+        """
+        Constructor
+        :param spool_dir:
+        :param worker_id: unique name of the worker, defaults to hostname and pid
+        :param heartbeat_interval: seconds between heartbeats, must be well below
+            the lease timeout of the coordinator
+        :param log_parser: LogParser used for every task
+        """
+        super().__init__(spool_dir)
+        self.worker_id = worker_id or WorkQueueWorker.get_default_worker_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.log_parser = log_parser or LogParser()
+
+    @staticmethod
+    def get_default_worker_id():
+        return '{0}-{1}'.format(socket.gethostname().replace('.', '_'), os.getpid())
+
+    def claim(self):
+        """
+        Claim the next pending task
+        :return: (task, claimed path) or None if no task is pending
+        """
+        for pending_filename in sorted(os.listdir(self.get_path(PENDING))):
+            if not pending_filename.endswith('.json'):
+                continue
+
+            task_id = WorkQueue.get_task_id(pending_filename)
+            pending_path = self.get_path(PENDING, pending_filename)
+            claimed_path = self.get_path(
+                CLAIMED, '{0}.{1}.json'.format(task_id, self.worker_id))
+            try:
+                # Start the lease before the rename, which keeps the mtime. A task
+                # that waited longer than the lease timeout would look stale otherwise
+                os.utime(pending_path)
+                os.rename(pending_path, claimed_path)
+            except FileNotFoundError:
+                # Another worker was faster
+                continue
+
+            try:
+                with open(claimed_path, 'rb') as r:
+                    return json.loads(r.read().decode('utf-8')), claimed_path
+            except FileNotFoundError:
+                # The coordinator requeued the task right after the rename
+                continue
+
+        return None
+
+    def run(self, exit_when_idle=False, poll_interval=1.0):
+        """
+        Process tasks until the coordinator writes the finished marker
+        :param exit_when_idle: stop as soon as no task is pending
+        :param poll_interval: seconds to wait when no task is pending
+        :return: number of processed tasks
+        """
+        processed = 0
+        while not self.is_finished():
+            claimed = self.claim()
+            if claimed is None:
+                if exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.process_task(*claimed)
+            processed += 1
+
+        return processed
+
+    def process_task(self, task, claimed_path):
+        """
+        Process one task while sending heartbeats, then publish its result
+        """
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self.send_heartbeats,
+                                     args=(claimed_path, stop_heartbeat), daemon=True)
+        heartbeat.start()
+        destination = DONE
+        try:
+            logging.info('Worker %s processing task %s', self.worker_id, task['id'])
+            state = self.log_parser.build_range_state(task['path'], task['start'], task['end'])
+            self.write_atomic(self.get_path(RESULTS, task['id'] + '.state'), state.dumps())
+        except Exception as exc:
+            # Retrying would fail the same way. Report it to the coordinator
+            logging.error(exc, exc_info=True)
+            task['error'] = str(exc)
+            self.write_atomic(claimed_path, json.dumps(task).encode('utf-8'))
+            destination = FAILED
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        try:
+            os.rename(claimed_path, self.get_path(destination, task['id'] + '.json'))
+        except FileNotFoundError:
+            # The task was requeued while we worked on it. The result is valid anyway
+            logging.warning('Task %s was requeued before it finished', task['id'])
+
+    def send_heartbeats(self, claimed_path, stop_heartbeat):
+        while not stop_heartbeat.wait(self.heartbeat_interval):
+            try:
+                os.utime(claimed_path)
+            except FileNotFoundError:
+                return
@@ -37,6 +37,9 @@ setup(
     name='json_log_parser',
     version=find_version(),
     packages=['json_log_parser'],
+    entry_points={
+        'console_scripts': ['json_log_parser=json_log_parser.cli:main'],
+    },
     install_requires=install_requires,
     tests_require=tests_require,
     description='JSON log parser for Python',
@@ -0,0 +1,90 @@
+"""
+Shared fixtures for the unit tests
+"""
+import json
+import os
+
+import pytest
+
+PERF_BASELINE = os.path.join(os.path.dirname(__file__), 'data', 'perf_baseline.json')
+
+LOG_LINE = '{{"ts":1551140352,"pt":55,' \
+           '"si":"3380fb19-0bdb-46ab-8781-e4c5cd448074",' \
+           '"uu":"0dd24034-36d6-4b1e-a6c1-a52cc984f105",' \
+           '"bg":"77e28e28-745a-474b-a496-3c0e086eaec0",' \
+           '"sha":"abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",' \
+           '"nm":"file{0}.{1}","ph":"/efvrfutgp/expgh/phkkrw","dp":2}}\n'
+
+
+@pytest.fixture(scope='function')
+def log_file(tmp_path):
+    """
+    Log file with 1000 unique filenames, half pdf and half txt
+    """
+    path = tmp_path / 'log.json'
+    path.write_text(''.join(LOG_LINE.format(i, 'pdf' if i % 2 else 'txt') for i in range(1000)))
+    return str(path)
+
+
+@pytest.fixture(scope='function')
+def empty_name_log_file(log_file):
+    """
+    The log file of log_file with one more line whose filename is empty
+    """
+    with open(log_file, 'a') as w:
+        w.write(LOG_LINE.format('', '').replace('"nm":"file."', '"nm":""'))
+    return log_file
+
+
+@pytest.fixture(scope='module')
+def perf_log_file(tmp_path_factory):
+    """
+    Log file of the performance tests, always the same 20000 lines.
+    5000 unique filenames with 8 extensions and every 100th line is not JSON
+    """
+    extensions = ['pdf', 'txt', 'exe', 'docx', 'tar.gz', 'PDF', 'jpg', 'zip']
+    path = tmp_path_factory.mktemp('perf') / 'log.json'
+    path.write_text(''.join('not json\n' if i % 100 == 99 else
+                            LOG_LINE.format(i % 5000, extensions[i % len(extensions)])
+                            for i in range(20000)))
+    return str(path)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--perf', action='store_true',
+                     help='run the performance regression tests against the baseline')
+    parser.addoption('--perf-update-baseline', action='store_true',
+                     help='run the performance tests and write their results as the baseline')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'perf: performance regression test, run with --perf')
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Timing depends on the machine and its load, so the performance tests only
+    run when they are asked for
+    """
+    if config.getoption('--perf') or config.getoption('--perf-update-baseline'):
+        return
+    skip = pytest.mark.skip(reason='performance test, run with --perf')
+    for item in items:
+        if 'perf' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def perf_baseline(request):
+    """
+    Baseline of the performance tests, a dictionary with the thresholds and
+    the results of every case. With --perf-update-baseline the results of the
+    session are written back to the file at the end
+    """
+    with open(PERF_BASELINE) as r:
+        baseline = json.load(r)
+    yield baseline
+    if request.config.getoption('--perf-update-baseline'):
+        with open(PERF_BASELINE, 'w') as w:
+            json.dump(baseline, w, indent=2, sort_keys=True)
+            w.write('\n')
@@ -0,0 +1,145 @@
+"""
+Unit tests for json_log_parser.aggregation_state module
+"""
+from io import BytesIO
+
+import pytest
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.exceptions.state_format_error import StateFormatError
+from json_log_parser.extension_normalizer import ExtensionNormalizer
+from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.string_store import FilenameStore
+
+
+def get_state(names, success):
+    return AggregationState(names, {'total': success + 1, 'success': success, 'fail': 1},
+                            {'JSONFormatError-bad': 1})
+
+
+def test_dump_load_round_trip():
+    """
+    Happy path: a loaded state is equal to the dumped one
+    """
+    state = get_state({'a.txt', 'тест.ткт', '\ud800.bad', ''}, 4)
+    fp = BytesIO()
+    state.dump(fp)
+    fp.seek(0)
+
+    assert AggregationState.load(fp) == state
+
+
+def test_dumps_is_deterministic():
+    """
+    Same content, same bytes, regardless of insertion order
+    """
+    names = ['file{0}.txt'.format(i) for i in range(100)]
+    assert get_state(names, 1).dumps() == get_state(reversed(names), 1).dumps()
+
+
+def test_merge_does_not_count_filenames_twice():
+    """
+    Filenames are unioned, stats are summed
+    """
+    merged = get_state({'a.txt', 'b.pdf'}, 2).merge(get_state({'b.pdf', 'c.exe'}, 3))
+
+    assert merged.unique_files == {'a.txt', 'b.pdf', 'c.exe'}
+    assert merged.processing_stats['success'] == 5
+    assert merged.processing_stats['fail'] == 2
+    assert merged.exception_stats['JSONFormatError-bad'] == 2
+
+
+def test_merge_is_associative():
+    """
+    Tree-wise merge gives the same result as a linear merge
+    """
+    a = get_state({'a.txt'}, 1)
+    b = get_state({'a.txt', 'b.txt'}, 2)
+    c = get_state({'c.txt'}, 3)
+
+    assert a.merge(b).merge(c) == a.merge(b.merge(c)) == AggregationState.merge_all([a, b, c])
+
+
+def test_filename_store_state():
+    """
+    A FilenameStore is kept as it is, dumped and merged like a set
+    """
+    store = FilenameStore('ext')
+    for name in ('a.txt', 'b.pdf', '\ud800.bad'):
+        store.add(name)
+    state = get_state(store, 3)
+    merged = state.merge(get_state({'a.txt', 'c'}, 2))
+
+    assert state.unique_files is store
+    assert state.dumps() == get_state(set(store), 3).dumps()
+    assert merged.unique_files == {'a.txt', 'b.pdf', '\ud800.bad', 'c'}
+    assert AggregationState.merge_all([state]) == state
+
+
+def test_loads_not_a_state():
+    """
+    Random bytes raise StateFormatError
+    """
+    with pytest.raises(StateFormatError):
+        AggregationState.loads(b'not a state')
+
+
+def test_loads_truncated_state():
+    """
+    Truncated state raises StateFormatError
+    """
+    data = get_state({'a.txt'}, 1).dumps()
+    with pytest.raises(StateFormatError):
+        AggregationState.loads(data[:-3])
+
+
+def test_loads_unsupported_version():
+    """
+    Unknown format version raises StateFormatError
+    """
+    data = bytearray(get_state({'a.txt'}, 1).dumps())
+    data[4] = 99
+    with pytest.raises(StateFormatError) as err:
+        AggregationState.loads(bytes(data))
+
+    assert 'Unsupported state version 99' in str(err)
+
+
+def test_update_merges_in_place():
+    """
+    update adds the filenames and stats of another state to this one
+    """
+    state = AggregationState({'a.pdf'}, {'total': 1, 'success': 1})
+    state.update(AggregationState({'a.pdf', 'b.txt'}, {'total': 2, 'fail': 1},
+                                  {'JSONFormatError-x': 1}))
+
+    assert state.unique_files == {'a.pdf', 'b.txt'}
+    assert state.processing_stats == {'total': 3, 'success': 1, 'fail': 1}
+    assert state.exception_stats == {'JSONFormatError-x': 1}
+
+
+def test_loads_extension_counts():
+    """
+    Extensions are counted from the serialized names like from the loaded filenames
+    """
+    names = {'a.txt', 'b.TXT', 'archive.tar.gz', 'README', 'тест.ткт', '\ud800.bad', ''}
+    state = get_state(names, 6)
+    expected = FileExtensionCounter(ExtensionNormalizer())
+    for name in names:
+        expected.add_extension_from_filename(name)
+    counter = FileExtensionCounter(ExtensionNormalizer())
+
+    assert AggregationState.loads_extension_counts(state.dumps(), counter) == \
+        state.processing_stats
+    assert counter.get_extension_counts() == expected.get_extension_counts()
+    assert counter.get_extension_counts()['no_extension'] == 1
+
+
+def test_loads_extension_counts_not_a_state():
+    """
+    Invalid data raises StateFormatError and adds nothing
+    """
+    counter = FileExtensionCounter()
+    with pytest.raises(StateFormatError):
+        AggregationState.loads_extension_counts(b'not a state', counter)
+    assert not counter.get_extension_counts()
@@ -0,0 +1,115 @@
+"""
+Unit tests for json_log_parser.auto_tuner module
+"""
+import logging
+
+import pytest
+
+from json_log_parser.auto_tuner import AutoTuner, InputProfile, MAX_BATCH_SIZE, MIN_BLOCK_SIZE
+from json_log_parser.log_parser import LogParser
+
+GB = 1024 * 1024 * 1024
+
+
+def test_profile(log_file):
+    """
+    Happy path: the sample is measured
+    """
+    with open(log_file, 'a') as w:
+        w.write('not json\n' * 1000)
+    profile = AutoTuner(LogParser(), sample_size=1024 * 1024).profile(log_file)
+
+    assert profile.lines == 2000
+    assert profile.invalid_ratio == 0.5
+    assert 100 < profile.mean_line_length < 200
+    assert profile.seconds_per_line > 0
+
+
+def test_profile_reads_only_the_sample(log_file):
+    """
+    Only lines that start in the sample are profiled
+    """
+    profile = AutoTuner(LogParser(), sample_size=1000).profile(log_file)
+
+    assert profile.lines < 10
+
+
+def test_profile_empty_file(tmp_path):
+    """
+    Empty file is processed serially
+    """
+    path = tmp_path / 'empty.json'
+    path.write_text('')
+    tuner = AutoTuner(LogParser(), max_workers=8)
+
+    assert tuner.tune(str(path)).workers == 1
+
+
+def test_small_file_is_serial(log_file):
+    """
+    Starting a pool costs more than processing a small file
+    """
+    plan = AutoTuner(LogParser(), max_workers=8).tune(log_file)
+
+    assert plan.workers == 1
+    assert 'serial' in plan.reason
+
+
+def test_large_file_uses_all_workers():
+    """
+    A 40 GB file is split into batches for every worker
+    """
+    profile = InputProfile(40 * GB, 1000, 300.0, 0.1, 20e-6)
+    plan = AutoTuner(LogParser(), max_workers=8).plan(profile)
+
+    assert plan.workers == 8
+    assert plan.batch_size == MAX_BATCH_SIZE
+    assert plan.block_size == 128 * 1024
+
+
+def test_worker_count_grows_with_work():
+    """
+    More work needs more workers, up to the limit
+    """
+    tuner = AutoTuner(LogParser(), max_workers=64)
+    workers = [tuner.plan(InputProfile(size, 1000, 200.0, 0.0, 20e-6)).workers
+               for size in (10 ** 6, 10 ** 7, 10 ** 8, 10 ** 9)]
+
+    assert workers == sorted(workers)
+    assert workers[0] == 1
+    assert 1 < workers[-1] <= 64
+
+
+def test_batch_size_is_whole_blocks():
+    """
+    Batches are rounded up to whole blocks
+    """
+    profile = InputProfile(100 * 1000 * 1000, 1000, 100.0, 0.0, 20e-6)
+    plan = AutoTuner(LogParser(), max_workers=4).plan(profile)
+
+    assert plan.workers > 1
+    assert plan.block_size == MIN_BLOCK_SIZE
+    assert plan.batch_size % plan.block_size == 0
+
+
+def test_overrides(caplog):
+    """
+    Given values are used and the decision is logged
+    """
+    profile = InputProfile(40 * GB, 1000, 300.0, 0.1, 20e-6)
+    with caplog.at_level(logging.INFO):
+        plan = AutoTuner(LogParser(), max_workers=8).plan(
+            profile, workers=3, batch_size=1000, block_size=4096)
+
+    assert plan == (3, 1000, 4096, 'workers set by caller')
+    assert 'Tuning plan: 3 workers, batch size 1000, block size 4096' in caplog.text
+
+
+def test_invalid_override():
+    """
+    Worker count must be positive
+    Raises ValueError
+    """
+    profile = InputProfile(GB, 1000, 300.0, 0.1, 20e-6)
+    with pytest.raises(ValueError):
+        AutoTuner(LogParser()).plan(profile, workers=0)
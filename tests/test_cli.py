@@ -0,0 +1,188 @@
+"""
+Unit tests for json_log_parser.cli module
+"""
+import pytest
+
+from json_log_parser.cli import main
+
+
+def test_dump_and_merge_states(tmp_path, capsys):
+    """
+    Shards are dumped, merged tree-wise and reported without double counting
+    """
+    first = str(tmp_path / 'first.state')
+    second = str(tmp_path / 'second.state')
+    merged = str(tmp_path / 'merged.state')
+    main(['dump-state', 'tests/data/log_parser_tests/log_parser.json', first])
+    main(['dump-state', 'data/sample_log.json', second])
+    main(['merge-states', first, second, '--output', merged])
+    main(['merge-states', merged])
+
+    assert capsys.readouterr().out.strip() == 'ext: 1\npdf: 2\ntxt: 1'
+
+
+def test_compare_states(tmp_path, capsys):
+    """
+    Two stored states are compared without parsing the logs again
+    """
+    before = str(tmp_path / 'before.state')
+    after = str(tmp_path / 'after.state')
+    main(['dump-state', 'tests/data/log_parser_tests/log_parser.json', before])
+    main(['dump-state', 'data/sample_log.json', after])
+    main(['compare-states', before, after])
+    main(['compare-states', '--outliers-only', '--min-change', '2', before, after])
+    main(['compare-states', before, str(tmp_path / 'missing.state')])
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[:3] == ['ext: 1 -> 1 (+0, +0.0%)',
+                          'pdf: 1 -> 2 (+1, +100.0%) OUTLIER',
+                          'txt: 1 -> 1 (+0, +0.0%)']
+    # No change reaches --min-change 2
+    assert len(output) == 4
+    assert 'missing.state' in output[3]
+
+
+def test_parse_with_schema_config(capsys):
+    """
+    Log with a different shape is parsed with its schema config
+    """
+    main(['parse', '--schema-config', 'tests/data/schema_config_tests/schema_config.json',
+          'tests/data/schema_config_tests/custom_log.json'])
+
+    assert capsys.readouterr().out.strip() == 'pdf: 2'
+
+
+def test_parse_parallel(log_file, capsys):
+    """
+    Parallel parse with overridden plan prints the same report
+    """
+    main(['parse', '--workers', '2', '--batch-size', '20000', log_file])
+
+    assert capsys.readouterr().out == 'pdf: 500\ntxt: 500\n'
+
+
+def test_parse_json_report_file(tmp_path):
+    """
+    Report is written to a file in the requested format
+    """
+    report_file = tmp_path / 'report.json'
+    main(['parse', '--format', 'json', '--sort', 'count', '--limit', '1',
+          '--report-file', str(report_file), 'data/sample_log.json'])
+
+    assert report_file.read_text() == '{"pdf": 2}\n'
+
+
+def test_dump_state_missing_file(tmp_path, capsys):
+    """
+    Missing log file is reported without a traceback and no state is written
+    """
+    state = tmp_path / 'missing.state'
+    main(['dump-state', 'file/does/not/exist', str(state)])
+
+    assert 'does not exist' in capsys.readouterr().out
+    assert not state.exists()
+
+
+def test_merge_states_corrupt_state(tmp_path, capsys):
+    """
+    Corrupt or missing state files are reported without a traceback
+    """
+    corrupt = tmp_path / 'corrupt.state'
+    corrupt.write_bytes(b'not a state')
+    main(['merge-states', str(corrupt)])
+    main(['merge-states', str(tmp_path / 'missing.state')])
+
+    output = capsys.readouterr().out.splitlines()
+    assert len(output) == 2
+    assert 'missing.state' in output[1]
+
+
+def test_parse_memory_budget_with_parallel(log_file, capsys):
+    """
+    A memory budget would be ignored by the workers
+    Exits with a usage error
+    """
+    with pytest.raises(SystemExit):
+        main(['parse', '--memory-budget', '4096', '--parallel', log_file])
+
+    assert '--memory-budget cannot be combined' in capsys.readouterr().err
+
+
+def test_parse_dispositions(capsys):
+    """
+    MALICIOUS is reported first, then all lines. Cannot be combined with parallel processing
+    """
+    main(['parse', '--dispositions', 'priority', 'data/sample_log.json'])
+
+    assert capsys.readouterr().out == 'MALICIOUS:\nall:\n  ext: 1\n  pdf: 2\n  txt: 1\n'
+    with pytest.raises(SystemExit):
+        main(['parse', '--dispositions', 'split', '--threads', 'data/sample_log.json'])
+    assert '--dispositions cannot be combined' in capsys.readouterr().err
+
+
+def test_parse_with_line_index_and_query(log_file, tmp_path, capsys):
+    """
+    Index written by parse is used by query-index
+    """
+    index_filename = str(tmp_path / 'log.idx')
+    main(['parse', '--line-index', index_filename, log_file])
+    capsys.readouterr()
+    main(['query-index', log_file, '--index', index_filename, '--line', '3'])
+    main(['query-index', log_file, '--index', index_filename, '--extension', 'pdf'])
+
+    output = capsys.readouterr().out.splitlines()
+    assert '"nm":"file3.pdf"' in output[0]
+    assert len(output) == 501
+    assert output[1].startswith('1: {"ts": 1551140352')
+
+
+def test_parse_with_seen_filter(log_file, tmp_path, capsys):
+    """
+    The seen filter file is created by the first run and used by the next
+    """
+    seen_filter = str(tmp_path / 'seen.bloom')
+    main(['parse', '--seen-filter', seen_filter, log_file])
+    main(['parse', '--seen-filter', seen_filter, log_file])
+
+    assert capsys.readouterr().out.splitlines()[-1] == 'txt: 500 (new 0, seen 500)'
+
+
+def test_parse_partition_by(log_file, capsys):
+    """
+    Counts are printed per value of the partition field
+    """
+    main(['parse', '--partition-by', 'bg', log_file])
+
+    assert capsys.readouterr().out == \
+        '77e28e28-745a-474b-a496-3c0e086eaec0:\n  pdf: 500\n  txt: 500\n'
+
+
+def test_parse_partition_by_with_parallel(log_file, capsys):
+    """
+    Workers build aggregation states, which are not partitioned
+    Exits with a usage error
+    """
+    with pytest.raises(SystemExit):
+        main(['parse', '--partition-by', 'bg', '--parallel', log_file])
+
+    assert '--partition-by cannot be combined' in capsys.readouterr().err
+
+
+def test_parse_progress(log_file, capsys):
+    """
+    The status line goes to stderr and the report to stdout
+    """
+    main(['parse', '--progress', log_file])
+
+    captured = capsys.readouterr()
+    assert captured.out == 'pdf: 500\ntxt: 500\n'
+    assert 'ETA 0s' in captured.err
+
+
+def test_parse_threads(log_file, capsys):
+    """
+    A thread pool run prints the same report
+    """
+    main(['parse', '--threads', '--workers', '2', '--batch-size', '20000', log_file])
+
+    assert capsys.readouterr().out == 'pdf: 500\ntxt: 500\n'
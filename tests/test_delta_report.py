@@ -0,0 +1,75 @@
+"""
+Unit tests for json_log_parser.delta_report module
+"""
+import json
+
+import pytest
+
+from json_log_parser.aggregation_state import AggregationState
+from json_log_parser.delta_report import DeltaReport, ExtensionDelta
+from json_log_parser.exceptions.state_format_error import StateFormatError
+
+
+def test_compare():
+    """
+    Changed, unchanged, new and vanished extensions with their changes
+    """
+    deltas = DeltaReport().compare({'exe': 10, 'pdf': 100, 'txt': 5, 'doc': 4},
+                                   {'exe': 250, 'pdf': 110, 'txt': 5, 'zip': 3})
+
+    assert deltas == [
+        ExtensionDelta('doc', 4, 0, -4, -1.0, 'vanished', True),
+        ExtensionDelta('exe', 10, 250, 240, 24.0, 'changed', True),
+        ExtensionDelta('pdf', 100, 110, 10, 0.1, 'changed', False),
+        ExtensionDelta('txt', 5, 5, 0, 0.0, 'unchanged', False),
+        ExtensionDelta('zip', 0, 3, 3, None, 'new', True),
+    ]
+
+
+def test_compare_thresholds():
+    """
+    An outlier reaches both the absolute and the relative threshold
+    """
+    deltas = DeltaReport(min_change=5, min_relative_change=1.0).compare(
+        {'exe': 2, 'pdf': 100, 'txt': 10}, {'exe': 6, 'pdf': 150, 'txt': 25, 'zip': 4})
+
+    assert DeltaReport.get_outliers(deltas) == [
+        ExtensionDelta('txt', 10, 25, 15, 1.5, 'changed', True)]
+
+
+def test_invalid_thresholds():
+    with pytest.raises(ValueError):
+        DeltaReport(min_change=-1)
+    with pytest.raises(ValueError):
+        DeltaReport(min_relative_change=-0.1)
+
+
+def test_format():
+    """
+    Text report has one line per extension, the JSON report one object per extension
+    """
+    deltas = DeltaReport().compare({'exe': 10, 'doc': 4}, {'exe': 250, 'zip': 3})
+
+    assert DeltaReport.format(deltas) == ('doc: 4 -> 0 (-4, -100.0%, vanished) OUTLIER\n'
+                                          'exe: 10 -> 250 (+240, +2400.0%) OUTLIER\n'
+                                          'zip: 0 -> 3 (+3, new) OUTLIER\n')
+    report = json.loads(DeltaReport.format(deltas, 'json'))
+    assert report[2] == {'extension': 'zip', 'before': 0, 'after': 3, 'change': 3,
+                         'relative_change': None, 'status': 'new', 'outlier': True}
+    with pytest.raises(ValueError):
+        DeltaReport.format(deltas, 'csv')
+
+
+def test_load_extension_counts(tmp_path):
+    """
+    Counts are read from a stored state, invalid files raise StateFormatError
+    """
+    state_file = tmp_path / 'day.state'
+    state_file.write_bytes(AggregationState({'a.exe', 'b.EXE', 'c'}).dumps())
+    corrupt_file = tmp_path / 'corrupt.state'
+    corrupt_file.write_bytes(b'not a state')
+
+    assert DeltaReport.load_extension_counts(str(state_file)) == \
+        {'exe': 1, 'EXE': 1, 'no_extension': 1}
+    with pytest.raises(StateFormatError):
+        DeltaReport.load_extension_counts(str(corrupt_file))
@@ -0,0 +1,49 @@
+"""
+Unit tests for json_log_parser.extension_normalizer module
+"""
+import pytest
+
+from json_log_parser.extension_normalizer import ExtensionNormalizer
+
+
+def test_normalize_lowercase():
+    """
+    Happy path: extension is lowercased
+    """
+    assert ExtensionNormalizer().normalize('PDF') == 'pdf'
+
+
+def test_normalize_keep_case():
+    """
+    Lowercasing can be turned off
+    """
+    assert ExtensionNormalizer(lowercase=False).normalize('PDF') == 'PDF'
+
+
+def test_normalize_max_length():
+    """
+    Extension longer than the maximum is counted as other
+    """
+    normalizer = ExtensionNormalizer(max_length=4)
+
+    assert normalizer.normalize('docx') == 'docx'
+    assert normalizer.normalize('x' * 5) == 'other'
+
+
+def test_normalize_allowed():
+    """
+    Extension not in the allow-list is counted as other
+    """
+    normalizer = ExtensionNormalizer(allowed=['PDF', 'exe'], other='rest')
+
+    assert normalizer.normalize('pdf') == 'pdf'
+    assert normalizer.normalize('EXE') == 'exe'
+    assert normalizer.normalize('txt') == 'rest'
+
+
+def test_normalize_invalid_max_length():
+    """
+    Maximum length must be positive
+    """
+    with pytest.raises(ValueError):
+        ExtensionNormalizer(max_length=0)
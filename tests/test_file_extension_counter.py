@@ -3,7 +3,9 @@ Unit tests for json_log_parser.file_extension_counter module
 """
 import pytest
 
+from json_log_parser.extension_normalizer import ExtensionNormalizer
 from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.string_store import FilenameStore
 
 
 @pytest.fixture(scope="function")
@@ -78,3 +80,64 @@ def test_add_extension_from_filename_empty_string(extension_counter):
     """
     extension_counter.add_extension_from_filename('')
     assert len(extension_counter.file_extension_count.keys()) == 0
+
+
+def test_add_extension_from_filename_with_normalizer():
+    """
+    Extensions are normalized before they are counted.
+    Files without extension are not affected
+    """
+    counter = FileExtensionCounter(ExtensionNormalizer(allowed=['pdf']))
+    for filename in ['a.PDF', 'b.pdf', 'c.txt', 'noextension']:
+        counter.add_extension_from_filename(filename)
+
+    assert counter.file_extension_count == {'pdf': 2, 'other': 1, 'no_extension': 1}
+
+
+def test_add_extensions_from_store():
+    """
+    Extension ids of a FilenameStore are counted and resolved once
+    """
+    store = FilenameStore(FileExtensionCounter.get_no_extension())
+    for filename in ['a.PDF', 'b.pdf', 'c.txt', 'noextension']:
+        store.add(filename)
+
+    counter = FileExtensionCounter(ExtensionNormalizer())
+    counter.add_extensions_from_store(store)
+
+    assert counter.file_extension_count == {'pdf': 2, 'txt': 1, 'no_extension': 1}
+
+
+@pytest.mark.parametrize('filenames', [['', 'a.txt', 'b'], [''], ['a.txt', '', '.', 'b.']])
+def test_add_extensions_from_store_same_as_filenames(filenames):
+    """
+    Counting from a FilenameStore gives the same counts as counting the filenames,
+    an empty filename is skipped in both
+    """
+    store = FilenameStore(FileExtensionCounter.get_no_extension())
+    expected = FileExtensionCounter()
+    for filename in filenames:
+        store.add(filename)
+        expected.add_extension_from_filename(filename)
+
+    counter = FileExtensionCounter()
+    counter.add_extensions_from_store(store)
+
+    assert counter.file_extension_count == expected.file_extension_count
+
+
+def test_disposition_counts():
+    """
+    Every disposition has its own counter with the same normalizer, reported MALICIOUS first
+    """
+    counter = FileExtensionCounter(ExtensionNormalizer())
+    for disposition, filename in [(2, 'a.PDF'), (None, 'b.txt'), (1, 'c.EXE'), (1, 'd.exe'),
+                                  (3, 'e'), (True, 'f.zip')]:
+        disposition_name = FileExtensionCounter.get_disposition_name(disposition)
+        counter.get_disposition_counter(disposition_name).add_extension_from_filename(filename)
+
+    counts = counter.get_disposition_counts()
+    assert list(counts) == ['MALICIOUS', 'CLEAN', 'UNKNOWN', 'no_disposition']
+    assert counts == {'MALICIOUS': {'exe': 2}, 'CLEAN': {'pdf': 1},
+                      'UNKNOWN': {'no_extension': 1}, 'no_disposition': {'txt': 1, 'zip': 1}}
+    assert not counter.get_extension_counts()
@@ -6,7 +6,7 @@ from unittest.mock import patch
 import pytest
 
 from json_log_parser.exceptions.input_filename_error import InputFilenameError
-from json_log_parser.file_reader import FileReader
+from json_log_parser.file_reader import FileReader, OversizedLine
 
 
 def test_read_file_read_existing_file():
@@ -83,3 +83,123 @@ def test_is_input_filename_valid_filename_not_readable(
         FileReader.is_input_filename_valid('/path/to/file')
 
     assert "is not readable" in str(err)
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 7, 64, 1024 * 1024])
+@pytest.mark.parametrize('content', [
+    b'',
+    b'a\nbb\nccc\n',
+    b'a\nbb\nccc',
+    b'\n\na\n\n',
+    b'x' * 5000 + b'\n' + b'y' * 3000,
+    'тест\n\r\n'.encode('utf-8'),
+])
+def test_read_lines_same_lines_as_readline(tmp_path, content, block_size):
+    """
+    Block splitting gives the same lines as readline, for every block size,
+    without a trailing newline, with empty lines and with lines longer than a block
+    """
+    path = tmp_path / 'lines.json'
+    path.write_bytes(content)
+    expected = [line[:-1] if line.endswith(b'\n') else line
+                for line in open(str(path), 'rb').readlines()]
+
+    assert list(FileReader.read_lines(str(path), block_size)) == expected
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 1024])
+def test_read_range_covers_every_line_once(tmp_path, block_size):
+    """
+    Ranges split at every offset cover every line exactly once
+    """
+    content = b'first\n\nthird line\n' + b'z' * 40 + b'\nlast'
+    path = tmp_path / 'lines.json'
+    path.write_bytes(content)
+    expected = content.split(b'\n')
+
+    for split in range(len(content) + 1):
+        lines = list(FileReader.read_range(str(path), 0, split, block_size))
+        lines += list(FileReader.read_range(str(path), split, len(content), block_size))
+        assert lines == expected
+
+
+def test_read_lines_missing_file():
+    """
+    File does not exist, expect InputFilenameError on the first line
+    """
+    with pytest.raises(InputFilenameError):
+        next(FileReader.read_lines('file/does/not/exist'))
+
+
+def test_split_blocks_invalid_block_size(tmp_path):
+    """
+    Raises ValueError
+    """
+    path = tmp_path / 'lines.json'
+    path.write_bytes(b'a\n')
+    with open(str(path), 'rb') as r:
+        with pytest.raises(ValueError):
+            next(FileReader.split_blocks(r, 0))
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 8, 1024])
+def test_read_lines_max_line_length(tmp_path, block_size):
+    """
+    Lines longer than the maximum are returned as empty OversizedLine with their
+    length, shorter lines are unchanged, also when the long line has no newline
+    """
+    path = tmp_path / 'lines.json'
+    path.write_bytes(b'short\n' + b'x' * 50 + b'\nabcdefghij\n' + b'y' * 30)
+
+    lines = list(FileReader.read_lines(str(path), block_size, max_line_length=10))
+
+    assert lines == [b'short', b'', b'abcdefghij', b'']
+    assert [line.length for line in lines if isinstance(line, OversizedLine)] == [50, 30]
+
+
+@pytest.mark.parametrize('block_size', [1, 4, 1024])
+def test_read_range_max_line_length(tmp_path, block_size):
+    """
+    A long line that crosses the end of a range is finished by that range only
+    """
+    content = b'a\n' + b'z' * 40 + b'\nb'
+    path = tmp_path / 'lines.json'
+    path.write_bytes(content)
+
+    for split in range(len(content) + 1):
+        lines = list(FileReader.read_range(str(path), 0, split, block_size, 8))
+        lines += list(FileReader.read_range(str(path), split, len(content), block_size, 8))
+        assert lines == [b'a', b'', b'b']
+        assert isinstance(lines[1], OversizedLine) and lines[1].length == 40
+
+
+def test_read_lines_in_range_max_line_length(tmp_path):
+    """
+    Ranges read line by line return the same OversizedLine as block reads
+    """
+    content = b'a\n' + b'z' * 40 + b'\nb\n' + b'y' * 30
+    path = tmp_path / 'lines.json'
+    path.write_bytes(content)
+
+    with open(str(path), 'rb') as r:
+        lines = list(FileReader.read_lines_in_range(r, 0, len(content), 8))
+
+    assert lines == [b'a\n', b'', b'b\n', b'']
+    assert [line.length for line in lines if isinstance(line, OversizedLine)] == [40, 30]
+
+
+def test_skip_line_in_blocks(tmp_path):
+    """
+    The rest of a long line is skipped in small reads and the file is left
+    at the start of the next line
+    """
+    path = tmp_path / 'lines.json'
+    path.write_bytes(b'x' * 1000 + b'\nnext\nlast')
+
+    with open(str(path), 'rb') as r:
+        assert FileReader.seek_to_line(r, 10) == 1001
+        assert r.readline() == b'next\n'
+        r.seek(10)
+        assert FileReader.skip_line(r, block_size=3) == 991
+        assert r.readline() == b'next\n'
+        assert FileReader.skip_line(r, block_size=3) == 4
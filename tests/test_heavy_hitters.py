@@ -0,0 +1,63 @@
+"""
+Unit tests for json_log_parser.heavy_hitters module
+"""
+from collections import Counter
+
+import pytest
+
+from json_log_parser.heavy_hitters import SpaceSaving, TopKExtensionCounter
+
+
+def test_space_saving_exact_below_capacity():
+    """
+    Happy path: fewer items than capacity, counts are exact
+    """
+    sketch = SpaceSaving(10)
+    for item in ['a', 'b', 'a', 'c', 'a']:
+        sketch.add(item)
+
+    assert sketch.get_top(1) == [('a', 3, 0)]
+    assert sketch.get_top(3)[1:] == [('c', 1, 0), ('b', 1, 0)]
+    assert sketch.get_error_bound() == 0
+
+
+def test_space_saving_bounded_memory_and_error_bounds():
+    """
+    Many junk items and a few heavy hitters. The sketch never tracks more
+    than capacity items and the true count is within the error bounds
+    """
+    stream = ['junk{0}'.format(i) for i in range(5000)]
+    stream += ['pdf'] * 2000 + ['txt'] * 1000
+    # Interleave heavy hitters with junk
+    stream.sort(key=lambda item: hash(item) % 97)
+    truth = Counter(stream)
+
+    sketch = SpaceSaving(50)
+    for item in stream:
+        sketch.add(item)
+
+    assert len(sketch.counts) <= 50
+    top = sketch.get_top(2)
+    assert [item for item, _, _ in top] == ['pdf', 'txt']
+    for item, count, error in top:
+        assert count - error <= truth[item] <= count
+        assert error <= sketch.get_error_bound() <= len(stream) / 50
+
+
+def test_space_saving_invalid_capacity():
+    """
+    Capacity must be positive
+    """
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
+
+
+def test_top_k_extension_counter():
+    """
+    Only the k most frequent extensions are reported
+    """
+    counter = TopKExtensionCounter(2)
+    for filename in ['a.pdf', 'b.pdf', 'c.pdf', 'd.txt', 'e.txt', 'f.exe']:
+        counter.add_extension_from_filename(filename)
+
+    assert counter.get_extension_counts() == {'pdf': 3, 'txt': 2}
@@ -8,6 +8,7 @@ import uuid
 
 import pytest
 
+from json_log_parser.exceptions.schema_config_error import SchemaConfigError
 from json_log_parser.json_schema import JSONSchema
 
 
@@ -97,3 +98,53 @@ def test_sha256_with_sha512_should_not_match(sha_regex):
     """
     sha = hashlib.sha512(b'We need something to hash').hexdigest()
     assert sha_regex.search('0x' + sha) is None
+
+
+def test_load_config():
+    """
+    Happy path: schema, rules and name field are loaded
+    """
+    schema, rules, name_field = JSONSchema.load_config(
+        'tests/data/schema_config_tests/schema_config.json')
+
+    assert schema['required'] == ['time', 'file']
+    assert rules == {'time': 'timestamp', 'dir': 'path', 'file': 'filename'}
+    assert name_field == 'file'
+
+
+def test_load_config_missing_file():
+    """
+    Config file does not exist
+    Raises SchemaConfigError
+    """
+    with pytest.raises(SchemaConfigError):
+        JSONSchema.load_config('file/does/not/exist')
+
+
+def test_load_config_without_schema(tmp_path):
+    """
+    Config file has no schema
+    Raises SchemaConfigError
+    """
+    config = tmp_path / 'config.json'
+    config.write_text('{"rules": {}}')
+    with pytest.raises(SchemaConfigError):
+        JSONSchema.load_config(str(config))
+
+
+@pytest.mark.parametrize('schema', [
+    '{"properties": {"file": {"type": "string"}}}',
+    '{"properties": {"file": {"type": "string"}}, "required": ["time"]}',
+    '{"properties": {"file": {"type": "integer"}}, "required": ["file"]}',
+    '{"required": ["file"]}',
+])
+def test_load_config_name_field_not_required_string(tmp_path, schema):
+    """
+    Config whose name_field is optional or not a string, every valid document
+    must have a filename
+    Raises SchemaConfigError
+    """
+    config = tmp_path / 'config.json'
+    config.write_text('{"schema": ' + schema + ', "name_field": "file"}')
+    with pytest.raises(SchemaConfigError):
+        JSONSchema.load_config(str(config))
@@ -179,3 +179,74 @@ def test_validate_document_null_byte_in_filename(validator, json_document):
         validator.validate_document(json_document)
 
     assert 'Filename contains null bytes' in str(err)
+
+
+def test_validate_document_timestamp_within_clock_skew(json_document):
+    """
+    Timestamp slightly ahead of the clock is accepted within the configured skew
+    """
+    json_document['ts'] = json_document['ts'] + 30
+    assert JSONValidator(clock_skew=60).validate_document(json_document) is None
+
+    with pytest.raises(TimestampError):
+        JSONValidator().validate_document(json_document)
+
+
+def test_validate_document_timestamp_nan(validator, json_document):
+    """
+    NaN is a number for json but not a valid timestamp
+    Raises TimestampError
+    """
+    json_document['ts'] = float('nan')
+    with pytest.raises(TimestampError) as err:
+        validator.validate_document(json_document)
+
+    assert 'timestamp out of range' in str(err)
+
+
+def test_is_valid_timestamp_uses_given_bound():
+    """
+    Upper bound is a plain number of seconds since the epoch
+    """
+    JSONValidator.is_valid_timestamp(100, max_timestamp=100)
+    with pytest.raises(TimestampError):
+        JSONValidator.is_valid_timestamp(101, max_timestamp=100)
+
+
+def test_has_valid_data_same_errors_as_field_checks(validator, json_document):
+    """
+    The inline checks of has_valid_data raise the errors of is_valid_path and
+    is_valid_filename
+    """
+    validator.has_valid_data(json_document)
+    cases = [
+        ('ph', 'a' * 4097, FilePathError, 'File path is longer than 4096 characters'),
+        ('ph', 'find/the\x00/byte', FilePathError, 'File path contains null bytes'),
+        ('nm', 'not/a/filename', FilenameError, "Invalid character '/' in filename"),
+        ('nm', 'thereis\x00byte.pdf', FilenameError, 'Filename contains null bytes'),
+    ]
+    for field, value, error_class, message in cases:
+        document = dict(json_document, **{field: value})
+        with pytest.raises(error_class, match=message):
+            validator.has_valid_data(document)
+        check = JSONValidator.is_valid_path if field == 'ph' else JSONValidator.is_valid_filename
+        with pytest.raises(error_class, match=message):
+            check(value)
+
+
+def test_has_valid_data_path_at_limit(validator, json_document):
+    """
+    A path of exactly 4096 characters is valid
+    """
+    json_document['ph'] = 'a' * 4096
+    validator.has_valid_data(json_document)
+
+
+def test_string_has_null_byte_lone_surrogate():
+    """
+    JSON allows lone surrogates, which cannot be encoded to UTF-8.
+    Checking them does not raise
+    """
+    assert not JSONValidator.string_has_null_byte('bad\ud800name.pdf')
+    assert JSONValidator.string_has_null_byte('bad\ud800\x00name.pdf')
+    JSONValidator.is_valid_filename('bad\ud800name.pdf')
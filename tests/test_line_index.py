@@ -0,0 +1,104 @@
+"""
+Unit tests for json_log_parser.line_index module
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from json_log_parser.exceptions.line_index_error import LineIndexError
+from json_log_parser.file_reader import FileReader
+from json_log_parser.line_index import LineIndex, LineIndexBuilder
+from json_log_parser.log_parser import LogParser
+from json_log_parser.log_record import LogRecord
+
+
+@pytest.fixture(scope='function')
+def indexed_log(log_file, tmp_path):
+    """
+    log_file with an invalid line, indexed in small blocks so the index has many entries
+    """
+    with open(log_file, 'a') as w:
+        w.write('not json\n')
+    index_filename = str(tmp_path / 'log.idx')
+    LogParser(line_index_filename=index_filename).get_indexed_unique_file_set(
+        log_file, block_size=4096)
+    return log_file, index_filename
+
+
+def test_index_has_many_blocks(indexed_log):
+    """
+    Every block read is an index entry, together they cover every line
+    """
+    log_file, index_filename = indexed_log
+    line_index = LineIndex.load(log_file, index_filename)
+
+    assert len(line_index.blocks) > 10
+    assert sum(block[2] for block in line_index.blocks) == 1001
+
+
+def test_get_line(indexed_log):
+    """
+    Any line is read through its block, the same as reading the file to it
+    """
+    log_file, index_filename = indexed_log
+    line_index = LineIndex.load(log_file, index_filename)
+    lines = list(FileReader.read_lines(log_file))
+
+    for line_number in (0, 1, 37, 500, 999, 1000):
+        assert line_index.get_line(line_number) == lines[line_number]
+    with pytest.raises(IndexError):
+        line_index.get_line(1001)
+
+
+def test_find_reads_only_matching_blocks(tmp_path):
+    """
+    Blocks whose extensions or time range cannot match are skipped
+    """
+    lines = [b'{"nm": "a.pdf", "ts": 10}', b'{"nm": "b.exe", "ts": 20}',
+             b'{"nm": "c.pdf", "ts": 30}']
+    log_file = tmp_path / 'log.json'
+    log_file.write_bytes(b'\n'.join(lines) + b'\n')
+    builder = LineIndexBuilder('ts', 'nm')
+    for batch in builder.track([[line] for line in lines]):
+        document = json.loads(batch[0])
+        builder.add_record(LogRecord(document['nm'], document['ts']))
+    builder.write(str(tmp_path / 'log.idx'), str(log_file))
+    line_index = LineIndex.load(str(log_file), str(tmp_path / 'log.idx'))
+
+    with patch.object(line_index, 'read_blocks', wraps=line_index.read_blocks) as read_blocks:
+        assert [number for number, _ in line_index.find_extension('exe')] == [1]
+        assert [number for number, _ in line_index.find_time_range(15, 30)] == [1, 2]
+
+    assert [call.args[0] for call in read_blocks.call_args_list] == [[1], [1], [2]]
+
+
+def test_find_time_range(indexed_log):
+    """
+    Every valid line of the time range is found
+    """
+    log_file, index_filename = indexed_log
+    line_index = LineIndex.load(log_file, index_filename)
+
+    assert len(list(line_index.find_time_range(0, 2 ** 40))) == 1000
+    assert list(line_index.find_time_range(0, 1)) == []
+
+
+def test_load_changed_log(indexed_log):
+    """
+    The log was appended to after the index was written
+    Raises LineIndexError
+    """
+    log_file, index_filename = indexed_log
+    with open(log_file, 'a') as w:
+        w.write('more\n')
+    with pytest.raises(LineIndexError):
+        LineIndex.load(log_file, index_filename)
+
+
+def test_load_missing_index(log_file):
+    """
+    Raises LineIndexError
+    """
+    with pytest.raises(LineIndexError):
+        LineIndex.load(log_file)
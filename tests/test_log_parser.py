@@ -1,6 +1,7 @@
 """
 Unit tests for json_log_parser.log_parser module
 """
+import pickle
 import sys
 from contextlib import contextmanager
 from io import StringIO
@@ -12,6 +13,12 @@ from json_log_parser.exceptions.json_format_error import JSONFormatError
 from json_log_parser.exceptions.json_schema_error import JSONSchemaError
 from json_log_parser.file_reader import FileReader
 from json_log_parser.log_parser import LogParser
+from json_log_parser.log_record import LogRecord
+from json_log_parser.record_filter import RecordFilter
+from json_log_parser.resource_guard import ResourceGuard
+from json_log_parser.result_formatter import ResultFormatter
+from json_log_parser.seen_filter import SeenFilter
+from json_log_parser.spilling_set import SpillingSet
 
 
 @pytest.fixture(scope='function')
@@ -35,6 +42,30 @@ def test_get_unique_file_set(parser):
     assert 'file3.txt' in unique_files
 
 
+def test_get_unique_file_set_with_record_filter():
+    """
+    Only records that match the filter are added to the set
+    """
+    log_parser = LogParser(record_filter=RecordFilter().add_prefix('nm', 'file2'))
+    line_generator = FileReader.read_file('tests/data/log_parser_tests/log_parser.json')
+    unique_files = log_parser.get_unique_file_set(line_generator)
+
+    assert unique_files == {'file2.pdf'}
+
+
+def test_get_unique_file_set_compact_strings():
+    """
+    Compact string store gives the same results as the set
+    """
+    log_parser = LogParser(compact_strings=True)
+    line_generator = FileReader.read_file('tests/data/log_parser_tests/log_parser.json')
+    unique_files = log_parser.get_unique_file_set(line_generator)
+
+    assert len(unique_files) == 3
+    assert 'file2.pdf' in unique_files
+    assert log_parser.count_file_extensions(unique_files) == {'ext': 1, 'pdf': 1, 'txt': 1}
+
+
 def test_get_json_document_loads_document(parser):
     """
     Happy path: load a well formed JSON string
@@ -159,7 +190,7 @@ def test_process_log_runtime_error_validate_output(mock_file_reader, parser):
     """
     In the event of an error that we did not expect we should still exit gracefully
     """
-    mock_file_reader.read_file.side_effect = RuntimeError('Crash')
+    mock_file_reader.read_lines.side_effect = RuntimeError('Crash')
     with captured_output() as (out, err):
         parser.process_log('something')
 
@@ -167,6 +198,42 @@ def test_process_log_runtime_error_validate_output(mock_file_reader, parser):
     assert 'LogParser encountered unexpected error' in output
 
 
+def test_process_log_top_k_output():
+    """
+    Top k mode prints the most frequent extensions with their error bound
+    """
+    log_parser = LogParser(top_k=2)
+    with captured_output() as (out, err):
+        log_parser.process_log('tests/data/log_parser_tests/log_parser.json')
+
+    output = out.getvalue().strip().split('\n')
+    assert len(output) == 2
+    assert all(line.endswith('(error <= 0)') for line in output)
+
+
+def test_sample_log_block_mode_full_rate(parser):
+    """
+    Sampling every block gives exact counts
+    """
+    with captured_output() as (out, err):
+        estimates = parser.sample_log('tests/data/log_parser_tests/log_parser.json', 1,
+                                      mode='block', block_size=100)
+
+    assert {key: value.estimate for key, value in estimates.items()} == \
+        {'ext': 1, 'pdf': 1, 'txt': 1}
+    assert 'pdf: ~1 (95% CI 1-1, sampled 1)' in out.getvalue()
+
+
+def test_sample_log_unknown_mode(parser):
+    """
+    Unknown sampling mode prints an error
+    """
+    with captured_output() as (out, err):
+        parser.sample_log('tests/data/log_parser_tests/log_parser.json', 1, mode='nope')
+
+    assert "Unknown sampling mode 'nope'" in out.getvalue()
+
+
 def test_process_log_file_does_not_exist(parser):
     """
     The given input file does not exist
@@ -177,3 +244,277 @@ def test_process_log_file_does_not_exist(parser):
 
     output = out.getvalue().strip()
     assert 'does not exist' in output
+
+
+def test_parse_log_with_memory_budget(log_file, tmp_path):
+    """
+    Counts with a tiny memory budget are the same as without
+    """
+    log_parser = LogParser(memory_budget=4096, spill_dir=str(tmp_path))
+
+    assert log_parser.parse_log(log_file) == LogParser().parse_log(log_file)
+    assert log_parser.parse_log(log_file) == {'pdf': 500, 'txt': 500}
+
+
+def test_parse_log_invalid_utf8_line(log_file):
+    """
+    A line that is not UTF-8 is counted as invalid instead of stopping the run
+    """
+    with open(log_file, 'ab') as w:
+        w.write(b'{"nm": "\xff\xfe.pdf"}\n')
+    log_parser = LogParser()
+
+    assert log_parser.parse_log(log_file) == {'pdf': 500, 'txt': 500}
+    assert log_parser.processing_stats['fail'] == 1
+
+
+def test_parse_log_line_too_long(log_file):
+    """
+    A line over the maximum length is skipped and counted as its own error
+    """
+    with open(log_file, 'a') as w:
+        w.write('{"nm": "' + 'x' * 5000 + '.pdf"}\n')
+    log_parser = LogParser(max_line_length=4096)
+
+    assert log_parser.parse_log(log_file) == {'pdf': 500, 'txt': 500}
+    assert log_parser.processing_stats['fail'] == 1
+    assert log_parser.exception_stats == {'LineTooLongError-Line is longer than 4096 bytes': 1}
+
+
+def test_parse_log_line_limit_truncates(log_file):
+    """
+    Reading stops at the line budget and the results are flagged as partial
+    """
+    log_parser = LogParser(resource_guard=ResourceGuard(max_lines=100, check_interval=30))
+
+    assert log_parser.parse_log(log_file) == {'pdf': 50, 'txt': 50}
+    assert log_parser.processing_stats['total'] == 100
+    assert log_parser.processing_stats['truncated'] == 1
+    assert 'line limit' in log_parser.truncation_reason
+
+
+def test_parse_log_line_limit_at_end_of_file(log_file):
+    """
+    A line budget that ends exactly at the end of the file does not truncate
+    """
+    log_parser = LogParser(resource_guard=ResourceGuard(max_lines=1000, check_interval=100))
+
+    assert log_parser.parse_log(log_file) == {'pdf': 500, 'txt': 500}
+    assert 'truncated' not in log_parser.processing_stats
+    assert log_parser.truncation_reason is None
+
+
+@patch('json_log_parser.resource_guard.ResourceGuard.get_rss', return_value=950)
+def test_get_unique_file_set_spills_when_memory_is_low(mock_get_rss, log_file, tmp_path):
+    """
+    Close to the memory limit the filenames move to a SpillingSet and counts stay exact
+    """
+    log_parser = LogParser(spill_dir=str(tmp_path),
+                           resource_guard=ResourceGuard(memory_limit=1000, check_interval=100))
+
+    unique_files = log_parser.get_unique_file_set(FileReader.read_lines(log_file))
+
+    assert isinstance(unique_files, SpillingSet)
+    assert log_parser.count_file_extensions(unique_files) == {'pdf': 500, 'txt': 500}
+    assert log_parser.truncation_reason is None
+
+
+def test_process_log_prints_truncation_notice(log_file):
+    """
+    Partial results are reported on stderr, the report itself is unchanged
+    """
+    log_parser = LogParser(resource_guard=ResourceGuard(max_lines=10))
+    with captured_output() as (out, err):
+        log_parser.process_log(log_file)
+
+    assert out.getvalue() == 'pdf: 5\ntxt: 5\n'
+    assert err.getvalue() == 'Results are partial: line limit of 10 lines reached\n'
+
+
+def test_parse_log_compact_strings_empty_name(empty_name_log_file):
+    """
+    An empty filename is skipped with compact strings, as it is with a set
+    """
+    assert LogParser(compact_strings=True).parse_log(empty_name_log_file) == \
+        LogParser().parse_log(empty_name_log_file) == {'pdf': 500, 'txt': 500}
+
+
+def test_build_state_with_memory_budget(log_file, tmp_path):
+    """
+    A state keeps its filenames in memory, so a memory budget is not supported
+    Raises ValueError
+    """
+    log_parser = LogParser(memory_budget=4096, spill_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        log_parser.build_state(log_file)
+    with pytest.raises(ValueError):
+        log_parser.build_range_state(log_file, 0, 100)
+
+
+def test_top_k_and_estimates_written_to_output_stream(log_file):
+    """
+    Top extensions and sampled estimates go to the output stream, not stdout
+    """
+    top_k_stream = StringIO()
+    estimates_stream = StringIO()
+    with captured_output() as (out, err):
+        LogParser(top_k=1, output_stream=top_k_stream).process_log(log_file)
+        LogParser(output_stream=estimates_stream).sample_log(log_file, 1.0)
+
+    assert out.getvalue() == ''
+    assert top_k_stream.getvalue().endswith(': 500 (error <= 0)\n')
+    assert estimates_stream.getvalue().startswith('pdf: ~500 (95% CI 500-500, sampled 500)\n')
+
+
+def test_top_k_and_estimates_only_as_text(log_file):
+    """
+    Only the exact report supports other formats
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        LogParser(top_k=1, result_formatter=ResultFormatter('json'))
+    with pytest.raises(ValueError):
+        LogParser(result_formatter=ResultFormatter('csv')).sample_log(log_file, 0.5)
+
+
+def test_process_log_new_and_seen_filenames(log_file, tmp_path):
+    """
+    The second run over the same log finds only seen filenames
+    """
+    seen_filter = SeenFilter.open(str(tmp_path / 'seen.bloom'))
+    first = StringIO()
+    second = StringIO()
+    LogParser(seen_filter=seen_filter, output_stream=first).process_log(log_file)
+    LogParser(seen_filter=seen_filter, output_stream=second).process_log(log_file)
+    seen_filter.close()
+
+    assert first.getvalue() == 'pdf: 500 (new 500, seen 0)\ntxt: 500 (new 500, seen 0)\n'
+    assert second.getvalue() == 'pdf: 500 (new 0, seen 500)\ntxt: 500 (new 0, seen 500)\n'
+
+
+def test_pickle_drops_output_stream_and_seen_filter(tmp_path):
+    """
+    A parser sent to worker processes leaves its stream and seen filter behind
+    """
+    seen_filter = SeenFilter.open(str(tmp_path / 'seen.bloom'))
+    log_parser = pickle.loads(pickle.dumps(LogParser(output_stream=StringIO(),
+                                                     seen_filter=seen_filter)))
+    seen_filter.close()
+
+    assert log_parser.output_stream is None
+    assert log_parser.seen_filter is None
+
+
+def test_parse_log_partitioned_by_tenant(log_file, tmp_path):
+    """
+    Extensions are counted per bg in one pass, also when tenants are spilled
+    """
+    with open(log_file) as r:
+        line = r.readline().replace('"bg":"77e28e28', '"bg":"00000000')
+    with open(log_file, 'a') as w:
+        w.write(line.replace('"nm":"file0.txt"', '"nm":"file1.pdf"'))
+        w.write(line.replace('"nm":"file0.txt"', '"nm":"file2.exe"'))
+    tenant = '77e28e28-745a-474b-a496-3c0e086eaec0'
+    other = '00000000-745a-474b-a496-3c0e086eaec0'
+    expected = {tenant: {'pdf': 500, 'txt': 500}, other: {'pdf': 1, 'exe': 1}}
+
+    assert LogParser(partition_field='bg').parse_log(log_file) == expected
+    assert LogParser(partition_field='bg', memory_budget=4096,
+                     spill_dir=str(tmp_path)).parse_log(log_file) == expected
+
+    output = StringIO()
+    LogParser(partition_field='bg', output_stream=output).process_log(log_file)
+    assert output.getvalue() == '{0}:\n  exe: 1\n  pdf: 1\n{1}:\n  pdf: 500\n  txt: 500\n'.format(
+        other, tenant)
+
+
+def test_partition_field_unsupported_combinations(log_file):
+    """
+    Partitioned counts are text only and have no aggregation state
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        LogParser(partition_field='bg', result_formatter=ResultFormatter('json'))
+    with pytest.raises(ValueError):
+        LogParser(partition_field='bg', top_k=2)
+    with pytest.raises(ValueError):
+        LogParser(partition_field='bg').build_state(log_file)
+
+
+def write_disposition_log(log_file):
+    """
+    Add lines with every disposition and without one to the log of log_file
+    """
+    with open(log_file) as r:
+        line = r.readline()
+    with open(log_file, 'a') as w:
+        for filename, disposition in [('file1.pdf', '1'), ('evil.exe', '1'), ('evil.exe', '2'),
+                                      ('other.exe', '3'), ('file3.pdf', None)]:
+            replaced = line.replace('"nm":"file0.txt"', '"nm":"{0}"'.format(filename))
+            if disposition is None:
+                replaced = replaced.replace(',"dp":2', '')
+            w.write(replaced.replace('"dp":2', '"dp":' + str(disposition)))
+
+
+def test_parse_log_split_by_disposition(log_file, tmp_path):
+    """
+    The extensions of every disposition are counted in the same pass as all lines.
+    A filename with two dispositions is counted in both
+    """
+    write_disposition_log(log_file)
+    expected = {'MALICIOUS': {'pdf': 1, 'exe': 1}, 'CLEAN': {'pdf': 500, 'txt': 500, 'exe': 1},
+                'UNKNOWN': {'exe': 1}, 'no_disposition': {'pdf': 1},
+                'all': {'pdf': 500, 'txt': 500, 'exe': 2}}
+
+    assert LogParser(disposition_mode='split').parse_log(log_file) == expected
+    assert LogParser(disposition_mode='split', memory_budget=4096,
+                     spill_dir=str(tmp_path)).parse_log(log_file) == expected
+    assert LogParser(disposition_mode='split', compact_strings=True).parse_log(
+        log_file) == expected
+
+
+def test_process_log_malicious_first(log_file):
+    """
+    Priority mode only keeps MALICIOUS apart and reports it before all lines
+    """
+    write_disposition_log(log_file)
+    output = StringIO()
+    LogParser(disposition_mode='priority', output_stream=output,
+              result_formatter=ResultFormatter(sort_by='count', limit=2)).process_log(log_file)
+
+    assert output.getvalue() == 'MALICIOUS:\n  exe: 1\n  pdf: 1\nall:\n  pdf: 500\n  txt: 500\n'
+    assert LogParser(disposition_mode='priority').parse_log(log_file) == {
+        'MALICIOUS': {'pdf': 1, 'exe': 1}, 'all': {'pdf': 500, 'txt': 500, 'exe': 2}}
+
+
+def test_disposition_mode_unsupported_combinations(log_file):
+    """
+    Disposition counts are text only, not partitioned by a field and have no
+    aggregation state
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        LogParser(disposition_mode='malicious')
+    with pytest.raises(ValueError):
+        LogParser(disposition_mode='split', result_formatter=ResultFormatter('json'))
+    with pytest.raises(ValueError):
+        LogParser(disposition_mode='priority', partition_field='bg')
+    with pytest.raises(ValueError):
+        LogParser(disposition_mode='priority').build_state(log_file)
+
+
+def test_get_log_record_keeps_only_used_fields(log_file):
+    """
+    The record of a valid line holds the filename, timestamp and partition value
+    """
+    with open(log_file, 'rb') as r:
+        line = r.readline().rstrip(b'\n')
+
+    record = LogParser().get_log_record(line)
+    assert record == LogRecord('file0.txt', 1551140352)
+    assert not hasattr(record, '__dict__')
+    assert LogParser(partition_field='bg').get_log_record(line).partition == \
+        '77e28e28-745a-474b-a496-3c0e086eaec0'
+    assert LogParser(disposition_mode='split').get_log_record(line).partition == 2
+    assert LogParser(record_filter=RecordFilter().add_prefix('nm', 'other')).get_log_record(
+        line) is None
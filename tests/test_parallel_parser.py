@@ -0,0 +1,119 @@
+"""
+Unit tests for json_log_parser.parallel_parser module
+"""
+from unittest.mock import patch
+
+import pytest
+
+from json_log_parser.exceptions.input_filename_error import InputFilenameError
+from json_log_parser.log_parser import LogParser
+from json_log_parser.parallel_parser import ParallelLogParser
+
+
+@pytest.mark.parametrize('transport', ['shared_memory', 'pickle'])
+def test_parallel_state_matches_serial(log_file, transport):
+    """
+    Batches processed by a pool give the same state as a serial run
+    """
+    with open(log_file, 'a') as w:
+        w.write('not json\n' * 10)
+    log_parser = LogParser()
+    serial_state = log_parser.build_state(log_file)
+    parallel_parser = ParallelLogParser(log_parser, workers=2, batch_size=10000,
+                                        block_size=4096, transport=transport)
+
+    parallel_state = parallel_parser.build_state(log_file)
+
+    assert parallel_state == serial_state
+    assert log_parser.count_file_extensions(parallel_state.unique_files) == \
+        log_parser.count_file_extensions(serial_state.unique_files)
+
+
+def test_parallel_counts_with_empty_name(empty_name_log_file):
+    """
+    Both transports report the same counts as a serial run when a filename is empty
+    """
+    log_parser = LogParser()
+    counts = [log_parser.count_file_extensions(
+        ParallelLogParser(log_parser, workers=2, batch_size=10000, block_size=4096,
+                          transport=transport).build_state(empty_name_log_file).unique_files)
+        for transport in ('shared_memory', 'pickle')]
+
+    assert counts == [log_parser.parse_log(empty_name_log_file)] * 2
+    assert counts[0] == {'pdf': 500, 'txt': 500}
+
+
+def test_thread_pool_state_matches_serial(log_file):
+    """
+    Batches processed by a thread pool give the same state as a serial run,
+    with every thread merging its own batches first
+    """
+    with open(log_file, 'a') as w:
+        w.write('not json\n' * 10)
+    log_parser = LogParser(compact_strings=True)
+    serial_state = log_parser.build_state(log_file)
+    parallel_parser = ParallelLogParser(log_parser, workers=3, batch_size=10000,
+                                        block_size=4096, executor='thread')
+
+    with patch.object(LogParser, 'build_range_state', autospec=True,
+                      side_effect=LogParser.build_range_state) as build_range_state:
+        parallel_state = parallel_parser.build_state(log_file)
+
+    assert build_range_state.call_count > 3
+    assert all(call.args[0] is not log_parser for call in build_range_state.call_args_list)
+    assert parallel_state == serial_state
+
+
+@pytest.mark.parametrize('gil_enabled, max_workers', [(True, 1), (False, 8)])
+def test_thread_tuner_follows_the_gil(gil_enabled, max_workers):
+    """
+    With the GIL, threads would not decode lines in parallel and a single worker is planned
+    """
+    with patch.object(ParallelLogParser, 'is_gil_enabled', return_value=gil_enabled), \
+            patch('os.cpu_count', return_value=8):
+        parallel_parser = ParallelLogParser(executor='thread')
+
+    assert parallel_parser.tuner.max_workers == max_workers
+
+
+def test_unknown_executor():
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ParallelLogParser(executor='fiber')
+
+
+def test_unknown_transport():
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ParallelLogParser(transport='pipe')
+
+
+def test_memory_budget_not_supported():
+    """
+    The merged filenames are kept in memory, a memory budget would be ignored
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ParallelLogParser(LogParser(memory_budget=4096))
+
+
+def test_tuned_small_file(log_file, capsys):
+    """
+    Happy path: small file is processed serially and reported
+    """
+    ParallelLogParser().process_log(log_file)
+
+    assert capsys.readouterr().out == 'pdf: 500\ntxt: 500\n'
+
+
+def test_missing_file():
+    """
+    Input file does not exist
+    Raises InputFilenameError
+    """
+    with pytest.raises(InputFilenameError):
+        ParallelLogParser().build_state('file/does/not/exist')
@@ -0,0 +1,86 @@
+"""
+Unit tests for json_log_parser.parser_service module
+"""
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from json_log_parser.parser_service import ParserService
+
+RUN_JOB = ParserService.run_job
+
+
+def test_parse_request():
+    """
+    Happy path: request has an id and a path
+    """
+    assert ParserService.parse_request('{"id": 7, "path": "a.json"}') == (7, 'a.json')
+
+
+def test_parse_request_missing_path():
+    """
+    Request without a path raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ParserService.parse_request('{"id": 7}')
+
+
+def test_run_job():
+    """
+    Job returns extensions, line stats and used resources
+    """
+    result = ParserService.run_job('tests/data/log_parser_tests/log_parser.json')
+
+    assert result['extensions'] == {'ext': 1, 'pdf': 1, 'txt': 1}
+    assert result['stats']['total'] == 5
+    assert result['stats']['fail'] == 2
+    assert set(result['resources']) == {'wall_time', 'cpu_time', 'max_rss_kb'}
+
+
+def test_serve():
+    """
+    Every request gets a result. Invalid requests and failed jobs get an error
+    """
+    requests = StringIO('{"id": "ok", "path": "tests/data/log_parser_tests/log_parser.json"}\n'
+                        '\n'
+                        '{"id": "missing", "path": "file/does/not/exist"}\n'
+                        'not json\n')
+    output = StringIO()
+    ParserService(workers=1, max_pending=1).serve(requests, output)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    by_id = {result['id']: result for result in results}
+    assert len(results) == 3
+    assert by_id['ok']['status'] == 'ok'
+    assert by_id['ok']['extensions'] == {'ext': 1, 'pdf': 1, 'txt': 1}
+    assert by_id['missing']['status'] == 'error'
+    assert 'does not exist' in by_id['missing']['error']
+    assert by_id[None]['status'] == 'error'
+
+
+def run_job_or_exit(path):
+    """
+    Worker process dies on the 'crash' path, like a worker killed for its memory use
+    """
+    if path == 'crash':
+        os._exit(1)
+    return RUN_JOB(path)
+
+
+def test_serve_survives_dead_worker():
+    """
+    A job whose worker dies gets an error, the service starts a new pool for the next job
+    """
+    requests = StringIO('{"id": "crash", "path": "crash"}\n'
+                        '{"id": "ok", "path": "tests/data/log_parser_tests/log_parser.json"}\n')
+    output = StringIO()
+    with patch.object(ParserService, 'run_job', run_job_or_exit):
+        ParserService(workers=1, max_pending=1).serve(requests, output)
+
+    by_id = {result['id']: result for result in map(json.loads, output.getvalue().splitlines())}
+    assert by_id['crash']['status'] == 'error'
+    assert by_id['ok']['status'] == 'ok'
+    assert by_id['ok']['extensions'] == {'ext': 1, 'pdf': 1, 'txt': 1}
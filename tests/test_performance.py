@@ -0,0 +1,185 @@
+"""
+Performance regression tests
+
+Every case runs on a generated log of fixed size and content. It records the
+lines per second and the peak memory allocated while it runs, measured with
+tracemalloc, and fails when they are worse than the committed baseline in
+tests/data/perf_baseline.json by more than the thresholds in that file.
+
+Run them with pytest --perf tests/test_performance.py, or make perf.
+After an intended change write a new baseline with --perf-update-baseline.
+
+Speed is compared as the time of a case divided by the time of a fixed
+calibration workload measured in the same process, so the baseline holds on
+a faster or slower machine. Allocations are only compared on the Python
+version the baseline was written with
+"""
+import json
+import platform
+import time
+import tracemalloc
+
+import pytest
+
+from json_log_parser.file_extension_counter import FileExtensionCounter
+from json_log_parser.file_reader import FileReader
+from json_log_parser.json_validator import JSONValidator
+from json_log_parser.log_parser import LogParser
+
+REPEAT = 5
+CALIBRATION_LINE = '{"ts":1551140352,"nm":"file1.pdf","ph":"/efvrfutgp/expgh/phkkrw","dp":2}'
+
+pytestmark = pytest.mark.perf
+
+
+def calibrate():
+    """
+    Fixed pure Python workload the cases are timed against
+    """
+    counts = {}
+    for i in range(2000):
+        document = json.loads(CALIBRATION_LINE)
+        extension = document['nm'].rsplit('.', 1)[-1].lower()
+        counts[extension] = counts.get(extension, 0) + i
+
+
+def get_python_version():
+    return '.'.join(platform.python_version_tuple()[:2])
+
+
+def measure(run):
+    """
+    Time run and the calibration workload alternately and measure the peak
+    allocation of a single run
+    :return: (best seconds of run, best seconds of the calibration, peak bytes)
+    """
+    run()
+    seconds = []
+    calibration = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        calibrate()
+        calibration.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), min(calibration), peak
+
+
+def check_performance(request, perf_baseline, name, run, lines):
+    """
+    Measure a case and compare it with its baseline, or record it as the
+    baseline with --perf-update-baseline
+    :param name: key of the case in the baseline
+    :param run: function running the case once
+    :param lines: number of lines one run processes
+    """
+    seconds, calibration, peak = measure(run)
+    result = {'lines_per_second': round(lines / seconds),
+              'relative_time': round(seconds / calibration, 3),
+              'peak_bytes': peak}
+    if request.config.getoption('--perf-update-baseline'):
+        perf_baseline['python'] = get_python_version()
+        perf_baseline['cases'][name] = result
+        return
+
+    expected = perf_baseline['cases'].get(name)
+    if expected is None:
+        pytest.fail("No baseline for '{0}', run with --perf-update-baseline".format(name))
+
+    thresholds = perf_baseline['thresholds']
+    failures = []
+    if result['relative_time'] > expected['relative_time'] * (1 + thresholds['speed']):
+        failures.append('speed: {0} times the calibration time, baseline {1} ({2} lines/s)'
+                        .format(result['relative_time'], expected['relative_time'],
+                                result['lines_per_second']))
+    # Small peaks vary by a few allocations, so they get an absolute slack too
+    peak_limit = max(expected['peak_bytes'] * (1 + thresholds['allocations']),
+                     expected['peak_bytes'] + thresholds['allocation_slack_bytes'])
+    if perf_baseline.get('python') == get_python_version() and result['peak_bytes'] > peak_limit:
+        failures.append('allocations: peak {0} bytes, baseline {1} bytes'.format(
+            result['peak_bytes'], expected['peak_bytes']))
+    assert not failures, "'{0}' regressed: {1}".format(name, '; '.join(failures))
+
+
+def count_lines(filename):
+    with open(filename, 'rb') as r:
+        return sum(1 for _ in r)
+
+
+def test_perf_log_parser(request, perf_baseline, perf_log_file):
+    """
+    Whole pipeline: read, decode, validate, deduplicate and count
+    """
+    def run():
+        assert LogParser().parse_log(perf_log_file)
+
+    check_performance(request, perf_baseline, 'log_parser', run, count_lines(perf_log_file))
+
+
+def test_perf_validate_document(request, perf_baseline, perf_log_file):
+    """
+    Schema and data validation of decoded documents
+    """
+    documents = [json.loads(line) for line in FileReader.read_file(perf_log_file)
+                 if line.startswith('{')]
+    validator = JSONValidator()
+
+    def run():
+        validate_document = validator.validate_document
+        for document in documents:
+            validate_document(document)
+
+    check_performance(request, perf_baseline, 'validate_document', run, len(documents))
+
+
+def test_perf_log_record(request, perf_baseline, perf_log_file):
+    """
+    Decoding and validating a line into a LogRecord. Nothing is kept, so the
+    peak is what a single line needs
+    """
+    lines = [line for line in FileReader.read_lines(perf_log_file) if line.startswith(b'{')]
+    log_parser = LogParser()
+    log_parser.json_validator.refresh_clock()
+
+    def run():
+        get_log_record = log_parser.get_log_record
+        for line in lines:
+            get_log_record(line)
+
+    check_performance(request, perf_baseline, 'log_record', run, len(lines))
+
+
+def test_perf_read_file(request, perf_baseline, perf_log_file):
+    """
+    Reading the log line by line
+    """
+    def run():
+        for _ in FileReader.read_file(perf_log_file):
+            pass
+
+    check_performance(request, perf_baseline, 'read_file', run, count_lines(perf_log_file))
+
+
+def test_perf_file_extension_counter(request, perf_baseline, perf_log_file):
+    """
+    Parsing and counting the extensions of unique filenames
+    """
+    filenames = [json.loads(line)['nm'] for line in FileReader.read_file(perf_log_file)
+                 if line.startswith('{')]
+
+    def run():
+        counter = FileExtensionCounter()
+        for filename in filenames:
+            counter.add_extension_from_filename(filename)
+        assert counter.get_extension_counts()
+
+    check_performance(request, perf_baseline, 'file_extension_counter', run, len(filenames))
@@ -0,0 +1,81 @@
+"""
+Unit tests for json_log_parser.progress_reporter module
+"""
+import os
+import pickle
+import time
+from io import StringIO
+
+import pytest
+
+from json_log_parser.log_parser import LogParser
+from json_log_parser.progress_reporter import Progress, ProgressReporter
+
+
+def test_final_progress_of_a_run(empty_name_log_file):
+    """
+    The last report covers the whole file
+    """
+    reports = []
+    log_parser = LogParser(progress_reporter=ProgressReporter(reports.append, interval=60),
+                           output_stream=StringIO())
+    log_parser.process_log(empty_name_log_file)
+
+    progress = reports[-1]
+    size = os.path.getsize(empty_name_log_file)
+    assert (progress.bytes_read, progress.total_bytes, progress.lines) == (size, size, 1001)
+    assert (progress.valid, progress.invalid, progress.unique_files) == (1001, 0, 1001)
+    assert progress.valid_ratio == 1
+    assert progress.eta == 0
+
+
+def test_timer_thread_reports_while_running():
+    """
+    Reports are made every interval, not per line
+    """
+    reports = []
+    reporter = ProgressReporter(reports.append, interval=0.01)
+    reporter.start()
+    reporter.watch({'total': 3, 'success': 1, 'fail': 2}, set())
+    time.sleep(0.1)
+    reporter.stop()
+
+    assert len(reports) >= 3
+    assert reports[-1].valid_ratio == pytest.approx(1 / 3)
+    assert reports[-1].eta is None
+    reporter.stop()
+
+
+def test_status_line(log_file):
+    """
+    The status line overwrites itself and ends with a newline
+    """
+    status_stream = StringIO()
+    LogParser(progress_reporter=ProgressReporter(interval=60, status_stream=status_stream),
+              output_stream=StringIO()).parse_log(log_file)
+
+    status = status_stream.getvalue()
+    assert status.startswith('\r100.0% of 0.3 MB')
+    assert status.endswith(', 100.0% valid, 1000 unique, ETA 0s\n')
+
+
+def test_format_status_without_size():
+    """
+    Unknown values are shown as placeholders
+    """
+    progress = Progress(2000000, None, 10, 0, 0, None, 1.0, 2000000.0, 10.0, None, None)
+    assert ProgressReporter.format_status(progress) == \
+        '2.0 MB, 2.0 MB/s, 10 lines/s, - valid, ? unique, ETA -'
+
+
+def test_pickle_drops_progress_reporter():
+    """
+    The timer thread stays in the process that started it
+    """
+    log_parser = pickle.loads(pickle.dumps(LogParser(progress_reporter=ProgressReporter())))
+    assert log_parser.progress_reporter is None
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        ProgressReporter(interval=0)
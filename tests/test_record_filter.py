@@ -0,0 +1,123 @@
+"""
+Unit tests for json_log_parser.record_filter module
+"""
+import json
+
+import pytest
+
+from json_log_parser.record_filter import RecordFilter
+
+BUSINESS = '77e28e28-745a-474b-a496-3c0e086eaec0'
+
+
+def get_line(bg=BUSINESS, dp='2', nm='phkkrw.ext'):
+    """
+    Build a raw log line with the given values
+    """
+    return '{"ts":1551140352,"pt":55,"bg":"' + bg + '","nm":"' + nm + '","dp":' + dp + '}\n'
+
+
+def test_might_match_equals_string():
+    """
+    Happy path: raw line contains the expected business UUID
+    """
+    record_filter = RecordFilter().add_equals('bg', BUSINESS)
+
+    assert record_filter.might_match(get_line())
+    assert not record_filter.might_match(get_line(bg='3380fb19-0bdb-46ab-8781-e4c5cd448074'))
+
+
+def test_might_match_bytes_line():
+    """
+    Raw lines can be bytes as well as str
+    """
+    record_filter = RecordFilter().add_equals('bg', BUSINESS)
+
+    assert record_filter.might_match(get_line().encode('utf-8'))
+    assert not record_filter.might_match(get_line(bg='other').encode('utf-8'))
+
+
+def test_might_match_equals_integer():
+    """
+    Integer predicate must not match other numbers that start with the same digit
+    """
+    record_filter = RecordFilter().add_equals('dp', 1)
+
+    assert record_filter.might_match(get_line(dp='1'))
+    assert record_filter.might_match(get_line(dp='1.0'))
+    assert record_filter.might_match(get_line(dp='10e-1'))
+    assert not record_filter.might_match(get_line(dp='12'))
+    assert not record_filter.might_match(get_line(dp='2'))
+
+
+@pytest.mark.parametrize('dp', ['2.9999999999999999', '3.00000000000000001', '-0.0', '3.0'])
+def test_might_match_fraction_rounds_to_integer(dp):
+    """
+    A number with a fraction can decode to the integer, so it is never dropped
+    by the raw scan when the exact check passes
+    """
+    value = round(float(dp))
+    record_filter = RecordFilter().add_equals('dp', value)
+    line = get_line(dp=dp)
+
+    assert record_filter.matches(json.loads(line))
+    assert record_filter.might_match(line)
+    assert record_filter.might_match(line.encode('utf-8'))
+
+
+def test_might_match_whitespace_between_key_and_value():
+    """
+    JSON allows whitespace around the ':' separator
+    """
+    record_filter = RecordFilter().add_equals('dp', 2)
+
+    assert record_filter.might_match('{"dp" :  2}')
+
+
+def test_might_match_escaped_line_is_candidate():
+    """
+    Line with escape sequences could spell the value differently. Keep it
+    """
+    record_filter = RecordFilter().add_equals('nm', 'a.pdf')
+
+    assert record_filter.might_match('{"nm":"\\u0061.pdf"}')
+    assert record_filter.matches({'nm': 'a.pdf'})
+
+
+def test_might_match_prefix():
+    """
+    Prefix predicate matches the start of a string value
+    """
+    record_filter = RecordFilter().add_prefix('nm', 'phk')
+
+    assert record_filter.might_match(get_line())
+    assert not record_filter.might_match(get_line(nm='asdf.pdf'))
+
+
+def test_matches_all_predicates():
+    """
+    Exact check requires every predicate to match
+    """
+    record_filter = RecordFilter().add_equals('bg', BUSINESS).add_equals('dp', 1)
+
+    assert record_filter.matches({'bg': BUSINESS, 'dp': 1})
+    assert not record_filter.matches({'bg': BUSINESS, 'dp': 2})
+    assert not record_filter.matches({'bg': BUSINESS})
+    assert not record_filter.matches(['not', 'a', 'document'])
+
+
+def test_matches_boolean_is_not_integer():
+    """
+    true == 1 in Python but not in JSON
+    """
+    record_filter = RecordFilter().add_equals('dp', 1)
+
+    assert not record_filter.matches({'dp': True})
+
+
+def test_add_equals_unsupported_type():
+    """
+    Only strings and integers can be pushed down to the raw scan
+    """
+    with pytest.raises(TypeError):
+        RecordFilter().add_equals('ts', 1.5)
@@ -0,0 +1,81 @@
+"""
+Unit tests for json_log_parser.resource_guard module
+"""
+from unittest.mock import patch
+
+import pytest
+
+from json_log_parser.resource_guard import ResourceGuard
+
+
+def test_get_batch_lines():
+    """
+    Batches end at the line budget
+    """
+    guard = ResourceGuard(max_lines=25, check_interval=10)
+
+    assert [guard.get_batch_lines(lines) for lines in (0, 10, 20, 25)] == [10, 10, 5, 0]
+    assert ResourceGuard(check_interval=10).get_batch_lines(10 ** 9) == 10
+
+
+def test_get_truncation_reason_line_limit():
+    guard = ResourceGuard(max_lines=100)
+
+    assert guard.get_truncation_reason(99) is None
+    assert 'line limit' in guard.get_truncation_reason(100)
+
+
+@patch('json_log_parser.resource_guard.time.monotonic')
+def test_get_truncation_reason_time_limit(mock_monotonic):
+    """
+    The time budget starts with start
+    """
+    mock_monotonic.return_value = 1000.0
+    guard = ResourceGuard(time_limit=5)
+    guard.start()
+
+    mock_monotonic.return_value = 1004.0
+    assert guard.get_truncation_reason(0) is None
+    mock_monotonic.return_value = 1005.0
+    assert 'time limit' in guard.get_truncation_reason(0)
+
+
+@patch('json_log_parser.resource_guard.ResourceGuard.get_rss')
+def test_memory_limit(mock_get_rss):
+    """
+    Memory is low at the high water mark, reading stops at the limit
+    """
+    guard = ResourceGuard(memory_limit=1000, high_water=0.9)
+
+    mock_get_rss.return_value = 899
+    assert not guard.is_memory_low()
+    assert guard.get_truncation_reason(0) is None
+    mock_get_rss.return_value = 900
+    assert guard.is_memory_low()
+    assert guard.get_truncation_reason(0) is None
+    mock_get_rss.return_value = 1000
+    assert 'memory limit' in guard.get_truncation_reason(0)
+
+
+def test_no_limits():
+    guard = ResourceGuard()
+
+    assert not guard.is_memory_low()
+    assert guard.get_truncation_reason(10 ** 9) is None
+
+
+def test_get_rss():
+    """
+    The resident set size of a running Python process is more than a megabyte
+    """
+    assert ResourceGuard.get_rss() > 1024 * 1024
+
+
+@pytest.mark.parametrize('arguments', [{'check_interval': 0}, {'high_water': 0},
+                                       {'high_water': 1.5}])
+def test_invalid_arguments(arguments):
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ResourceGuard(**arguments)
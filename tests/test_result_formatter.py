@@ -0,0 +1,110 @@
+"""
+Unit tests for json_log_parser.result_formatter module
+"""
+import csv
+import io
+import json
+
+import pytest
+
+from json_log_parser.exceptions.report_format_error import ReportFormatError
+from json_log_parser.result_formatter import ResultFormatter
+
+COUNTS = {'txt': 2, 'pdf': 5, 'exe': 2, 'тест': 1, 'a,"b': 3}
+
+
+def test_text_sorted_by_name():
+    """
+    Happy path: same format as the original report
+    """
+    assert ResultFormatter().format({'txt': 1, 'pdf': 2, 'ext': 1}) == 'ext: 1\npdf: 2\ntxt: 1\n'
+
+
+def test_sort_by_count_with_limit():
+    """
+    Largest counts first, ties by name
+    """
+    formatter = ResultFormatter(sort_by='count', limit=3)
+
+    assert formatter.get_rows(COUNTS) == [('pdf', 5), ('a,"b', 3), ('exe', 2)]
+    assert ResultFormatter(sort_by='count', limit=0).format(COUNTS) == ''
+
+
+def test_json():
+    """
+    JSON object in report order
+    """
+    report = ResultFormatter('json', sort_by='count').format(COUNTS)
+
+    assert json.loads(report) == COUNTS
+    assert list(json.loads(report)) == ['pdf', 'a,"b', 'exe', 'txt', 'тест']
+    assert ResultFormatter('json').format({}) == '{}\n'
+
+
+def test_csv():
+    """
+    CSV with a header row and quoting
+    """
+    rows = list(csv.reader(io.StringIO(ResultFormatter('csv').format(COUNTS), newline='')))
+
+    assert rows[0] == ['extension', 'count']
+    assert rows[1:] == [[key, str(value)] for key, value in sorted(COUNTS.items())]
+
+
+def test_binary_round_trip():
+    """
+    Binary report is read back in the same order
+    """
+    data = ResultFormatter('binary', sort_by='count').format(COUNTS)
+
+    assert ResultFormatter.load_binary(data) == ResultFormatter(sort_by='count').get_rows(COUNTS)
+
+
+@pytest.mark.parametrize('data', [b'', b'JLPR', b'XXXX\x01\x00\x00\x00\x00',
+                                  b'JLPR\x02\x00\x00\x00\x00', b'JLPR\x01\x01\x00\x00\x00'])
+def test_load_binary_invalid(data):
+    """
+    Raises ReportFormatError
+    """
+    with pytest.raises(ReportFormatError):
+        ResultFormatter.load_binary(data)
+
+
+def test_write_in_chunks(monkeypatch):
+    """
+    Rows are written in chunks, not one call per row
+    """
+    monkeypatch.setattr('json_log_parser.result_formatter.CHUNK_ROWS', 100)
+    counts = {'ext{0}'.format(i): i for i in range(1000)}
+    writes = []
+
+    class Stream(io.StringIO):
+        def write(self, chunk):
+            writes.append(chunk)
+            return super().write(chunk)
+
+    stream = Stream()
+    ResultFormatter('json').write(counts, stream)
+
+    assert len(writes) == 12
+    assert json.loads(stream.getvalue()) == counts
+
+
+def test_write_binary_to_text_stream():
+    """
+    Binary report goes to the buffer of a text stream
+    """
+    stream = io.TextIOWrapper(io.BytesIO())
+    ResultFormatter('binary').write({'pdf': 1}, stream)
+
+    assert ResultFormatter.load_binary(stream.buffer.getvalue()) == [('pdf', 1)]
+
+
+@pytest.mark.parametrize('arguments', [{'output_format': 'xml'}, {'sort_by': 'size'},
+                                       {'limit': -1}])
+def test_invalid_arguments(arguments):
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        ResultFormatter(**arguments)
@@ -0,0 +1,87 @@
+"""
+Unit tests for json_log_parser.sampling module
+"""
+import pytest
+
+from json_log_parser.file_reader import FileReader
+from json_log_parser.sampling import BlockSampler, LineSampler, SampleEstimator
+
+
+def test_line_sampler_is_deterministic():
+    """
+    Same seed, same sample
+    """
+    lines = [str(i) for i in range(1000)]
+    first = list(LineSampler(0.1, seed=42).sample(lines))
+    second = list(LineSampler(0.1, seed=42).sample(lines))
+
+    assert first == second
+    assert 50 < len(first) < 150
+
+
+def test_line_sampler_invalid_rate():
+    """
+    Rate outside of (0, 1] raises ValueError
+    """
+    with pytest.raises(ValueError):
+        LineSampler(0)
+
+    with pytest.raises(ValueError):
+        LineSampler(1.5)
+
+
+def test_block_sampler_full_rate_reads_every_line_once(log_file):
+    """
+    With rate 1 block sampling must return every line exactly once,
+    no matter where the block boundaries fall
+    """
+    sampler = BlockSampler(1, block_size=777)
+    lines = list(sampler.sample_file(log_file))
+
+    assert len(lines) == 1000
+    assert len(set(lines)) == 1000
+    assert sampler.get_effective_rate() == 1
+
+
+def test_block_sampler_reads_subset(log_file):
+    """
+    Low rate reads only a fraction of the file. Deterministic under seed
+    """
+    first = list(BlockSampler(0.2, block_size=1000, seed=7).sample_file(log_file))
+    second = list(BlockSampler(0.2, block_size=1000, seed=7).sample_file(log_file))
+
+    assert first == second
+    assert 0 < len(first) < 1000
+
+
+def test_read_lines_in_range_boundary_on_newline(log_file):
+    """
+    Range that starts exactly at the beginning of a line keeps that line
+    """
+    with open(log_file, 'rb') as r:
+        first_line = r.readline()
+        lines = list(FileReader.read_lines_in_range(r, len(first_line), len(first_line) + 1))
+
+    assert len(lines) == 1
+    assert b'file1.pdf' in lines[0]
+
+
+def test_estimate_extension_counts():
+    """
+    Counts are scaled by the rate and the interval contains the estimate
+    """
+    estimates = SampleEstimator.estimate_extension_counts({'pdf': 50}, 0.1)
+    pdf = estimates['pdf']
+
+    assert pdf.sampled == 50
+    assert pdf.estimate == pytest.approx(500)
+    assert 50 <= pdf.low < 500 < pdf.high
+
+
+def test_estimate_extension_counts_full_rate_is_exact():
+    """
+    Nothing to estimate if the whole file was read
+    """
+    estimates = SampleEstimator.estimate_extension_counts({'pdf': 50}, 1)
+
+    assert estimates['pdf'].low == estimates['pdf'].high == 50
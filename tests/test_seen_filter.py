@@ -0,0 +1,60 @@
+"""
+Unit tests for json_log_parser.seen_filter module
+"""
+import pytest
+
+from json_log_parser.exceptions.seen_filter_error import SeenFilterError
+from json_log_parser.seen_filter import SeenFilter
+
+
+def test_add_reports_new_then_seen(tmp_path):
+    """
+    Happy path: a filename is new once and seen afterwards, also after reopening
+    """
+    filename = str(tmp_path / 'seen.bloom')
+    seen_filter = SeenFilter.open(filename, initial_capacity=100)
+    assert not seen_filter.add('a.pdf')
+    assert seen_filter.add('a.pdf')
+    seen_filter.close()
+
+    seen_filter = SeenFilter.open(filename)
+    assert 'a.pdf' in seen_filter
+    assert len(seen_filter) == 1
+    seen_filter.close()
+
+
+def test_grows_without_forgetting(tmp_path):
+    """
+    Adding far more filenames than the initial capacity adds slices.
+    No added filename is ever reported as new and false positives stay near the rate
+    """
+    seen_filter = SeenFilter.open(str(tmp_path / 'seen.bloom'), error_rate=0.01,
+                                  initial_capacity=100)
+    for number in range(5000):
+        seen_filter.add('file{0}.pdf'.format(number))
+
+    assert len(seen_filter.slices) > 3
+    assert all('file{0}.pdf'.format(number) in seen_filter for number in range(5000))
+    false_positives = sum('other{0}.pdf'.format(number) in seen_filter
+                          for number in range(10000))
+    assert false_positives < 200
+    seen_filter.close()
+
+
+def test_open_not_a_filter(tmp_path):
+    """
+    Raises SeenFilterError
+    """
+    path = tmp_path / 'seen.bloom'
+    path.write_bytes(b'something else entirely')
+    with pytest.raises(SeenFilterError):
+        SeenFilter.open(str(path))
+
+
+@pytest.mark.parametrize('error_rate, initial_capacity', [(0, 10), (1, 10), (0.1, 0)])
+def test_invalid_arguments(tmp_path, error_rate, initial_capacity):
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        SeenFilter.open(str(tmp_path / 'seen.bloom'), error_rate, initial_capacity)
@@ -0,0 +1,65 @@
+"""
+Unit tests for json_log_parser.shared_memory_transport module
+"""
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from json_log_parser.shared_memory_transport import SharedMemoryTransport
+from json_log_parser.string_store import FilenameStore
+
+
+def test_publish_and_merge():
+    """
+    Happy path: sorted runs are merged without duplicates
+    """
+    store = FilenameStore('ext')
+    for name in ('b.txt', 'd', 'a.pdf'):
+        store.add(name)
+    block_names = [
+        SharedMemoryTransport.publish({'a.pdf', 'c.exe', 'résumé.doc', '\ud800.txt'}),
+        SharedMemoryTransport.publish(store),
+        SharedMemoryTransport.publish(set()),
+    ]
+    unique_files = SharedMemoryTransport.merge(block_names, 'ext')
+
+    assert sorted(unique_files) == sorted(
+        {'a.pdf', 'b.txt', 'c.exe', 'd', 'résumé.doc', '\ud800.txt'})
+    assert len(unique_files) == 6
+    assert unique_files.extensions.get(unique_files.extension_ids[unique_files.get_id('d')]) \
+        == 'ext'
+
+
+def test_merge_unlinks_blocks():
+    """
+    Blocks are removed once they are merged
+    """
+    block_name = SharedMemoryTransport.publish({'a.pdf'})
+    SharedMemoryTransport.merge([block_name], 'ext')
+
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=block_name)
+
+
+def test_merge_missing_block_unlinks_the_others():
+    """
+    A missing block fails the merge. The other blocks are removed anyway
+    Raises FileNotFoundError
+    """
+    block_name = SharedMemoryTransport.publish({'a.pdf'})
+    with pytest.raises(FileNotFoundError):
+        SharedMemoryTransport.merge(['does_not_exist', block_name], 'ext')
+
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=block_name)
+
+
+def test_unlink():
+    """
+    Unlinking is safe for blocks that are already gone
+    """
+    block_name = SharedMemoryTransport.publish({'a.pdf'})
+    SharedMemoryTransport.unlink([block_name, block_name])
+
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=block_name)
@@ -0,0 +1,73 @@
+"""
+Unit tests for json_log_parser.spilling_set module
+"""
+import os
+
+import pytest
+
+from json_log_parser.spilling_set import SpillingSet
+
+
+def test_spilled_strings_are_unique_and_sorted(tmp_path):
+    """
+    Happy path: iteration returns every string once, in sorted order
+    """
+    strings = ['file{0}.{1}'.format(i % 500, 'pdf' if i % 3 else 'txt') for i in range(3000)]
+    strings += ['тест.ткт', '\ud800.bad', 'new\nline', '', '￿']
+    spilling_set = SpillingSet(2000, spill_dir=str(tmp_path), max_open_runs=3)
+    for string in strings:
+        spilling_set.add(string)
+
+    assert spilling_set.spilled_strings > 0
+    assert len(spilling_set.runs) < 3
+    assert list(spilling_set) == sorted(set(strings))
+    # Iterating again gives the same result
+    assert list(spilling_set) == sorted(set(strings))
+
+
+def test_memory_stays_within_budget():
+    """
+    Strings in memory never use more than the budget
+    """
+    spilling_set = SpillingSet(10000)
+    for i in range(2000):
+        spilling_set.add('file{0}.txt'.format(i))
+        assert spilling_set.memory_used <= 10000
+
+    assert len(list(spilling_set)) == 2000
+
+
+def test_no_spill():
+    """
+    Small set stays in memory
+    """
+    spilling_set = SpillingSet(1024 * 1024)
+    for string in ['b', 'a', 'b']:
+        spilling_set.add(string)
+
+    assert not spilling_set.runs
+    assert list(spilling_set) == ['a', 'b']
+    assert spilling_set
+    assert not SpillingSet(1)
+
+
+def test_close_removes_runs(tmp_path):
+    """
+    Run files are removed on close
+    """
+    spilling_set = SpillingSet(1, spill_dir=str(tmp_path))
+    spilling_set.add('a.txt')
+    spilling_set.add('b.txt')
+    assert len(os.listdir(str(tmp_path))) == 1
+
+    spilling_set.close()
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize('memory_budget, max_open_runs', [(0, 2), (100, 1)])
+def test_invalid_arguments(memory_budget, max_open_runs):
+    """
+    Raises ValueError
+    """
+    with pytest.raises(ValueError):
+        SpillingSet(memory_budget, max_open_runs=max_open_runs)
@@ -0,0 +1,95 @@
+"""
+Unit tests for json_log_parser.string_store module
+"""
+import sys
+
+import pytest
+
+from json_log_parser.string_store import FilenameStore, StringStore
+
+
+@pytest.fixture(scope='function')
+def filename_store():
+    return FilenameStore('no_extension', initial_capacity=8)
+
+
+def test_add_returns_same_id_for_same_string():
+    """
+    Happy path: strings are deduplicated
+    """
+    store = StringStore()
+    first = store.add('file1.txt')
+    second = store.add('file2.txt')
+
+    assert store.add('file1.txt') == first
+    assert first != second
+    assert len(store) == 2
+    assert store.get(second) == 'file2.txt'
+
+
+def test_grow_keeps_all_strings():
+    """
+    Table grows past its initial capacity without losing strings
+    """
+    store = StringStore(initial_capacity=8)
+    ids = [store.add('file{0}'.format(i)) for i in range(1000)]
+
+    assert len(store) == 1000
+    assert [store.get_id('file{0}'.format(i)) for i in range(1000)] == ids
+    assert 'file999' in store
+    assert 'file1000' not in store
+    assert list(store)[:2] == ['file0', 'file1']
+
+
+def test_non_ascii_and_surrogates():
+    """
+    Anything json can decode can be stored and read back
+    """
+    store = StringStore()
+    for string in ['тест.ткт', '\ud800.bad', '']:
+        assert store.get(store.add(string)) == string
+
+
+def test_filename_store_extensions(filename_store):
+    """
+    Extension is everything after the last dot, same as FileExtensionCounter
+    """
+    for filename in ['a.txt', 'b.tar.gz', 'noext', 'c.', '.bashrc', 'тест.ткт', 'a.txt']:
+        filename_store.add(filename)
+
+    extensions = [filename_store.extensions.get(extension_id)
+                  for extension_id in filename_store.extension_ids]
+    assert extensions == ['txt', 'gz', 'no_extension', '', 'bashrc', 'ткт']
+
+
+def test_add_unique_bytes(filename_store, monkeypatch):
+    """
+    Bulk add in several chunks keeps ids, lookups and extensions consistent
+    with add
+    """
+    monkeypatch.setattr('json_log_parser.string_store.BULK_CHUNK', 3)
+    filename_store.add('first.pdf')
+    filename_store.add_unique_bytes(
+        iter([b'a.txt', b'b.tar.gz', b'noext', b'c.', '\u0442.\u0442'.encode('utf-8')]))
+    filename_store.add('last.pdf')
+
+    assert list(filename_store) == ['first.pdf', 'a.txt', 'b.tar.gz', 'noext', 'c.',
+                                    '\u0442.\u0442', 'last.pdf']
+    assert filename_store.get_id('noext') == 3
+    assert filename_store.add('a.txt') == 1
+    assert len(filename_store) == 7
+    extensions = [filename_store.extensions.get(extension_id)
+                  for extension_id in filename_store.extension_ids]
+    assert extensions == ['pdf', 'txt', 'gz', 'no_extension', '', '\u0442', 'pdf']
+
+
+def test_filename_store_is_smaller_than_set(filename_store):
+    """
+    The store needs a fraction of the memory of a set of str objects
+    """
+    filenames = ['file{0}.txt'.format(i) for i in range(10000)]
+    for filename in filenames:
+        filename_store.add(filename)
+
+    set_size = sys.getsizeof(set(filenames)) + sum(sys.getsizeof(f) for f in filenames)
+    assert filename_store.get_memory_size() < set_size * 0.4
@@ -0,0 +1,103 @@
+"""
+Unit tests for json_log_parser.tenant_partitions module
+"""
+import os
+
+import pytest
+
+from json_log_parser.extension_normalizer import ExtensionNormalizer
+from json_log_parser.string_store import FilenameStore
+from json_log_parser.tenant_partitions import TenantPartitions
+
+
+def test_counts_per_tenant():
+    """
+    Every tenant counts its own unique filenames
+    """
+    partitions = TenantPartitions()
+    for tenant, filename in [('a', 'x.pdf'), ('a', 'x.pdf'), ('a', 'y.pdf'), ('b', 'x.pdf'),
+                             ('b', 'readme'), ('b', '')]:
+        partitions.add(tenant, filename)
+
+    assert partitions.get_extension_counts() == {'a': {'pdf': 2},
+                                                 'b': {'pdf': 1, 'no_extension': 1}}
+    assert len(partitions) == 2
+
+
+def test_small_partitions_stay_compact():
+    """
+    A partition is a list up to the threshold and a set or FilenameStore after it
+    """
+    partitions = TenantPartitions(compact_threshold=2)
+    partitions.add('small', 'a.txt')
+    partitions.add('large', 'a.txt')
+    partitions.add('large', 'b.txt')
+    shard = partitions.shards[partitions.get_shard('small')]
+    assert isinstance(shard['small'].filenames, list)
+    partitions.add('large', 'c.txt')
+    assert isinstance(partitions.shards[partitions.get_shard('large')]['large'].filenames, set)
+
+    compact = TenantPartitions(compact_threshold=1, compact_strings=True)
+    compact.add('large', 'a.txt')
+    compact.add('large', 'b.txt')
+    compact.add('large', 'b.txt')
+    assert isinstance(compact.shards[compact.get_shard('large')]['large'].filenames,
+                      FilenameStore)
+    assert compact.get_extension_counts() == {'large': {'txt': 2}}
+
+
+def test_shards_are_stable():
+    """
+    The shard of a tenant does not depend on the process
+    """
+    partitions = TenantPartitions(shard_count=4)
+    assert partitions.get_shard('77e28e28-745a-474b-a496-3c0e086eaec0') == \
+        TenantPartitions(shard_count=4).get_shard('77e28e28-745a-474b-a496-3c0e086eaec0')
+    partitions.add('a', 'x.pdf')
+    assert 'a' in partitions.shards[partitions.get_shard('a')]
+
+
+def test_cold_partitions_are_spilled(tmp_path):
+    """
+    Over the memory budget the least recently used partitions go to disk and the
+    counts stay exact
+    """
+    partitions = TenantPartitions(memory_budget=2000, spill_dir=str(tmp_path))
+    for i in range(20):
+        partitions.add('cold', 'cold{0}.pdf'.format(i))
+    for i in range(20):
+        partitions.add('hot', 'hot{0}.txt'.format(i))
+    assert partitions.memory_used <= 2000
+    assert partitions.spilled_partitions >= 1
+    assert os.listdir(str(tmp_path))
+
+    # Filenames seen before the spill are not counted twice
+    for i in range(20):
+        partitions.add('cold', 'cold{0}.pdf'.format(i))
+    assert partitions.get_extension_counts() == {'cold': {'pdf': 20}, 'hot': {'txt': 20}}
+    partitions.close()
+    assert not os.listdir(str(tmp_path))
+
+
+def test_update_merges_partitions(tmp_path):
+    """
+    Partitions of two parts of a log merge into the counts of the whole log
+    """
+    first = TenantPartitions(normalizer=ExtensionNormalizer())
+    second = TenantPartitions(memory_budget=1, spill_dir=str(tmp_path))
+    first.add('a', 'x.PDF')
+    second.add('a', 'x.PDF')
+    second.add('a', 'y.pdf')
+    second.add('b', 'z.txt')
+    first.update(second)
+    assert first.get_extension_counts() == {'a': {'pdf': 2}, 'b': {'txt': 1}}
+
+    with pytest.raises(ValueError):
+        first.update(TenantPartitions(shard_count=3))
+
+
+@pytest.mark.parametrize('arguments', [{'shard_count': 0}, {'compact_threshold': -1},
+                                       {'memory_budget': 0}])
+def test_invalid_arguments(arguments):
+    with pytest.raises(ValueError):
+        TenantPartitions(**arguments)
@@ -0,0 +1,153 @@
+"""
+Unit tests for json_log_parser.validator_codegen module
+"""
+import copy
+
+import pytest
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from json_log_parser.exceptions.json_schema_error import JSONSchemaError
+from json_log_parser.exceptions.schema_config_error import SchemaConfigError
+from json_log_parser.json_schema import JSONSchema
+from json_log_parser.json_validator import JSONValidator
+from json_log_parser.log_parser import LogParser
+from json_log_parser.validator_codegen import ValidatorCodegen
+
+DOCUMENT = {
+    "ts": 1551140352,
+    "pt": 55,
+    "si": "3380fb19-0bdb-46ab-8781-e4c5cd448074",
+    "uu": "0dd24034-36d6-4b1e-a6c1-a52cc984f105",
+    "bg": "77e28e28-745a-474b-a496-3c0e086eaec0",
+    "sha": "abb3ec1b8174043d5cd21d21fbe3c3fb3e9a11c7ceff3314a3222404feedda52",
+    "nm": "phkkrw.ext",
+    "ph": "/efvrfutgp/expgh/phkkrw",
+    "dp": 2,
+}
+
+# Single and multiple changes to a valid document
+MUTATIONS = [
+    {},
+    {'ts': 'not a timestamp'},
+    {'ts': True},
+    {'ts': 1.5},
+    {'pt': -1},
+    {'pt': 1.0},
+    {'pt': 1.5},
+    {'si': 'not a uuid'},
+    {'bg': 12},
+    {'sha': '0x' + 'A' * 64},
+    {'sha': 'a' * 63},
+    {'nm': None},
+    {'ph': []},
+    {'dp': 0},
+    {'dp': 4},
+    {'dp': False},
+    {'pt': -1, 'dp': 4},
+    {'si': 'bad', 'uu': 'bad'},
+    {'ts': None, 'nm': None},
+]
+
+
+def get_jsonschema_message(schema, document):
+    """
+    Error message that jsonschema.validate would produce
+    """
+    error = best_match(validator_for(schema)(schema).iter_errors(document))
+    return None if error is None else error.message
+
+
+def get_generated_message(validator, document):
+    try:
+        validator(document, None)
+    except JSONSchemaError as error:
+        return str(error)
+    return None
+
+
+@pytest.mark.parametrize('mutation', MUTATIONS)
+def test_generated_validator_matches_jsonschema(mutation):
+    """
+    Generated validator reports the same first error as jsonschema
+    """
+    schema = JSONSchema.get_json_schema()
+    validator = ValidatorCodegen.get_validator(schema, {})
+    document = copy.deepcopy(DOCUMENT)
+    document.update(mutation)
+
+    assert get_generated_message(validator, document) == get_jsonschema_message(schema, document)
+
+
+@pytest.mark.parametrize('missing', [['si'], ['nm', 'ts'], ['ph'], ['dp', 'pt']])
+def test_generated_validator_missing_fields_match_jsonschema(missing):
+    """
+    Missing required property is reported before any other error
+    """
+    schema = JSONSchema.get_json_schema()
+    validator = ValidatorCodegen.get_validator(schema, {})
+    document = copy.deepcopy(DOCUMENT)
+    document['dp'] = 99
+    for field in missing:
+        del document[field]
+
+    assert get_generated_message(validator, document) == get_jsonschema_message(schema, document)
+
+
+def test_generated_validator_not_an_object():
+    """
+    Document that is not an object
+    """
+    schema = JSONSchema.get_json_schema()
+    validator = ValidatorCodegen.get_validator(schema, {})
+
+    assert get_generated_message(validator, [1]) == get_jsonschema_message(schema, [1])
+
+
+def test_get_validator_is_cached():
+    """
+    Same schema and rules, same generated function
+    """
+    schema = JSONSchema.get_json_schema()
+    rules = JSONSchema.get_field_rules()
+
+    assert ValidatorCodegen.get_validator(schema, rules) is \
+        ValidatorCodegen.get_validator(copy.deepcopy(schema), dict(rules))
+    assert ValidatorCodegen.get_validator(schema, rules) is not \
+        ValidatorCodegen.get_validator(schema, {})
+
+
+def test_unsupported_keyword():
+    """
+    Keywords the generator does not understand raise SchemaConfigError
+    """
+    with pytest.raises(SchemaConfigError) as err:
+        ValidatorCodegen.get_validator({'properties': {'a': {'anyOf': []}}}, {})
+
+    assert "Unsupported schema keyword 'anyOf' in 'a'" in str(err)
+
+
+def test_unknown_rule():
+    """
+    Unknown field rule raises SchemaConfigError
+    """
+    with pytest.raises(SchemaConfigError):
+        ValidatorCodegen.get_validator({}, {'a': 'checksum'})
+
+
+def test_custom_log_shape_from_config_file():
+    """
+    Happy path: a different log shape is validated and counted by its name field
+    """
+    validator = JSONValidator.from_config_file(
+        'tests/data/schema_config_tests/schema_config.json')
+    log_parser = LogParser(json_validator=validator)
+    extensions = log_parser.parse_log('tests/data/schema_config_tests/custom_log.json')
+
+    assert extensions == {'pdf': 2}
+    assert log_parser.processing_stats['fail'] == 3
+    assert set(log_parser.exception_stats) == {
+        "JSONSchemaError-'debug' is not one of ['info', 'warn']",
+        "FilenameError-Invalid character '/' in filename",
+        "JSONSchemaError-'time' is a required property",
+    }
@@ -0,0 +1,127 @@
+"""
+Unit tests for json_log_parser.work_queue module
+"""
+import multiprocessing
+import os
+from unittest.mock import patch
+
+import pytest
+
+from json_log_parser.exceptions.work_queue_error import WorkQueueError
+from json_log_parser.log_parser import LogParser
+from json_log_parser.work_queue import WorkQueueCoordinator, WorkQueueWorker
+
+
+def run_worker(spool_dir, worker_id):
+    """
+    Entry point of a local worker process
+    """
+    WorkQueueWorker(spool_dir, worker_id=worker_id).run(exit_when_idle=True, poll_interval=0)
+
+
+def test_single_worker_processes_all_tasks(tmp_path, log_file):
+    """
+    Happy path: merged result is the same as processing the whole file at once
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir)
+    tasks = coordinator.submit([log_file], chunk_size=5000)
+
+    processed = WorkQueueWorker(spool_dir, worker_id='w1').run(exit_when_idle=True)
+    state = coordinator.wait(timeout=10, poll_interval=0)
+
+    assert processed == len(tasks) > 1
+    assert state == LogParser().build_state(log_file)
+    assert os.path.exists(os.path.join(spool_dir, 'finished'))
+
+
+def test_several_worker_processes(tmp_path, log_file):
+    """
+    Local worker processes share the spool directory. Every line is counted once
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir)
+    coordinator.submit([log_file, log_file], chunk_size=3000)
+
+    workers = [multiprocessing.Process(target=run_worker, args=(spool_dir, 'w{0}'.format(i)))
+               for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    state = coordinator.wait(timeout=10, poll_interval=0)
+    assert len(state.unique_files) == 1000
+    assert state.processing_stats['success'] == 2000
+
+
+def test_abandoned_task_is_retried(tmp_path, log_file):
+    """
+    Worker claims a task and dies. The coordinator requeues it after the lease
+    expires and another worker finishes it
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir, lease_timeout=60)
+    coordinator.submit([log_file])
+
+    _, claimed_path = WorkQueueWorker(spool_dir, worker_id='dead').claim()
+    assert coordinator.requeue_abandoned_tasks() == 0
+
+    os.utime(claimed_path, (0, 0))
+    assert coordinator.requeue_abandoned_tasks() == 1
+
+    WorkQueueWorker(spool_dir, worker_id='alive').run(exit_when_idle=True)
+    assert len(coordinator.wait(timeout=10, poll_interval=0).unique_files) == 1000
+
+
+def test_old_pending_task_is_not_stale_when_claimed(tmp_path, log_file):
+    """
+    A task that waited longer than the lease timeout starts a fresh lease when
+    it is claimed, so it is not requeued under the worker
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir, lease_timeout=60)
+    coordinator.submit([log_file])
+    pending_dir = os.path.join(spool_dir, 'pending')
+    for pending_filename in os.listdir(pending_dir):
+        os.utime(os.path.join(pending_dir, pending_filename), (0, 0))
+
+    assert WorkQueueWorker(spool_dir, worker_id='w1').claim() is not None
+    assert coordinator.requeue_abandoned_tasks() == 0
+
+
+def test_task_requeued_while_claiming_is_skipped(tmp_path, log_file):
+    """
+    The coordinator requeues a task right after a worker renamed it.
+    The worker skips it instead of failing
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir)
+    coordinator.submit([log_file])
+    rename = os.rename
+
+    def rename_and_requeue(source, destination):
+        rename(source, destination)
+        rename(destination, source)
+
+    with patch('json_log_parser.work_queue.os.rename', side_effect=rename_and_requeue):
+        assert WorkQueueWorker(spool_dir, worker_id='w1').claim() is None
+    assert WorkQueueWorker(spool_dir, worker_id='w2').claim() is not None
+
+
+def test_failed_task_raises(tmp_path, log_file):
+    """
+    Input file disappears before the worker gets to it
+    Raises WorkQueueError and stops the workers
+    """
+    spool_dir = str(tmp_path / 'spool')
+    coordinator = WorkQueueCoordinator(spool_dir)
+    coordinator.submit([log_file])
+    os.remove(log_file)
+
+    WorkQueueWorker(spool_dir, worker_id='w1').run(exit_when_idle=True)
+    with pytest.raises(WorkQueueError) as err:
+        coordinator.wait(timeout=10, poll_interval=0)
+
+    assert 'does not exist' in str(err)
+    assert coordinator.is_finished()